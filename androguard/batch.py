@@ -0,0 +1,473 @@
+# Allows type hinting of types not-yet-declared
+# in Python >= 3.7
+# see https://peps.python.org/pep-0563/
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+from typing import Callable, Iterable, Iterator, TextIO, Union
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, the memory ceiling is not supported there
+    resource = None
+
+
+def iter_apk_files(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Yield all APK files given by `paths`.
+
+    Files are yielded as they are, directories are walked recursively and
+    all files with the `.apk` extension are yielded in sorted order.
+
+    :param paths: a list of files and directories
+    :returns: an iterator of filenames
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".apk"):
+                    yield os.path.join(root, name)
+
+
+def scan_apk(filename: str) -> dict:
+    """
+    Analyze a single APK and return a JSON serializable summary.
+
+    The summary contains the most important information of the
+    manifest, the requested permissions and the usage of API methods
+    which are protected by a permission.
+
+    :param filename: the filename of the APK
+    :returns: a dictionary containing the summary
+    """
+    from androguard.misc import AnalyzeAPK
+
+    with open(filename, "rb") as fd:
+        sha256 = hashlib.sha256(fd.read()).hexdigest()
+
+    a, _, dx = AnalyzeAPK(filename)
+
+    api_usage = {}
+    try:
+        for meth, perms in dx.get_permissions(
+            a.get_effective_target_sdk_version()
+        ):
+            for perm in perms:
+                api_usage.setdefault(perm, []).append(meth.full_name)
+    except ValueError as e:
+        logger.warning("No API permission mapping: {}".format(e))
+
+    return dict(
+        sha256=sha256,
+        package=a.get_package(),
+        app_name=a.get_app_name(),
+        version_code=a.get_androidversion_code(),
+        version_name=a.get_androidversion_name(),
+        min_sdk_version=a.get_min_sdk_version(),
+        target_sdk_version=a.get_target_sdk_version(),
+        main_activity=a.get_main_activity(),
+        activities=a.get_activities(),
+        services=a.get_services(),
+        receivers=a.get_receivers(),
+        providers=a.get_providers(),
+        permissions=a.get_permissions(),
+        api_usage={
+            perm: sorted(set(meths))
+            for perm, meths in sorted(api_usage.items())
+        },
+    )
+
+
+def scan_signatures(
+    filename: str,
+    hashes: Iterable[str] = ("sha1",),
+    details: bool = False,
+) -> dict:
+    """
+    Read the signatures of a single APK and return a JSON serializable
+    summary.
+
+    This is a fast path for certificate fingerprints: the APK is opened
+    with `skip_analysis`, thus only the `<manifest>` tag is read to get
+    the package name, the v1 signature files and the APK Signing Block
+    are parsed, but not the manifest and the resources.
+    The minSdkVersion is only read for v1 signature files with several
+    SignerInfos, see [get_certificate_der][androguard.core.apk.APK.get_certificate_der].
+    The package is empty if the APK has no valid manifest.
+
+    Every unique certificate is hashed once with each of `hashes`.
+
+    :param filename: the filename of the APK
+    :param hashes: the names of the hash functions for the fingerprints (default: sha1)
+    :param details: add the issuer, subject and validity of the certificates and the algorithm and size of the public keys (default: False)
+    :returns: a dictionary containing the summary
+    """
+    from androguard.core.apk import (
+        APK,
+        FileNotPresent,
+        get_manifest_attributes,
+    )
+
+    a = APK(filename, skip_analysis=True, lazy=True)
+    try:
+        package = get_manifest_attributes(
+            a.get_file("AndroidManifest.xml"), filename
+        ).get("package", "")
+    except (FileNotPresent, RuntimeError) as e:
+        logger.debug("No package name for {}: {}".format(filename, e))
+        package = ""
+
+    # keep the order, but remove duplicates
+    certs = dict.fromkeys(
+        a.get_certificates_der_v3()
+        + a.get_certificates_der_v2()
+        + [a.get_certificate_der(x) for x in a.get_signature_names()]
+    )
+    certs.pop(None, None)
+    pkeys = dict.fromkeys(
+        a.get_public_keys_der_v3() + a.get_public_keys_der_v2()
+    )
+
+    certificates = []
+    for cert in certs:
+        c = dict(hashes={n: hashlib.new(n, cert).hexdigest() for n in hashes})
+        if details:
+            c.update(_get_certificate_details(cert))
+        certificates.append(c)
+
+    public_keys = []
+    for key in pkeys:
+        k = dict(hashes={n: hashlib.new(n, key).hexdigest() for n in hashes})
+        if details:
+            k.update(_get_public_key_details(key))
+        public_keys.append(k)
+
+    return dict(
+        package=package,
+        is_signed_v1=a.is_signed_v1(),
+        is_signed_v2=a.is_signed_v2(),
+        is_signed_v3=a.is_signed_v3(),
+        certificates=certificates,
+        public_keys=public_keys,
+    )
+
+
+def _get_certificate_details(cert: bytes) -> dict:
+    from asn1crypto import x509
+
+    from androguard.util import get_certificate_name_string
+
+    x509_cert = x509.Certificate.load(cert)
+    validity = x509_cert['tbs_certificate']['validity']
+    return dict(
+        issuer=get_certificate_name_string(x509_cert.issuer, short=True),
+        subject=get_certificate_name_string(x509_cert.subject, short=True),
+        serial_number=hex(x509_cert.serial_number),
+        hash_algorithm=x509_cert.hash_algo,
+        signature_algorithm=x509_cert.signature_algo,
+        not_before=str(validity['not_before'].native),
+        not_after=str(validity['not_after'].native),
+    )
+
+
+def _get_public_key_details(key: bytes) -> dict:
+    from androguard.util import calculate_fingerprint, parse_public
+
+    parsed_key = parse_public(key)
+    try:
+        hash_algorithm = parsed_key.hash_algo
+    except ValueError:
+        # RSA pkey does not have a hash algorithm
+        hash_algorithm = None
+    return dict(
+        algorithm=parsed_key.algorithm,
+        bit_size=parsed_key.bit_size,
+        fingerprint=calculate_fingerprint(parsed_key).hex(),
+        hash_algorithm=hash_algorithm,
+    )
+
+
+def _get_max_rss() -> int:
+    """Return the peak resident set size of this process in MiB"""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # macOS reports bytes, Linux KiB
+        rss //= 1024
+    return rss // 1024
+
+
+def _batch_worker(
+    conn,
+    scan: Callable[[str], dict],
+    max_tasks: int,
+    max_memory: int,
+) -> None:
+    """
+    Main loop of a worker process of the [BatchScanner][androguard.batch.BatchScanner].
+
+    Receives filenames over `conn` and sends back a tuple of
+    `(status, result, retire)`.
+    If `retire` is set, the worker exits after sending the result.
+    """
+    nb_tasks = 0
+    while True:
+        try:
+            filename = conn.recv()
+        except EOFError:
+            break
+        if filename is None:
+            break
+
+        try:
+            status, result = "ok", scan(filename)
+        except Exception:
+            status, result = "error", traceback.format_exc()
+
+        nb_tasks += 1
+        retire = (max_tasks and nb_tasks >= max_tasks) or (
+            max_memory and _get_max_rss() >= max_memory
+        )
+        conn.send((status, result, bool(retire)))
+        if retire:
+            break
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, scan, max_tasks, max_memory) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_batch_worker,
+            args=(child_conn, scan, max_tasks, max_memory),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.filename = None
+        self.started = 0.0
+
+    def submit(self, filename: str) -> None:
+        self.filename = filename
+        self.started = time.monotonic()
+        self.conn.send(filename)
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self) -> None:
+        self.conn.close()
+        self.process.kill()
+        self.process.join()
+
+
+class BatchScanner:
+    """
+    Scan many APKs with a pool of worker processes.
+
+    Each worker analyzes one APK at a time. Workers are replaced by fresh
+    processes after `max_tasks` APKs or once their peak memory usage
+    exceeds `max_memory` MiB, which keeps the memory of long running scans
+    bounded. An APK which takes longer than `timeout` seconds is aborted by
+    killing its worker.
+
+    Results are yielded as soon as they are available, thus not
+    necessarily in the order of the input files.
+    Each result is a dictionary containing the `filename`, the `status`
+    (`ok`, `error` or `timeout`) and either the `result` of the scan
+    function or the `error`.
+    All failed results are additionally appended as JSON lines to
+    `failure_log`, if given.
+
+    Examples:
+
+        >>> from androguard.batch import BatchScanner, iter_apk_files
+        >>> scanner = BatchScanner(workers=4, timeout=600)
+        >>> for result in scanner.scan(iter_apk_files(["apks/"])):
+        >>>     print(result["filename"], result["status"])
+    """
+
+    def __init__(
+        self,
+        workers: Union[int, None] = None,
+        max_tasks: int = 100,
+        max_memory: Union[int, None] = None,
+        timeout: Union[float, None] = None,
+        failure_log: Union[str, None] = None,
+        scan: Callable[[str], dict] = scan_apk,
+    ) -> None:
+        """
+        :param workers: the number of worker processes (default: the number of CPUs)
+        :param max_tasks: the number of APKs a worker analyzes before it is replaced, 0 to never replace it (default: 100)
+        :param max_memory: the peak memory in MiB after which a worker is replaced (default: None, no limit)
+        :param timeout: the time in seconds after which the analysis of a single APK is aborted (default: None, no timeout)
+        :param failure_log: a filename to append failed results to (default: None)
+        :param scan: the function to run on each APK, has to return a JSON serializable object (default: [scan_apk][androguard.batch.scan_apk])
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_tasks = max_tasks
+        self.max_memory = max_memory
+        self.timeout = timeout
+        self.failure_log = failure_log
+        self._scan = scan
+
+        if max_memory and resource is None:
+            logger.warning(
+                "The memory ceiling is not supported on this platform"
+            )
+
+        # forked workers inherit the already imported modules
+        if "fork" in mp.get_all_start_methods():
+            self._ctx = mp.get_context("fork")
+        else:
+            self._ctx = mp.get_context()
+
+    def scan(self, filenames: Iterable[str]) -> Iterator[dict]:
+        """
+        Scan all files in `filenames`.
+
+        The filenames are only taken from `filenames` once a worker is
+        free, thus it can be a lazy iterator over a large corpus.
+
+        :param filenames: the filenames of the APKs to scan
+        :returns: an iterator of the results
+        """
+        pending = iter(filenames)
+        exhausted = False
+        idle = []
+        busy = {}
+
+        def new_worker() -> _Worker:
+            return _Worker(
+                self._ctx, self._scan, self.max_tasks, self.max_memory
+            )
+
+        try:
+            while not exhausted or busy:
+                while not exhausted and len(busy) < self.workers:
+                    filename = next(pending, None)
+                    if filename is None:
+                        exhausted = True
+                        break
+                    worker = idle.pop() if idle else new_worker()
+                    try:
+                        worker.submit(filename)
+                    except OSError:
+                        # the idle worker died in the meantime
+                        logger.debug(
+                            "Replacing dead worker {}".format(
+                                worker.process.pid
+                            )
+                        )
+                        worker.kill()
+                        worker = new_worker()
+                        worker.submit(filename)
+                    busy[worker.conn] = worker
+
+                if not busy:
+                    break
+
+                for conn in wait(list(busy), self._get_wait_timeout(busy)):
+                    worker = busy.pop(conn)
+                    try:
+                        status, result, retire = conn.recv()
+                    except (EOFError, OSError):
+                        worker.kill()
+                        yield self._finish(
+                            worker.filename,
+                            "error",
+                            "Worker died with exit code {}".format(
+                                worker.process.exitcode
+                            ),
+                        )
+                        continue
+
+                    yield self._finish(worker.filename, status, result)
+                    if retire:
+                        logger.debug(
+                            "Replacing worker {}".format(worker.process.pid)
+                        )
+                        worker.stop()
+                    else:
+                        idle.append(worker)
+
+                if self.timeout is not None:
+                    now = time.monotonic()
+                    for conn, worker in list(busy.items()):
+                        if now - worker.started >= self.timeout:
+                            del busy[conn]
+                            worker.kill()
+                            yield self._finish(
+                                worker.filename,
+                                "timeout",
+                                "Analysis took longer than {}s".format(
+                                    self.timeout
+                                ),
+                            )
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy.values():
+                worker.kill()
+
+    def _get_wait_timeout(
+        self, busy: dict[object, _Worker]
+    ) -> Union[float, None]:
+        if self.timeout is None:
+            return None
+        now = time.monotonic()
+        return max(
+            0,
+            min(w.started + self.timeout - now for w in busy.values()),
+        )
+
+    def _finish(self, filename: str, status: str, result: object) -> dict:
+        if status == "ok":
+            return dict(filename=filename, status=status, result=result)
+
+        logger.error("Failed to scan {}: {}".format(filename, status))
+        failure = dict(filename=filename, status=status, error=result)
+        if self.failure_log:
+            with open(self.failure_log, "a") as fp:
+                fp.write(json.dumps(failure) + "\n")
+        return failure
+
+
+def write_json_lines(results: Iterable[dict], output: TextIO) -> int:
+    """
+    Write each result as a single line of JSON to `output`.
+
+    :param results: an iterable of JSON serializable objects
+    :param output: the file object to write to
+    :returns: the number of written lines
+    """
+    nb = 0
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        nb += 1
+    return nb
@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 
 """Androguard is a full Python tool to reverse Android Applications."""
-import json
 import sys
 
 import click
@@ -10,11 +9,14 @@ import networkx as nx
 from loguru import logger
 
 from androguard.session import Session
+import androguard.core.api_specific_resources
 import androguard.core.apk
 from androguard import util
 from androguard.cli.main import (
     androarsc_main,
+    androapkid_main,
     androaxml_main,
+    androbatch_main,
     androdis_main,
     androdump_main,
     androlyze_main,
@@ -335,7 +337,14 @@ def arsc(
     '-d',
     help='Use a different decompiler (default: DAD)',
 )
-def decompile(input_, file_, output, format_, jar, limit, decompiler):
+@click.option(
+    '--jobs',
+    type=int,
+    default=0,
+    help='Number of worker processes to decompile the classes with, '
+    'only supported by DAD (default: 0, no workers)',
+)
+def decompile(input_, file_, output, format_, jar, limit, decompiler, jobs):
     """
     Decompile an APK and create Control Flow Graphs.
 
@@ -365,7 +374,9 @@ def decompile(input_, file_, output, format_, jar, limit, decompiler):
     s = session.Session()
     with open(fname, "rb") as fd:
         s.add(fname, fd.read())
-    export_apps_to_format(fname, s, output, limit, jar, decompiler, format_)
+    export_apps_to_format(
+        fname, s, output, limit, jar, decompiler, format_, jobs
+    )
 
 
 @entry_point.command()
@@ -395,35 +406,136 @@ def decompile(input_, file_, output, format_, jar, limit, decompiler):
     help='Additionally of printing the fingerprints, show more '
     'certificate information',
 )
+@click.option(
+    '--jobs',
+    '-j',
+    type=int,
+    default=1,
+    show_default=True,
+    help='Number of worker processes, 0 for the number of CPUs',
+)
+@click.option(
+    '--json',
+    'json_lines',
+    is_flag=True,
+    default=False,
+    help='Print one JSON line per APK',
+)
 @click.argument(
     'apk',
     nargs=-1,
     type=click.Path(exists=True, dir_okay=False, file_okay=True),
 )
-def sign(hash_, print_all_hashes, show, apk):
-    """Return the fingerprint(s) of all certificates inside an APK."""
-    androsign_main(apk, hash_, print_all_hashes, show)
+def sign(hash_, print_all_hashes, show, jobs, json_lines, apk):
+    """Return the fingerprint(s) of all certificates inside an APK.
+
+    Only the signatures are parsed, not the manifest and the resources.
+    With several jobs, the APKs are printed in the order they are
+    finished.
+
+    Example:
+
+        >>> androguard sign -j 8 --json --hash sha256 apks/*.apk
+    """
+    androsign_main(
+        apk, hash_, print_all_hashes, show, jobs or None, json_lines
+    )
 
 
 @entry_point.command()
+@click.option(
+    '--jobs',
+    '-j',
+    type=int,
+    default=1,
+    show_default=True,
+    help='Number of worker processes, 0 for the number of CPUs',
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    default=False,
+    help='Print one JSON line per APK as soon as it is read',
+)
 @click.argument(
     'apks',
     nargs=-1,
-    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    type=click.Path(exists=True, file_okay=True, dir_okay=True),
 )
-def apkid(apks: list[str]):
+def apkid(jobs, stream, apks: list[str]):
     """Prints the packageName/versionCode/versionName per APK as JSON.
-    
-    :param apks: list of apk filepaths
-    """
-    from androguard.core.apk import get_apkid
 
+    Directories are searched recursively for APKs. With --stream, the
+    APKs are printed in the order they are finished.
+
+    Example:
+
+        >>> androguard apkid -j 8 --stream apks/ > apkid.jsonl
+    """
     logger.debug("APKID")
 
-    results = dict()
-    for apk in apks:
-        results[apk] = get_apkid(apk)
-    print(json.dumps(results, indent=2))
+    androapkid_main(apks, jobs or None, stream)
+
+
+@entry_point.command()
+@click.argument(
+    'paths',
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=True),
+)
+@click.option(
+    '--output',
+    '-o',
+    help='filename to write the JSON lines to, default stdout',
+)
+@click.option(
+    '--jobs',
+    '-j',
+    type=int,
+    default=None,
+    help='Number of worker processes (default: number of CPUs)',
+)
+@click.option(
+    '--max-tasks',
+    type=int,
+    default=100,
+    show_default=True,
+    help='Replace a worker after it analyzed this many APKs, 0 to disable',
+)
+@click.option(
+    '--max-memory',
+    type=int,
+    default=None,
+    help='Replace a worker once its peak memory exceeds this many MiB',
+)
+@click.option(
+    '--timeout',
+    '-t',
+    type=float,
+    default=None,
+    help='Abort the analysis of a single APK after this many seconds',
+)
+@click.option(
+    '--failure-log',
+    type=click.Path(dir_okay=False),
+    help='Append failed and timed out APKs as JSON lines to this file',
+)
+def batch(paths, output, jobs, max_tasks, max_memory, timeout, failure_log):
+    """
+    Analyze many APKs in parallel and print one JSON line per APK.
+
+    Directories are searched recursively for APKs. Each line contains the
+    manifest summary, the permissions and the permission protected API
+    usage of the APK, or the error if the analysis failed.
+
+    Example:
+
+        >>> androguard batch -j 8 -t 600 --failure-log failed.jsonl apks/
+    """
+    androbatch_main(
+        paths, output, jobs, max_tasks, max_memory, timeout, failure_log
+    )
 
 
 @entry_point.command()
@@ -447,6 +559,17 @@ def analyze(session: str, apk: str):
     androlyze_main(session, apk)
 
 
+@entry_point.command(name='compile-resources')
+def compile_resources():
+    """
+    Compile the permission resources of androguard to load them faster.
+
+    Run it again after upgrading androguard, outdated files are ignored.
+    """
+    for filename in androguard.core.api_specific_resources.compile_resources():
+        print(filename)
+
+
 @entry_point.command()
 @click.option(
     "-o",
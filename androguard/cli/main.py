@@ -1,4 +1,5 @@
 # core modules
+import json
 import os
 import re
 import shutil
@@ -20,7 +21,7 @@ from androguard.core.axml import ARSCParser, AXMLPrinter
 from androguard.core.dex import get_bytecodes_method
 from androguard.session import Session
 from androguard.ui import DynamicUI
-from androguard.util import calculate_fingerprint, parse_public, readFile
+from androguard.util import readFile
 
 
 def androaxml_main(
@@ -115,12 +116,21 @@ def export_apps_to_format(
     jar: bool = False,
     decompiler_type: Union[str, None] = None,
     form: Union[str, None] = None,
+    jobs: int = 0,
 ) -> None:
 
     from androguard.core.bytecode import method2dot, method2format
     from androguard.decompiler import decompiler
+    from androguard.decompiler.decompile import decompile_classes
     from androguard.misc import clean_file_name
 
+    if jobs > 1 and decompiler_type:
+        logger.warning(
+            "Parallel decompilation is only supported for DAD, "
+            "using a single process"
+        )
+        jobs = 0
+
     print("Dump information {} in {}".format(filename, output))
 
     if not os.path.exists(output):
@@ -149,7 +159,7 @@ def export_apps_to_format(
     if methods_filter:
         methods_filter_expr = re.compile(methods_filter)
 
-    dump_classes = []
+    dump_classes = set()
     for _, vm, vmx in s.get_objects_dex():
         print("Decompilation ...", end=' ')
         sys.stdout.flush()
@@ -203,6 +213,7 @@ def export_apps_to_format(
             shutil.move(filenamejar, os.path.join(output, "classes.jar"))
             print("End")
 
+        methods = []
         for method in vm.get_encoded_methods():
             if methods_filter_expr:
                 msig = "{}{}{}".format(
@@ -212,7 +223,32 @@ def export_apps_to_format(
                 )
                 if not methods_filter_expr.search(msig):
                     continue
+            methods.append(method)
+
+        if jobs > 1:
+            # Decompile all classes first, each Java file is written
+            # as soon as the class is decompiled
+            class_names = [
+                class_name
+                for class_name in dict.fromkeys(
+                    str(method.get_class_name()) for method in methods
+                )
+                if class_name not in dump_classes
+            ]
+
+            for class_name, source in decompile_classes(
+                vmx, class_names, jobs
+            ):
+                print("Dump source codes {} ...".format(class_name))
+                filename_class = os.path.join(
+                    output, valid_class_name(class_name)
+                )
+                create_directory(os.path.dirname(filename_class))
+                with open(filename_class + ".java", "w") as fd:
+                    fd.write(source)
+                dump_classes.add(class_name)
 
+        for method in methods:
             # Current Folder to write to
             filename_class = valid_class_name(str(method.get_class_name()))
             filename_class = os.path.join(output, filename_class)
@@ -250,7 +286,7 @@ def export_apps_to_format(
                 )
                 with open(current_filename_class, "w") as fd:
                     fd.write(current_class.get_source())
-                dump_classes.append(method.get_class_name())
+                dump_classes.add(str(method.get_class_name()))
 
             # Write SMALI like code
             print("bytecodes ...", end=' ')
@@ -373,25 +409,39 @@ def androlyze_main(session: Session, filename: str) -> None:
 
 
 def androsign_main(
-    args_apk: list[str], args_hash: str, args_all: bool, show: bool
+    args_apk: list[str],
+    args_hash: str,
+    args_all: bool,
+    show: bool,
+    jobs: Union[int, None] = 1,
+    json_lines: bool = False,
 ) -> None:
-    import binascii
-    import hashlib
-    import traceback
+    """
+    Print the fingerprints of the certificates of all APKs in `args_apk`.
+
+    The APKs are read by `jobs` worker processes, see
+    [scan_signatures][androguard.batch.scan_signatures]. With several
+    workers, the APKs are printed in the order they are finished.
+
+    :param args_apk: the filenames of the APKs
+    :param args_hash: the name of the hash function for the fingerprints
+    :param args_all: print the fingerprints of all hash functions
+    :param show: additionally print more information of the certificates
+    :param jobs: the number of worker processes, None for the number of CPUs (default: 1)
+    :param json_lines: print one JSON line per APK instead of text
+    """
+    import functools
 
-    from asn1crypto import keys, x509
     from colorama import Fore, Style
 
-    from androguard.core.apk import APK
-    from androguard.util import get_certificate_name_string
+    from androguard.batch import (
+        BatchScanner,
+        scan_signatures,
+        write_json_lines,
+    )
 
     # Keep the list of hash functions in sync with cli/entry_points.py:sign
-    hashfunctions = dict(
-        md5=hashlib.md5,
-        sha1=hashlib.sha1,
-        sha256=hashlib.sha256,
-        sha512=hashlib.sha512,
-    )
+    hashfunctions = ["md5", "sha1", "sha256", "sha512"]
 
     if args_hash.lower() not in hashfunctions:
         print(
@@ -399,112 +449,170 @@ def androsign_main(
             file=sys.stderr,
         )
         print(
-            "Use one of {}".format(", ".join(hashfunctions.keys())),
+            "Use one of {}".format(", ".join(hashfunctions)),
             file=sys.stderr,
         )
         sys.exit(1)
 
-    for path in args_apk:
-        try:
-            a = APK(path)
+    scanner = BatchScanner(
+        workers=jobs,
+        scan=functools.partial(
+            scan_signatures,
+            hashes=hashfunctions if args_all else [args_hash.lower()],
+            details=show,
+        ),
+    )
+    results = scanner.scan(args_apk)
+
+    if json_lines:
+        write_json_lines(results, sys.stdout)
+        return
 
+    for result in results:
+        path = result["filename"]
+        if result["status"] != "ok":
             print(
-                "{}, package: '{}'".format(
-                    os.path.basename(path), a.get_package()
-                )
-            )
-            print("Is signed v1: {}".format(a.is_signed_v1()))
-            print("Is signed v2: {}".format(a.is_signed_v2()))
-            print("Is signed v3: {}".format(a.is_signed_v3()))
-
-            certs = set(
-                a.get_certificates_der_v3()
-                + a.get_certificates_der_v2()
-                + [a.get_certificate_der(x) for x in a.get_signature_names()]
+                Fore.RED
+                + "Error in {}".format(os.path.basename(path))
+                + Style.RESET_ALL,
+                file=sys.stderr,
             )
-            pkeys = set(
-                a.get_public_keys_der_v3() + a.get_public_keys_der_v2()
+            print(result["error"], file=sys.stderr)
+        else:
+            _print_signatures(path, result["result"], show)
+
+        if len(args_apk) > 1:
+            print()
+
+
+def _print_signatures(path: str, signatures: dict, show: bool) -> None:
+    print(
+        "{}, package: '{}'".format(
+            os.path.basename(path), signatures["package"]
+        )
+    )
+    print("Is signed v1: {}".format(signatures["is_signed_v1"]))
+    print("Is signed v2: {}".format(signatures["is_signed_v2"]))
+    print("Is signed v3: {}".format(signatures["is_signed_v3"]))
+
+    certs = signatures["certificates"]
+    if len(certs) > 0:
+        print("Found {} unique certificates".format(len(certs)))
+
+    for cert in certs:
+        if show:
+            print("Issuer:", cert["issuer"])
+            print("Subject:", cert["subject"])
+            print("Serial Number:", cert["serial_number"])
+            print("Hash Algorithm:", cert["hash_algorithm"])
+            print("Signature Algorithm:", cert["signature_algorithm"])
+            print("Valid not before:", cert["not_before"])
+            print("Valid not after:", cert["not_after"])
+
+        for name, value in cert["hashes"].items():
+            print("{} {}".format(name, value))
+        print()
+
+    pkeys = signatures["public_keys"]
+    if len(certs) > 0:
+        print(
+            "Found {} unique public keys associated with the certs".format(
+                len(pkeys)
             )
+        )
 
-            if len(certs) > 0:
-                print("Found {} unique certificates".format(len(certs)))
-
-            for cert in certs:
-                if show:
-                    x509_cert = x509.Certificate.load(cert)
-                    print(
-                        "Issuer:",
-                        get_certificate_name_string(
-                            x509_cert.issuer, short=True
-                        ),
-                    )
-                    print(
-                        "Subject:",
-                        get_certificate_name_string(
-                            x509_cert.subject, short=True
-                        ),
-                    )
-                    print("Serial Number:", hex(x509_cert.serial_number))
-                    print("Hash Algorithm:", x509_cert.hash_algo)
-                    print("Signature Algorithm:", x509_cert.signature_algo)
-                    print(
-                        "Valid not before:",
-                        x509_cert['tbs_certificate']['validity'][
-                            'not_before'
-                        ].native,
-                    )
-                    print(
-                        "Valid not after:",
-                        x509_cert['tbs_certificate']['validity'][
-                            'not_after'
-                        ].native,
-                    )
+    for public_key in pkeys:
+        if show:
+            print(f"Algorithm: {public_key['algorithm']}")
+            print(f"Bit size: {public_key['bit_size']}")
+            print(f"Fingerprint: {public_key['fingerprint']}")
+            if public_key["hash_algorithm"] is not None:
+                print(f"Hash Algorithm: {public_key['hash_algorithm']}")
+        print()
+
+
+def androbatch_main(
+    paths: list[str],
+    output: Union[str, None] = None,
+    jobs: Union[int, None] = None,
+    max_tasks: int = 100,
+    max_memory: Union[int, None] = None,
+    timeout: Union[float, None] = None,
+    failure_log: Union[str, None] = None,
+) -> None:
+    """
+    Analyze all APKs given by `paths` in parallel and write one JSON
+    line per APK to `output`.
 
-                if not args_all:
-                    print(
-                        "{} {}".format(
-                            args_hash.lower(),
-                            hashfunctions[args_hash.lower()](cert).hexdigest(),
-                        )
-                    )
-                else:
-                    for k, v in hashfunctions.items():
-                        print("{} {}".format(k, v(cert).hexdigest()))
-                print()
+    See [BatchScanner][androguard.batch.BatchScanner] for the parameters.
+    """
+    from androguard.batch import (
+        BatchScanner,
+        iter_apk_files,
+        write_json_lines,
+    )
 
-            if len(certs) > 0:
-                print(
-                    "Found {} unique public keys associated with the certs".format(
-                        len(pkeys)
-                    )
-                )
+    scanner = BatchScanner(
+        workers=jobs,
+        max_tasks=max_tasks,
+        max_memory=max_memory,
+        timeout=timeout,
+        failure_log=failure_log,
+    )
+    results = scanner.scan(iter_apk_files(paths))
 
-            for public_key in pkeys:
-                if show:
-                    parsed_key = parse_public(public_key)
-                    print(f"Algorithm: {parsed_key.algorithm}")
-                    print(f"Bit size: {parsed_key.bit_size}")
-                    print(
-                        f"Fingerprint: {calculate_fingerprint(parsed_key).hex()}"
-                    )
-                    try:
-                        print(f"Hash Algorithm: {parsed_key.hash_algo}")
-                    except ValueError as ve:
-                        # RSA pkey does not have a hash algorithm
-                        pass
-                print()
+    if output:
+        with open(output, "w") as fp:
+            nb = write_json_lines(results, fp)
+    else:
+        nb = write_json_lines(results, sys.stdout)
+    logger.info("Scanned {} APKs".format(nb))
+
+
+def androapkid_main(
+    paths: list[str],
+    jobs: Union[int, None] = 1,
+    stream: bool = False,
+) -> None:
+    """
+    Print the packageName/versionCode/versionName of all APKs given by
+    `paths` as JSON.
+
+    The APKs are read by `jobs` worker processes, see
+    [get_apkid][androguard.core.apk.get_apkid]. Directories are searched
+    recursively for APKs.
+    By default, a single JSON object is printed at the end, which maps the
+    filenames in their input order to the results, or None if the APK
+    could not be read. The errors are printed to stderr. With `stream`,
+    one JSON line per APK is printed as soon as it is finished.
+
+    :param paths: the filenames of the APKs or directories
+    :param jobs: the number of worker processes, None for the number of CPUs (default: 1)
+    :param stream: print one JSON line per APK in the order they are finished
+    """
+    from androguard.batch import (
+        BatchScanner,
+        iter_apk_files,
+        write_json_lines,
+    )
+    from androguard.core.apk import get_apkid
+
+    scanner = BatchScanner(workers=jobs, scan=get_apkid)
 
-        except:
+    if stream:
+        nb = write_json_lines(scanner.scan(iter_apk_files(paths)), sys.stdout)
+        logger.info("Read {} APKs".format(nb))
+        return
+
+    results = dict.fromkeys(iter_apk_files(paths))
+    for r in scanner.scan(list(results)):
+        if r["status"] != "ok":
             print(
-                Fore.RED
-                + "Error in {}".format(os.path.basename(path))
-                + Style.RESET_ALL,
+                "Error in {}: {}".format(r["filename"], r["error"]),
                 file=sys.stderr,
             )
-            traceback.print_exc(file=sys.stderr)
-
-        if len(args_apk) > 1:
-            print()
+        results[r["filename"]] = r.get("result")
+    print(json.dumps(results, indent=2))
 
 
 def androdis_main(offset: int, size: int, dex_file: str) -> None:
@@ -556,48 +664,55 @@ def androtrace_main(
     from androguard.session import Session
 
     s = Session()
+    # the traced calls are written in batches in the background, so the
+    # message handler keeps up with many events
+    s.start_event_writer()
 
-    if not live:
-        with open(apk_file, "rb") as fp:
-            raw = fp.read()
+    try:
+        if not live:
+            with open(apk_file, "rb") as fp:
+                raw = fp.read()
 
-        h = s.add(apk_file, raw)
-        logger.info("Added file to session: SHA256::{}".format(h))
+            h = s.add(apk_file, raw)
+            logger.info("Added file to session: SHA256::{}".format(h))
 
-    p = Pentest()
-    p.print_devices()
-    p.connect_default_usb()
-    p.start_trace(apk_file, s, list_modules, live=live)
+        p = Pentest()
+        p.print_devices()
+        p.connect_default_usb()
+        p.start_trace(apk_file, s, list_modules, live=live)
 
-    if enable_ui:
-        logger.remove(1)
-        import time
+        if enable_ui:
+            logger.remove(1)
+            import time
 
-        from prompt_toolkit.application import get_app
-        from prompt_toolkit.eventloop.inputhook import (
-            InputHookContext,
-            set_eventloop_with_inputhook,
-        )
+            from prompt_toolkit.application import get_app
+            from prompt_toolkit.eventloop.inputhook import (
+                InputHookContext,
+                set_eventloop_with_inputhook,
+            )
 
-        time.sleep(1)
+            time.sleep(1)
 
-        ui = DynamicUI(p.message_queue)
+            ui = DynamicUI(p.message_queue)
 
-        def inputhook(inputhook_context: InputHookContext):
-            while not inputhook_context.input_is_ready():
-                if ui.process_data():
-                    get_app().invalidate()
-                else:
-                    time.sleep(0.1)
+            def inputhook(inputhook_context: InputHookContext):
+                while not inputhook_context.input_is_ready():
+                    if ui.process_data():
+                        get_app().invalidate()
+                    else:
+                        time.sleep(0.1)
 
-        set_eventloop_with_inputhook(inputhook=inputhook)
+            set_eventloop_with_inputhook(inputhook=inputhook)
 
-        ui.run()
-    else:
-        logger.warning("Type 'e' to exit the strace ")
-        s = ""
-        while (s != 'e') and (not p.is_detached()):
-            s = input("Type 'e' to exit:")
+            ui.run()
+        else:
+            logger.warning("Type 'e' to exit the strace ")
+            c = ""
+            while (c != 'e') and (not p.is_detached()):
+                c = input("Type 'e' to exit:")
+    finally:
+        # also flush the events traced so far on an error or Ctrl-C
+        s.stop_event_writer()
 
 
 def androdump_main(package_name: str, list_modules: list[str]) -> None:
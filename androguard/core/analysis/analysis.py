@@ -3,9 +3,13 @@
 # see https://peps.python.org/pep-0563/
 from __future__ import annotations
 
+import bisect
 import collections
+import functools
+import multiprocessing as mp
 import re
 import time
+from array import array
 from enum import IntEnum
 from operator import itemgetter
 from typing import Iterator, Union
@@ -14,6 +18,7 @@ import networkx as nx
 from loguru import logger
 
 from androguard.core import bytecode, dex
+from androguard.core.analysis.cache import AnalysisCache
 from androguard.core.androconf import (
     is_ascii_problem,
     load_api_specific_resource_module,
@@ -26,6 +31,9 @@ for i in dex.BRANCH_DEX_OPCODES:
         if p.match(items[1][0]):
             BasicOPCODES.add(op)
 
+# Number of classes scanned per task in the parallel XREF creation
+XREF_SHARD_SIZE = 256
+
 
 class REF_TYPE(IntEnum):
     """
@@ -48,6 +56,461 @@ class REF_TYPE(IntEnum):
     INVOKE_INTERFACE_RANGE = 0x78
 
 
+class XrefTable:
+    """
+    A table of XREF edges, stored column wise in typed integer arrays.
+
+    Rows are only appended. To look up all rows for a given value of a
+    column, an index in compressed sparse row (CSR) layout is built on first
+    use.
+    Rows appended after the index was built are added to a small overflow
+    of the index on the next lookup. The index is only rebuilt, in
+    O(number of rows), once the overflow holds as many rows as the index,
+    hence interleaving appends and lookups costs O(1) amortized per row.
+    """
+
+    def __init__(self, **columns: str) -> None:
+        """
+        :param columns: the names of the columns and their `array` typecode
+        """
+        self.columns = {
+            name: array(typecode) for name, typecode in columns.items()
+        }
+        # column -> [order, offsets, overflow, rows in the CSR, rows covered]
+        self._indexes = {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def append(self, **values: int) -> None:
+        """
+        Add a new row, a value must be given for each column
+
+        :param values: the value of each column
+        """
+        for name, value in values.items():
+            self.columns[name].append(value)
+
+    def _build_index(self, column: str) -> tuple[array, array]:
+        """
+        Build the CSR index of `column`: a permutation of the row numbers
+        sorted by the column value, and for each value the offset of its
+        first row in the permutation.
+        Rows with the same value keep their insertion order.
+
+        :param column: name of the column
+        :returns: tuple of the row permutation and the offsets
+        """
+        values = self.columns[column]
+        nb_keys = max(values) + 1 if values else 0
+
+        offsets = array('I', bytes(array('I').itemsize * (nb_keys + 1)))
+        for key in values:
+            offsets[key + 1] += 1
+        for key in range(nb_keys):
+            offsets[key + 1] += offsets[key]
+
+        order = array('I', bytes(array('I').itemsize * len(values)))
+        position = array('I', offsets)
+        for row, key in enumerate(values):
+            order[position[key]] = row
+            position[key] += 1
+
+        return order, offsets
+
+    def _get_index(self, column: str) -> tuple[array, array, dict]:
+        """
+        Return the index of `column`, with all rows appended since the
+        last lookup added to its overflow
+
+        :param column: name of the column
+        :returns: tuple of the row permutation, the offsets and the overflow
+        """
+        nb_rows = len(self)
+        index = self._indexes.get(column)
+        if index is None or 2 * index[3] < nb_rows:
+            order, offsets = self._build_index(column)
+            index = [order, offsets, {}, nb_rows, nb_rows]
+            self._indexes[column] = index
+
+        order, offsets, overflow, _, nb_covered = index
+        values = self.columns[column]
+        for row in range(nb_covered, nb_rows):
+            overflow.setdefault(values[row], array('I')).append(row)
+        index[4] = nb_rows
+        return order, offsets, overflow
+
+    def rows(self, column: str, key: int) -> array:
+        """
+        Return the row numbers where `column` has the value `key`
+
+        :param column: name of the column
+        :param key: the value to look up
+        :returns: the row numbers
+        """
+        order, offsets, overflow = self._get_index(column)
+        if key + 1 >= len(offsets):
+            rows = array('I')
+        else:
+            rows = order[offsets[key] : offsets[key + 1]]
+        if key in overflow:
+            rows.extend(overflow[key])
+        return rows
+
+
+class XrefStore:
+    """
+    Compact storage for all XREFs of an [Analysis][androguard.core.analysis.analysis.Analysis].
+
+    Instead of keeping sets of tuples in every `*Analysis` object, each object gets
+    an integer id and all edges are stored in a few [XrefTable][androguard.core.analysis.analysis.XrefTable].
+    The `get_xref_*` methods of the objects materialize the usual tuples on request.
+
+    All edges originate from a method (and its class) and have an offset in the bytecode:
+
+    * `class_refs`: const-class and new-instance of a class
+    * `calls`: invoke-* of a method
+    * `strings`: const-string of a string
+    * `fields`: i*op and s*op of a field
+
+    Enable it with `Analysis(compact_xrefs=True)`.
+
+    The `add_xref_*` methods of the objects only know one end of an edge,
+    hence the XREFs added through them are kept per object in `extra`, just
+    like without the `XrefStore`, and merged into the results of the queries.
+    """
+
+    READ_FIELD = 0
+    WRITE_FIELD = 1
+
+    # name of the xref attribute of the class references
+    _class_ref_names = {
+        REF_TYPE.REF_NEW_INSTANCE: 'xrefnewinstance',
+        REF_TYPE.REF_CLASS_USAGE: 'xrefconstclass',
+    }
+
+    def __init__(self) -> None:
+        # id -> ClassAnalysis, MethodAnalysis, StringAnalysis or FieldAnalysis
+        self.objects = []
+
+        # id -> name of the xref attribute -> set or defaultdict(set)
+        self.extra = {}
+
+        self.class_refs = XrefTable(
+            src_cls='I', src_meth='I', dst_cls='I', offset='I', kind='B'
+        )
+        self.calls = XrefTable(
+            src_cls='I',
+            src_meth='I',
+            dst_cls='I',
+            dst_meth='I',
+            offset='I',
+            kind='B',
+        )
+        self.strings = XrefTable(
+            src_cls='I', src_meth='I', dst_str='I', offset='I'
+        )
+        self.fields = XrefTable(
+            src_cls='I', src_meth='I', dst_field='I', offset='I', kind='B'
+        )
+
+    def register(self, obj: object) -> int:
+        """
+        Assign a new id to an analysis object
+
+        :param obj: the object to register
+        :returns: the id of the object
+        """
+        self.objects.append(obj)
+        return len(self.objects) - 1
+
+    def replace(self, old: object, new: object) -> None:
+        """
+        Let all xrefs of the registered object `old` point to `new`
+
+        `new` takes over the id of `old`, its own id is left unused.
+
+        :param old: the registered object to replace
+        :param new: the object to replace it with
+        """
+        new._xref_id = old._xref_id
+        self.objects[old._xref_id] = new
+
+    def add_extra(
+        self, obj: object, name: str, xref: tuple, key: object = None
+    ) -> None:
+        """
+        Add an XREF of a single object, see the `add_xref_*` methods
+
+        :param obj: the registered object the XREF belongs to
+        :param name: the name of the xref attribute, e.g. `xrefto`
+        :param xref: the XREF tuple
+        :param key: for the class XREFs, the `ClassAnalysis` the tuple is stored for
+        """
+        extra = self.extra.setdefault(obj._xref_id, {})
+        if key is None:
+            extra.setdefault(name, set()).add(xref)
+        else:
+            extra.setdefault(name, collections.defaultdict(set))[key].add(xref)
+
+    def _merge_extra(
+        self, obj: object, name: str, xrefs: Union[set, dict]
+    ) -> Union[set, dict]:
+        extra = self.extra.get(obj._xref_id, {}).get(name)
+        if extra:
+            if isinstance(xrefs, dict):
+                for key, value in extra.items():
+                    xrefs[key] |= value
+            else:
+                xrefs |= extra
+        return xrefs
+
+    def add_class_ref(
+        self,
+        ref_kind: REF_TYPE,
+        src_cls: ClassAnalysis,
+        src_meth: MethodAnalysis,
+        dst_cls: ClassAnalysis,
+        offset: int,
+    ) -> None:
+        self.class_refs.append(
+            src_cls=src_cls._xref_id,
+            src_meth=src_meth._xref_id,
+            dst_cls=dst_cls._xref_id,
+            offset=offset,
+            kind=ref_kind,
+        )
+
+    def add_call(
+        self,
+        ref_kind: REF_TYPE,
+        src_cls: ClassAnalysis,
+        src_meth: MethodAnalysis,
+        dst_cls: ClassAnalysis,
+        dst_meth: MethodAnalysis,
+        offset: int,
+    ) -> None:
+        self.calls.append(
+            src_cls=src_cls._xref_id,
+            src_meth=src_meth._xref_id,
+            dst_cls=dst_cls._xref_id,
+            dst_meth=dst_meth._xref_id,
+            offset=offset,
+            kind=ref_kind,
+        )
+
+    def add_string(
+        self,
+        src_cls: ClassAnalysis,
+        src_meth: MethodAnalysis,
+        dst_str: StringAnalysis,
+        offset: int,
+    ) -> None:
+        self.strings.append(
+            src_cls=src_cls._xref_id,
+            src_meth=src_meth._xref_id,
+            dst_str=dst_str._xref_id,
+            offset=offset,
+        )
+
+    def add_field(
+        self,
+        write: bool,
+        src_cls: ClassAnalysis,
+        src_meth: MethodAnalysis,
+        dst_field: FieldAnalysis,
+        offset: int,
+    ) -> None:
+        self.fields.append(
+            src_cls=src_cls._xref_id,
+            src_meth=src_meth._xref_id,
+            dst_field=dst_field._xref_id,
+            offset=offset,
+            kind=self.WRITE_FIELD if write else self.READ_FIELD,
+        )
+
+    def _select(
+        self,
+        table: XrefTable,
+        column: str,
+        obj: object,
+        *columns: str,
+        kind: Union[int, None] = None,
+    ) -> Iterator[tuple]:
+        """
+        Yield the values of `columns` for all rows of `table`
+        where `column` references `obj`.
+        Object ids are resolved, except for the `offset` and `kind` columns.
+        """
+        if kind is not None:
+            kinds = table.columns['kind']
+        values = [table.columns[c] for c in columns]
+        resolve = [c not in ('offset', 'kind') for c in columns]
+        for row in table.rows(column, obj._xref_id):
+            if kind is not None and kinds[row] != kind:
+                continue
+            yield tuple(
+                self.objects[v[row]] if r else v[row]
+                for v, r in zip(values, resolve)
+            )
+
+    def method_xref_to(
+        self, method: MethodAnalysis
+    ) -> set[tuple[ClassAnalysis, MethodAnalysis, int]]:
+        xrefs = set(
+            self._select(
+                self.calls, 'src_meth', method, 'dst_cls', 'dst_meth', 'offset'
+            )
+        )
+        return self._merge_extra(method, 'xrefto', xrefs)
+
+    def method_xref_from(
+        self, method: MethodAnalysis
+    ) -> set[tuple[ClassAnalysis, MethodAnalysis, int]]:
+        xrefs = set(
+            self._select(
+                self.calls, 'dst_meth', method, 'src_cls', 'src_meth', 'offset'
+            )
+        )
+        return self._merge_extra(method, 'xreffrom', xrefs)
+
+    def method_xref_fields(
+        self, method: MethodAnalysis, write: bool
+    ) -> set[tuple[ClassAnalysis, dex.EncodedField, int]]:
+        xrefs = {
+            (cls, field.get_field(), offset)
+            for cls, field, offset in self._select(
+                self.fields,
+                'src_meth',
+                method,
+                'src_cls',
+                'dst_field',
+                'offset',
+                kind=self.WRITE_FIELD if write else self.READ_FIELD,
+            )
+        }
+        return self._merge_extra(
+            method, 'xrefwrite' if write else 'xrefread', xrefs
+        )
+
+    def method_xref_classes(
+        self, method: MethodAnalysis, ref_kind: REF_TYPE
+    ) -> set[tuple[ClassAnalysis, int]]:
+        xrefs = set(
+            self._select(
+                self.class_refs,
+                'src_meth',
+                method,
+                'dst_cls',
+                'offset',
+                kind=ref_kind,
+            )
+        )
+        return self._merge_extra(
+            method, self._class_ref_names[ref_kind], xrefs
+        )
+
+    def class_xref_to(
+        self, cls: ClassAnalysis
+    ) -> dict[ClassAnalysis, set[tuple[REF_TYPE, MethodAnalysis, int]]]:
+        xrefs = collections.defaultdict(set)
+        # NOTE: for class references the calling method is stored,
+        # see ClassAnalysis.add_xref_to
+        for ref_kind, dst_cls, meth, offset in self._select(
+            self.class_refs,
+            'src_cls',
+            cls,
+            'kind',
+            'dst_cls',
+            'src_meth',
+            'offset',
+        ):
+            xrefs[dst_cls].add((REF_TYPE(ref_kind), meth, offset))
+        for ref_kind, dst_cls, meth, offset in self._select(
+            self.calls, 'src_cls', cls, 'kind', 'dst_cls', 'dst_meth', 'offset'
+        ):
+            xrefs[dst_cls].add((REF_TYPE(ref_kind), meth, offset))
+        return self._merge_extra(cls, 'xrefto', xrefs)
+
+    def class_xref_from(
+        self, cls: ClassAnalysis
+    ) -> dict[ClassAnalysis, set[tuple[REF_TYPE, MethodAnalysis, int]]]:
+        xrefs = collections.defaultdict(set)
+        for table in (self.class_refs, self.calls):
+            for ref_kind, src_cls, meth, offset in self._select(
+                table, 'dst_cls', cls, 'kind', 'src_cls', 'src_meth', 'offset'
+            ):
+                xrefs[src_cls].add((REF_TYPE(ref_kind), meth, offset))
+        return self._merge_extra(cls, 'xreffrom', xrefs)
+
+    def class_xref_methods(
+        self, cls: ClassAnalysis, ref_kind: REF_TYPE
+    ) -> set[tuple[MethodAnalysis, int]]:
+        xrefs = set(
+            self._select(
+                self.class_refs,
+                'dst_cls',
+                cls,
+                'src_meth',
+                'offset',
+                kind=ref_kind,
+            )
+        )
+        return self._merge_extra(cls, self._class_ref_names[ref_kind], xrefs)
+
+    def string_xref_from(
+        self, string: StringAnalysis
+    ) -> set[tuple[ClassAnalysis, MethodAnalysis, int]]:
+        xrefs = set(
+            self._select(
+                self.strings,
+                'dst_str',
+                string,
+                'src_cls',
+                'src_meth',
+                'offset',
+            )
+        )
+        return self._merge_extra(string, 'xreffrom', xrefs)
+
+    def field_xref(
+        self, field: FieldAnalysis, write: bool
+    ) -> set[tuple[ClassAnalysis, MethodAnalysis, int]]:
+        xrefs = set(
+            self._select(
+                self.fields,
+                'dst_field',
+                field,
+                'src_cls',
+                'src_meth',
+                'offset',
+                kind=self.WRITE_FIELD if write else self.READ_FIELD,
+            )
+        )
+        return self._merge_extra(
+            field, 'xrefwrite' if write else 'xrefread', xrefs
+        )
+
+    def get_method_calls(
+        self,
+    ) -> Iterator[tuple[MethodAnalysis, MethodAnalysis, int, REF_TYPE]]:
+        """
+        Yields all method calls in the order they were found
+
+        :returns: tuples of calling method, called method, offset and `REF_TYPE`
+        """
+        columns = self.calls.columns
+        for src, dst, offset, ref_kind in zip(
+            columns['src_meth'],
+            columns['dst_meth'],
+            columns['offset'],
+            columns['kind'],
+        ):
+            yield self.objects[src], self.objects[dst], offset, REF_TYPE(
+                ref_kind
+            )
+
+
 class ExceptionAnalysis:
     def __init__(self, exception: list, basic_blocks: BasicBlocks):
         self.start = exception[0]
@@ -119,6 +582,8 @@ class BasicBlocks:
 
     def __init__(self) -> None:
         self.bb = []
+        # Start indexes of the blocks for get_basic_block()
+        self._starts = None
 
     def push(self, bb: DEXBasicBlock) -> None:
         """
@@ -127,6 +592,7 @@ class BasicBlocks:
         :param bb: the `DEXBasicBlock` to add
         """
         self.bb.append(bb)
+        self._starts = None
 
     def pop(self, idx: int) -> DEXBasicBlock:
         """remove and return [DEXBasicBlock][androguard.core.analysis.analysis.DEXBasicBlock] at `idx`
@@ -134,6 +600,7 @@ class BasicBlocks:
         :param idx: the index of the `DEXBasicBlock` to pop and return
         :return: the popped `DEXBasicBlock`
         """
+        self._starts = None
         return self.bb.pop(idx)
 
     def get_basic_block(self, idx: int) -> Union[DEXBasicBlock, None]:
@@ -142,9 +609,12 @@ class BasicBlocks:
         :param idx: the index of the `DEXBasicBlock` to return
         :return: the `DEXBasicBlock` or `None` if not found
         """
-        for i in self.bb:
-            if i.get_start() <= idx < i.get_end():
-                return i
+        # The blocks are sorted by their start index and do not overlap
+        if self._starts is None or len(self._starts) != len(self.bb):
+            self._starts = [i.get_start() for i in self.bb]
+        pos = bisect.bisect_right(self._starts, idx) - 1
+        if pos >= 0 and idx < self.bb[pos].get_end():
+            return self.bb[pos]
         return None
 
     def __len__(self) -> int:
@@ -374,11 +844,17 @@ class MethodAnalysis:
     by using multiple [DEXBasicBlock][androguard.core.analysis.analysis.DEXBasicBlock] encapsulated in a [BasicBlocks][androguard.core.analysis.analysis.BasicBlocks] object.
     """
 
-    def __init__(self, vm: dex.DEX, method: dex.EncodedMethod) -> None:
+    def __init__(
+        self,
+        vm: dex.DEX,
+        method: dex.EncodedMethod,
+        xref_store: Union[XrefStore, None] = None,
+    ) -> None:
         """Initialize new [MethodAnalysis][androguard.core.analysis.analysis.MethodAnalysis]
 
         :param vm: the `dex.DEX` containing the method
         :param method: the `dex.EncodedMethod` to wrap
+        :param xref_store: the `XrefStore` holding the xrefs, or None to keep them in this object
         """
         logger.debug(
             "Adding new method {} {}".format(
@@ -389,17 +865,22 @@ class MethodAnalysis:
         self.__vm = vm
         self.method = method
 
-        self.basic_blocks = BasicBlocks()
-        self.exceptions = Exceptions()
+        # Created on first access, see _create_basic_block()
+        self._basic_blocks = None
+        self._exceptions = None
 
-        self.xrefto = set()
-        self.xreffrom = set()
+        self._xref_store = xref_store
+        if xref_store is not None:
+            self._xref_id = xref_store.register(self)
+        else:
+            self.xrefto = set()
+            self.xreffrom = set()
 
-        self.xrefread = set()
-        self.xrefwrite = set()
+            self.xrefread = set()
+            self.xrefwrite = set()
 
-        self.xrefnewinstance = set()
-        self.xrefconstclass = set()
+            self.xrefnewinstance = set()
+            self.xrefconstclass = set()
 
         # For Android 10+
         self.restriction_flag = None
@@ -415,8 +896,27 @@ class MethodAnalysis:
         else:
             self.code = self.method.get_code()
 
-        if self.code:
+    @property
+    def basic_blocks(self) -> BasicBlocks:
+        """Returns the [BasicBlocks][androguard.core.analysis.analysis.BasicBlocks] of this method,
+        which are created on first access
+
+        :returns: the `BasicBlocks`
+        """
+        if self._basic_blocks is None:
             self._create_basic_block()
+        return self._basic_blocks
+
+    @property
+    def exceptions(self) -> Exceptions:
+        """Returns the [Exceptions][androguard.core.analysis.analysis.Exceptions] of this method,
+        which are created together with the basic blocks
+
+        :returns: the `Exceptions`
+        """
+        if self._exceptions is None:
+            self._create_basic_block()
+        return self._exceptions
 
     @property
     def name(self) -> str:
@@ -480,12 +980,19 @@ class MethodAnalysis:
         Internal Method to create the basic block structure
         Parses all instructions and exceptions.
         """
+        self._basic_blocks = BasicBlocks()
+        self._exceptions = Exceptions()
+        if not self.code:
+            return
+
         current_basic = DEXBasicBlock(
-            0, self.__vm, self.method, self.basic_blocks
+            0, self.__vm, self.method, self._basic_blocks
         )
-        self.basic_blocks.push(current_basic)
+        self._basic_blocks.push(current_basic)
 
-        l = []
+        # Indexes of all branch targets and exception handlers,
+        # each of them starts a new basic block
+        leaders = set()
         h = dict()
 
         logger.debug(
@@ -493,31 +1000,33 @@ class MethodAnalysis:
                 self.method.get_code_off()
             )
         )
+        instructions = []
         for idx, ins in self.method.get_instructions_idx():
+            instructions.append((idx, ins))
             if ins.get_op_value() in BasicOPCODES:
                 v = dex.determineNext(ins, idx, self.method)
                 h[idx] = v
-                l.extend(v)
+                leaders.update(v)
 
         logger.debug("Parsing exceptions")
         excepts = dex.determineException(self.__vm, self.method)
         for i in excepts:
-            l.extend([i[0]])
+            leaders.add(i[0])
             for handler in i[2:]:
-                l.append(handler[1])
+                leaders.add(handler[1])
 
         logger.debug("Creating basic blocks")
-        for idx, ins in self.method.get_instructions_idx():
+        for idx, ins in instructions:
             # index is a destination
-            if idx in l:
+            if idx in leaders:
                 if current_basic.get_nb_instructions() != 0:
                     current_basic = DEXBasicBlock(
                         current_basic.get_end(),
                         self.__vm,
                         self.method,
-                        self.basic_blocks,
+                        self._basic_blocks,
                     )
-                    self.basic_blocks.push(current_basic)
+                    self._basic_blocks.push(current_basic)
 
             current_basic.push(ins)
 
@@ -527,27 +1036,27 @@ class MethodAnalysis:
                     current_basic.get_end(),
                     self.__vm,
                     self.method,
-                    self.basic_blocks,
+                    self._basic_blocks,
                 )
-                self.basic_blocks.push(current_basic)
+                self._basic_blocks.push(current_basic)
 
         if current_basic.get_nb_instructions() == 0:
-            self.basic_blocks.pop(-1)
+            self._basic_blocks.pop(-1)
 
         logger.debug("Settings basic blocks childs")
-        for i in self.basic_blocks.get():
+        for i in self._basic_blocks.get():
             try:
                 i.set_childs(h[i.end - i.get_last_length()])
             except KeyError:
                 i.set_childs([])
 
         logger.debug("Creating exceptions")
-        self.exceptions.add(excepts, self.basic_blocks)
+        self._exceptions.add(excepts, self._basic_blocks)
 
-        for i in self.basic_blocks.get():
+        for i in self._basic_blocks.get():
             # setup exception by basic block
             i.set_exception_analysis(
-                self.exceptions.get_exception(i.start, i.end - 1)
+                self._exceptions.get_exception(i.start, i.end - 1)
             )
 
     def add_xref_read(
@@ -558,7 +1067,12 @@ class MethodAnalysis:
         :param FieldAnalysis fieldobj:
         :param int offset: offset in the bytecode
         """
-        self.xrefread.add((classobj, fieldobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefread', (classobj, fieldobj, offset)
+            )
+        else:
+            self.xrefread.add((classobj, fieldobj, offset))
 
     def add_xref_write(
         self, classobj: ClassAnalysis, fieldobj: FieldAnalysis, offset: int
@@ -568,7 +1082,12 @@ class MethodAnalysis:
         :param FieldAnalysis fieldobj:
         :param int offset: offset in the bytecode
         """
-        self.xrefwrite.add((classobj, fieldobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefwrite', (classobj, fieldobj, offset)
+            )
+        else:
+            self.xrefwrite.add((classobj, fieldobj, offset))
 
     def get_xref_read(self) -> list[tuple[ClassAnalysis, FieldAnalysis, int]]:
         """
@@ -580,6 +1099,8 @@ class MethodAnalysis:
 
         :returns: the `xrefread` list
         """
+        if self._xref_store is not None:
+            return self._xref_store.method_xref_fields(self, write=False)
         return self.xrefread
 
     def get_xref_write(self) -> list[tuple[ClassAnalysis, FieldAnalysis, int]]:
@@ -592,6 +1113,8 @@ class MethodAnalysis:
 
         :returns: the `xrefwrite` list
         """
+        if self._xref_store is not None:
+            return self._xref_store.method_xref_fields(self, write=True)
         return self.xrefwrite
 
     def add_xref_to(
@@ -601,7 +1124,12 @@ class MethodAnalysis:
         Add a crossreference to another method
         (this method calls another method)
         """
-        self.xrefto.add((classobj, methodobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefto', (classobj, methodobj, offset)
+            )
+        else:
+            self.xrefto.add((classobj, methodobj, offset))
 
     def add_xref_from(
         self, classobj: ClassAnalysis, methodobj: MethodAnalysis, offset: int
@@ -610,7 +1138,12 @@ class MethodAnalysis:
         Add a crossrefernece from another method
         (this method is called by another method)
         """
-        self.xreffrom.add((classobj, methodobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xreffrom', (classobj, methodobj, offset)
+            )
+        else:
+            self.xreffrom.add((classobj, methodobj, offset))
 
     def get_xref_from(self) -> list[tuple[ClassAnalysis, MethodAnalysis, int]]:
         """
@@ -624,6 +1157,8 @@ class MethodAnalysis:
 
         :returns: the `xreffrom` list
         """
+        if self._xref_store is not None:
+            return self._xref_store.method_xref_from(self)
         return self.xreffrom
 
     def get_xref_to(self) -> list[tuple[ClassAnalysis, MethodAnalysis, int]]:
@@ -638,6 +1173,8 @@ class MethodAnalysis:
 
         :returns: the `xrefto` list
         """
+        if self._xref_store is not None:
+            return self._xref_store.method_xref_to(self)
         return self.xrefto
 
     def add_xref_new_instance(
@@ -647,7 +1184,12 @@ class MethodAnalysis:
         Add a crossreference to another class that is
         instanced within this method.
         """
-        self.xrefnewinstance.add((classobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefnewinstance', (classobj, offset)
+            )
+        else:
+            self.xrefnewinstance.add((classobj, offset))
 
     def get_xref_new_instance(self) -> list[tuple[ClassAnalysis, int]]:
         """
@@ -660,6 +1202,10 @@ class MethodAnalysis:
 
         :returns: the `xrefnewinstance` list
         """
+        if self._xref_store is not None:
+            return self._xref_store.method_xref_classes(
+                self, REF_TYPE.REF_NEW_INSTANCE
+            )
         return self.xrefnewinstance
 
     def add_xref_const_class(
@@ -668,7 +1214,12 @@ class MethodAnalysis:
         """
         Add a crossreference to another classtype.
         """
-        self.xrefconstclass.add((classobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefconstclass', (classobj, offset)
+            )
+        else:
+            self.xrefconstclass.add((classobj, offset))
 
     def get_xref_const_class(self) -> list[tuple[ClassAnalysis, int]]:
         """
@@ -681,6 +1232,10 @@ class MethodAnalysis:
 
         :returns: the `xrefconstclass` list
         """
+        if self._xref_store is not None:
+            return self._xref_store.method_xref_classes(
+                self, REF_TYPE.REF_CLASS_USAGE
+            )
         return self.xrefconstclass
 
     def is_external(self) -> bool:
@@ -796,14 +1351,14 @@ class MethodAnalysis:
 
     def show_xrefs(self) -> None:
         data = "XREFto for %s\n" % self.method
-        for ref_class, ref_method, offset in self.xrefto:
+        for ref_class, ref_method, offset in self.get_xref_to():
             data += "in\n"
             data += "{}:{} @0x{:x}\n".format(
                 ref_class.get_vm_class().get_name(), ref_method, offset
             )
 
         data += "XREFFrom for %s\n" % self.method
-        for ref_class, ref_method, offset in self.xreffrom:
+        for ref_class, ref_method, offset in self.get_xref_from():
             data += "in\n"
             data += "{}:{} @0x{:x}\n".format(
                 ref_class.get_vm_class().get_name(), ref_method, offset
@@ -825,14 +1380,22 @@ class StringAnalysis:
     This Array stores the information in which method the String is used.
     """
 
-    def __init__(self, value: str) -> None:
+    def __init__(
+        self, value: str, xref_store: Union[XrefStore, None] = None
+    ) -> None:
         """Instantiate a new [StringAnalysis][androguard.core.analysis.analysis.StringAnalysis]
 
         :param value: the original string value
+        :param xref_store: the `XrefStore` holding the xrefs, or None to keep them in this object
         """
         self.value = value
         self.orig_value = value
-        self.xreffrom = set()
+
+        self._xref_store = xref_store
+        if xref_store is not None:
+            self._xref_id = xref_store.register(self)
+        else:
+            self.xreffrom = set()
 
     def add_xref_from(
         self, classobj: ClassAnalysis, methodobj: MethodAnalysis, off: int
@@ -844,7 +1407,12 @@ class StringAnalysis:
         :param methodobj:
         :param off: offset in the bytecode of the call
         """
-        self.xreffrom.add((classobj, methodobj, off))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xreffrom', (classobj, methodobj, off)
+            )
+        else:
+            self.xreffrom.add((classobj, methodobj, off))
 
     def get_xref_from(
         self, with_offset: bool = False
@@ -856,9 +1424,13 @@ class StringAnalysis:
         where the class is represented as a [ClassAnalysis][androguard.core.analysis.analysis.ClassAnalysis],
         while the method is a [MethodAnalysis][androguard.core.analysis.analysis.MethodAnalysis].
         """
+        if self._xref_store is not None:
+            xreffrom = self._xref_store.string_xref_from(self)
+        else:
+            xreffrom = self.xreffrom
         if with_offset:
-            return self.xreffrom
-        return set(map(itemgetter(slice(0, 2)), self.xreffrom))
+            return xreffrom
+        return set(map(itemgetter(slice(0, 2)), xreffrom))
 
     def set_value(self, value: str) -> None:
         """
@@ -894,7 +1466,7 @@ class StringAnalysis:
 
     def __str__(self):
         data = "XREFto for string %s in\n" % repr(self.get_value())
-        for ref_class, ref_method, _ in self.xreffrom:
+        for ref_class, ref_method, _ in self.get_xref_from(with_offset=True):
             data += "{}:{}\n".format(
                 ref_class.get_vm_class().get_name(), ref_method
             )
@@ -919,13 +1491,23 @@ class FieldAnalysis:
     That means, that it will show you, where the field is read or written.
     """
 
-    def __init__(self, field: dex.EncodedField) -> None:
+    def __init__(
+        self,
+        field: dex.EncodedField,
+        xref_store: Union[XrefStore, None] = None,
+    ) -> None:
         """Initialize a new [FieldAnalysis][androguard.core.analysis.analysis.FieldAnalysis] object
         :param field:
+        :param xref_store: the `XrefStore` holding the xrefs, or None to keep them in this object
         """
         self.field = field
-        self.xrefread = set()
-        self.xrefwrite = set()
+
+        self._xref_store = xref_store
+        if xref_store is not None:
+            self._xref_id = xref_store.register(self)
+        else:
+            self.xrefread = set()
+            self.xrefwrite = set()
 
     @property
     def name(self) -> str:
@@ -939,7 +1521,12 @@ class FieldAnalysis:
         :param methodobj:
         :param offset: offset in the bytecode
         """
-        self.xrefread.add((classobj, methodobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefread', (classobj, methodobj, offset)
+            )
+        else:
+            self.xrefread.add((classobj, methodobj, offset))
 
     def add_xref_write(
         self, classobj: ClassAnalysis, methodobj: MethodAnalysis, offset: int
@@ -949,7 +1536,12 @@ class FieldAnalysis:
         :param methodobj:
         :param offset: offset in the bytecode
         """
-        self.xrefwrite.add((classobj, methodobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefwrite', (classobj, methodobj, offset)
+            )
+        else:
+            self.xrefwrite.add((classobj, methodobj, offset))
 
     def get_xref_read(
         self, with_offset: bool = False
@@ -965,10 +1557,14 @@ class FieldAnalysis:
 
         :returns: the `xrefread` list
         """
+        if self._xref_store is not None:
+            xrefread = self._xref_store.field_xref(self, write=False)
+        else:
+            xrefread = self.xrefread
         if with_offset:
-            return self.xrefread
+            return xrefread
         # Legacy option, might be removed in the future
-        return set(map(itemgetter(slice(0, 2)), self.xrefread))
+        return set(map(itemgetter(slice(0, 2)), xrefread))
 
     def get_xref_write(
         self, with_offset: bool = False
@@ -984,10 +1580,14 @@ class FieldAnalysis:
 
         :returns: the `xrefwrite` list
         """
+        if self._xref_store is not None:
+            xrefwrite = self._xref_store.field_xref(self, write=True)
+        else:
+            xrefwrite = self.xrefwrite
         if with_offset:
-            return self.xrefwrite
+            return xrefwrite
         # Legacy option, might be removed in the future
-        return set(map(itemgetter(slice(0, 2)), self.xrefwrite))
+        return set(map(itemgetter(slice(0, 2)), xrefwrite))
 
     def get_field(self) -> dex.EncodedField:
         """
@@ -999,14 +1599,16 @@ class FieldAnalysis:
 
     def __str__(self):
         data = "XREFRead for %s\n" % self.field
-        for ref_class, ref_method, off in self.xrefread:
+        for ref_class, ref_method, off in self.get_xref_read(with_offset=True):
             data += "in\n"
             data += "{}:{} @{}\n".format(
                 ref_class.get_vm_class().get_name(), ref_method, off
             )
 
         data += "XREFWrite for %s\n" % self.field
-        for ref_class, ref_method, off in self.xrefwrite:
+        for ref_class, ref_method, off in self.get_xref_write(
+            with_offset=True
+        ):
             data += "in\n"
             data += "{}:{} @{}\n".format(
                 ref_class.get_vm_class().get_name(), ref_method, off
@@ -1163,11 +1765,14 @@ class ClassAnalysis:
     """
 
     def __init__(
-        self, classobj: Union[dex.ClassDefItem, ExternalClass]
+        self,
+        classobj: Union[dex.ClassDefItem, ExternalClass],
+        xref_store: Union[XrefStore, None] = None,
     ) -> None:
         """Initialize a new [ClassAnalysis][androguard.core.analysis.analysis.ClassAnalysis] object
 
         :param classobj: the original class
+        :param xref_store: the `XrefStore` holding the xrefs, or None to keep them in this object
         """
 
         logger.info(f"Adding new ClassAnalysis: {classobj}")
@@ -1182,11 +1787,15 @@ class ClassAnalysis:
         # Contains EncodedField -> FieldAnalysis
         self._fields = dict()
 
-        self.xrefto = collections.defaultdict(set)
-        self.xreffrom = collections.defaultdict(set)
+        self._xref_store = xref_store
+        if xref_store is not None:
+            self._xref_id = xref_store.register(self)
+        else:
+            self.xrefto = collections.defaultdict(set)
+            self.xreffrom = collections.defaultdict(set)
 
-        self.xrefnewinstance = set()
-        self.xrefconstclass = set()
+            self.xrefnewinstance = set()
+            self.xrefconstclass = set()
 
         # Reserved for further use
         self.apilist = None
@@ -1339,6 +1948,32 @@ class ClassAnalysis:
         #     # Propagate ExternalField to ExternalClass
         #     self.orig_class.add_method(field_analysis.get_field())
 
+    def _get_or_add_method(self, method: MethodAnalysis) -> MethodAnalysis:
+        """
+        Return the `MethodAnalysis` of `method` in this class and add it
+        if it is missing
+
+        :param method: the `MethodAnalysis` to look up
+        :returns: the `MethodAnalysis` stored in this class
+        """
+        # FIXME: Not entirely sure why this can happen but usually a multidex issue:
+        # The given method was not added before...
+        if method.get_method() not in self._methods:
+            self.add_method(method)
+        return self._methods[method.get_method()]
+
+    def _get_or_add_field(self, field: dex.EncodedField) -> FieldAnalysis:
+        """
+        Return the `FieldAnalysis` of `field` in this class and create it
+        if it is missing
+
+        :param field: the `EncodedField` to look up
+        :returns: the `FieldAnalysis` stored in this class
+        """
+        if field not in self._fields:
+            self._fields[field] = FieldAnalysis(field, self._xref_store)
+        return self._fields[field]
+
     def add_field_xref_read(
         self,
         method: MethodAnalysis,
@@ -1354,9 +1989,7 @@ class ClassAnalysis:
         :param field:
         :param int off:
         """
-        if field not in self._fields:
-            self._fields[field] = FieldAnalysis(field)
-        self._fields[field].add_xref_read(classobj, method, off)
+        self._get_or_add_field(field).add_xref_read(classobj, method, off)
 
     def add_field_xref_write(
         self,
@@ -1373,9 +2006,7 @@ class ClassAnalysis:
         :param field:
         :param int off:
         """
-        if field not in self._fields:
-            self._fields[field] = FieldAnalysis(field)
-        self._fields[field].add_xref_write(classobj, method, off)
+        self._get_or_add_field(field).add_xref_write(classobj, method, off)
 
     def add_method_xref_to(
         self,
@@ -1391,15 +2022,7 @@ class ClassAnalysis:
         :param method2: the called method
         :param int offset: offset in the bytecode of calling method
         """
-
-        # FIXME: Not entirely sure why this can happen but usually a multidex issue:
-        # The given method was not added before...
-        if method1.get_method() not in self._methods:
-            self.add_method(method1)
-
-        self._methods[method1.get_method()].add_xref_to(
-            classobj, method2, offset
-        )
+        self._get_or_add_method(method1).add_xref_to(classobj, method2, offset)
 
     def add_method_xref_from(
         self,
@@ -1414,12 +2037,7 @@ class ClassAnalysis:
         :param method2:
         :param int offset:
         """
-        # FIXME: Not entirely sure why this can happen but usually a multidex issue:
-        # The given method was not added before...
-        if method1.get_method() not in self._methods:
-            self.add_method(method1)
-
-        self._methods[method1.get_method()].add_xref_from(
+        self._get_or_add_method(method1).add_xref_from(
             classobj, method2, offset
         )
 
@@ -1442,7 +2060,12 @@ class ClassAnalysis:
         :param methodobj:
         :param offset: Offset in the Methods Bytecode, where the call happens
         """
-        self.xrefto[classobj].add((ref_kind, methodobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefto', (ref_kind, methodobj, offset), key=classobj
+            )
+        else:
+            self.xrefto[classobj].add((ref_kind, methodobj, offset))
 
     def add_xref_from(
         self,
@@ -1460,7 +2083,12 @@ class ClassAnalysis:
         :param methodobj:
         :param offset: Offset in the methods bytecode, where the call happens
         """
-        self.xreffrom[classobj].add((ref_kind, methodobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xreffrom', (ref_kind, methodobj, offset), key=classobj
+            )
+        else:
+            self.xreffrom[classobj].add((ref_kind, methodobj, offset))
 
     def get_xref_from(
         self,
@@ -1488,6 +2116,8 @@ class ClassAnalysis:
 
         :returns: `xreffrom`, a dictionary of all classes calling the current class
         """
+        if self._xref_store is not None:
+            return self._xref_store.class_xref_from(self)
         return self.xreffrom
 
     def get_xref_to(
@@ -1516,6 +2146,8 @@ class ClassAnalysis:
 
         :returns: `xrefto`, a dictionary of all classes which are called by the current class
         """
+        if self._xref_store is not None:
+            return self._xref_store.class_xref_to(self)
         return self.xrefto
 
     def add_xref_new_instance(
@@ -1528,7 +2160,12 @@ class ClassAnalysis:
         :param methobj: The `MethodAnalysis` that this class calls
         :param offset: integer where in the method the instantiation happens
         """
-        self.xrefnewinstance.add((methobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefnewinstance', (methobj, offset)
+            )
+        else:
+            self.xrefnewinstance.add((methobj, offset))
 
     def get_xref_new_instance(self) -> list[tuple[MethodAnalysis, int]]:
         """
@@ -1542,6 +2179,10 @@ class ClassAnalysis:
 
         :returns: the list of tuples
         """
+        if self._xref_store is not None:
+            return self._xref_store.class_xref_methods(
+                self, REF_TYPE.REF_NEW_INSTANCE
+            )
         return self.xrefnewinstance
 
     def add_xref_const_class(
@@ -1553,7 +2194,12 @@ class ClassAnalysis:
         :param methobj: The `MethodAnalysis` that this class calls
         :param offset: integer where in the method the classtype is referenced
         """
-        self.xrefconstclass.add((methobj, offset))
+        if self._xref_store is not None:
+            self._xref_store.add_extra(
+                self, 'xrefconstclass', (methobj, offset)
+            )
+        else:
+            self.xrefconstclass.add((methobj, offset))
 
     def get_xref_const_class(self) -> list[tuple[MethodAnalysis, int]]:
         """
@@ -1566,6 +2212,10 @@ class ClassAnalysis:
 
         :returns: the list of tuples
         """
+        if self._xref_store is not None:
+            return self._xref_store.class_xref_methods(
+                self, REF_TYPE.REF_CLASS_USAGE
+            )
         return self.xrefconstclass
 
     def get_vm_class(self) -> Union[dex.ClassDefItem, ExternalClass]:
@@ -1620,20 +2270,22 @@ class ClassAnalysis:
     def __str__(self):
         # Print only instantiation from other classes here
         # TODO also method xref and field xref should be printed?
+        xrefto = self.get_xref_to()
         data = "XREFto for %s\n" % self.orig_class
-        for ref_class in self.xrefto:
+        for ref_class in xrefto:
             data += str(ref_class.get_vm_class().get_name()) + " "
             data += "in\n"
-            for ref_kind, ref_method, ref_offset in self.xrefto[ref_class]:
+            for ref_kind, ref_method, ref_offset in xrefto[ref_class]:
                 data += "%d %s 0x%x\n" % (ref_kind, ref_method, ref_offset)
 
             data += "\n"
 
+        xreffrom = self.get_xref_from()
         data += "XREFFrom for %s\n" % self.orig_class
-        for ref_class in self.xreffrom:
+        for ref_class in xreffrom:
             data += str(ref_class.get_vm_class().get_name()) + " "
             data += "in\n"
-            for ref_kind, ref_method, ref_offset in self.xreffrom[ref_class]:
+            for ref_kind, ref_method, ref_offset in xreffrom[ref_class]:
                 data += "%d %s 0x%x\n" % (ref_kind, ref_method, ref_offset)
 
             data += "\n"
@@ -1641,6 +2293,98 @@ class ClassAnalysis:
         return data
 
 
+# Characters with a special meaning in a regular expression
+_REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(pattern: str) -> re.Pattern:
+    """Compile `pattern`, keeping the most recently used patterns"""
+    return re.compile(pattern)
+
+
+@functools.lru_cache(maxsize=1024)
+def _literal_prefix(pattern: str) -> str:
+    """
+    Return the literal text every string matched by `pattern` starts with,
+    when the pattern is used with `re.match`.
+
+    Only simple cases are handled, for anything else the prefix is shorter
+    than it could be, down to the empty string.
+    Patterns with an alternation never have a prefix, as the alternation
+    might apply to the whole pattern. Neither have compiled patterns, which
+    might use flags.
+
+    :param pattern: the regular expression
+    :returns: the literal prefix, possibly empty
+    """
+    if not isinstance(pattern, str) or "|" in pattern:
+        return ""
+
+    prefix = []
+    i = 0
+    if pattern.startswith("^"):
+        i = 1
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                # character classes like \d or back references
+                break
+            c = pattern[i + 1]
+            i += 2
+        elif c in _REGEX_SPECIAL:
+            break
+        else:
+            i += 1
+
+        if i < len(pattern) and pattern[i] in "*?{":
+            # the last character is optional or repeated
+            break
+        prefix.append(c)
+    return "".join(prefix)
+
+
+class NameIndex:
+    """
+    An index of names for queries by regular expression.
+
+    The names are kept sorted, thus all names starting with the literal
+    prefix of a pattern are found by a binary search.
+    The matches are returned in the original order of the names.
+    """
+
+    def __init__(self, names: list[str]) -> None:
+        """
+        :param names: the list of names to index
+        """
+        self.names = names
+        self._order = sorted(range(len(names)), key=names.__getitem__)
+        self._sorted = [names[i] for i in self._order]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, pattern: str) -> list[int]:
+        """
+        Return the positions of all names matched by `pattern`
+
+        :param pattern: the regular expression, used with `re.match`
+        :returns: the sorted list of positions
+        """
+        prog = _compile(pattern)
+        prefix = _literal_prefix(pattern)
+        if not prefix:
+            return [i for i, name in enumerate(self.names) if prog.match(name)]
+
+        start = end = bisect.bisect_left(self._sorted, prefix)
+        while end < len(self._sorted) and self._sorted[end].startswith(prefix):
+            end += 1
+        return sorted(
+            i for i in self._order[start:end] if prog.match(self.names[i])
+        )
+
+
 class Analysis:
     """
     Analysis Object
@@ -1668,10 +2412,18 @@ class Analysis:
 
     """
 
-    def __init__(self, vm: Union[dex.DEX, None] = None) -> None:
+    def __init__(
+        self, vm: Union[dex.DEX, None] = None, compact_xrefs: bool = False
+    ) -> None:
         """Initialize a new [Analysis][androguard.core.analysis.analysis.Analysis] object
 
+        With `compact_xrefs`, all XREFs are kept in a single [XrefStore][androguard.core.analysis.analysis.XrefStore]
+        instead of sets in each analysis object, which needs a lot less memory for large apps.
+        The `get_xref_*` methods return the same results in both modes,
+        but the `xref*` attributes of the analysis objects are not available.
+
         :param vm: inital DEX object (default None)
+        :param compact_xrefs: store the XREFs in a `XrefStore` (default False)
         """
         # Contains DEX objects
         self.vms = []
@@ -1685,11 +2437,18 @@ class Analysis:
         # Used to quickly look up methods
         self.__method_hashes = dict()
 
+        # Name indexes used by the find_* methods, see _get_query_index()
+        self.__query_indexes = dict()
+
+        # Columnar XREF storage, if enabled
+        self.xref_store = XrefStore() if compact_xrefs else None
+
+        # Number of DEX files in self.vms with created XREFs
+        self.__xref_vms = 0
+
         if vm:
             self.add(vm)
 
-        self.__created_xrefs = False
-
     @property
     def fields(self) -> Iterator[FieldAnalysis]:
         """Returns [FieldAnalysis][androguard.core.analysis.analysis.FieldAnalysis] generator of this `Analysis`
@@ -1702,6 +2461,10 @@ class Analysis:
         """
         Add a DEX to this Analysis.
 
+        A DEX can also be added after `create_xref` was called, external
+        classes which are defined in the new DEX are then replaced by it.
+        Call `create_xref` again to create the XREFs of the new DEX.
+
         :param vm: `dex.DEX` to add to this Analysis
         """
 
@@ -1713,8 +2476,9 @@ class Analysis:
         tic = time.time()
         for i, current_class in enumerate(vm.get_classes()):
             # seed ClassAnalysis objects into classes attribute and add as new class
+            old_class = self.classes.get(current_class.get_name())
             self.classes[current_class.get_name()] = ClassAnalysis(
-                current_class
+                current_class, self.xref_store
             )
             new_class = self.classes[current_class.get_name()]
 
@@ -1727,7 +2491,9 @@ class Analysis:
 
             # seed MethodAnalysis objects into methods attribute and add to new class analysis
             for method in current_class.get_methods():
-                self.methods[method] = MethodAnalysis(vm, method)
+                self.methods[method] = MethodAnalysis(
+                    vm, method, self.xref_store
+                )
                 new_class.add_method(self.methods[method])
 
                 # Store for faster lookup during create_xrefs
@@ -1743,11 +2509,21 @@ class Analysis:
             # which returns what's within a ClassAnalysis
             # we don't have to track it internally in this class
             for field in current_class.get_fields():
-                new_class.add_field(FieldAnalysis(field))
+                new_class.add_field(FieldAnalysis(field, self.xref_store))
+
+            # The class was referenced by the xrefs of a previous DEX file
+            if old_class is not None and old_class.is_external():
+                self._resolve_external_class(old_class, new_class)
 
         # seed StringAnalysis objects into strings attribute - connect alter using xrefs
+        # Strings shared with a previous DEX file keep their xrefs
         for string_value in vm.get_strings():
-            self.strings[string_value] = StringAnalysis(string_value)
+            if string_value not in self.strings:
+                self.strings[string_value] = StringAnalysis(
+                    string_value, self.xref_store
+                )
+
+        self.__query_indexes.clear()
 
         logger.info(
             "Added DEX in the analysis took : {:0d}min {:02d}s".format(
@@ -1755,36 +2531,154 @@ class Analysis:
             )
         )
 
-    def create_xref(self) -> None:
+    def _resolve_external_class(
+        self, old_class: ClassAnalysis, new_class: ClassAnalysis
+    ) -> None:
+        """
+        Move the xrefs of the external class `old_class` to `new_class`,
+        which was added by a later DEX file.
+
+        The [ExternalMethods][androguard.core.analysis.analysis.ExternalMethod]
+        of `old_class` are replaced by the methods of `new_class` with the
+        same signature, all others are moved to `new_class`.
+
+        :param old_class: the external `ClassAnalysis` created by `create_xref`
+        :param new_class: the `ClassAnalysis` of the class in the new DEX
+        """
+        logger.debug("Resolving external class {}".format(new_class.name))
+
+        moved = {}
+        for meth in old_class.get_methods():
+            ext_meth = meth.get_method()
+            m_hash = (
+                new_class.name,
+                ext_meth.get_name(),
+                ext_meth.get_descriptor(),
+            )
+            # add() already replaced the hashes of all methods of the class
+            new_meth = self.__method_hashes[m_hash]
+            if new_meth is meth:
+                new_class.add_method(meth)
+            else:
+                moved[meth] = new_meth
+                del self.methods[ext_meth]
+
+        # The indexes of the find_* methods still hold the external objects
+        self.__query_indexes.clear()
+
+        if self.xref_store is not None:
+            self.xref_store.replace(old_class, new_class)
+            for meth, new_meth in moved.items():
+                self.xref_store.replace(meth, new_meth)
+            return
+
+        for src_cls, refs in old_class.xreffrom.items():
+            new_class.xreffrom[src_cls].update(refs)
+            src_cls.xrefto[new_class].update(
+                (ref_kind, moved.get(meth, meth), off)
+                for ref_kind, meth, off in src_cls.xrefto.pop(old_class, ())
+            )
+
+        for meth, off in old_class.xrefnewinstance:
+            meth.xrefnewinstance.discard((old_class, off))
+            meth.xrefnewinstance.add((new_class, off))
+        new_class.xrefnewinstance.update(old_class.xrefnewinstance)
+
+        for meth, off in old_class.xrefconstclass:
+            meth.xrefconstclass.discard((old_class, off))
+            meth.xrefconstclass.add((new_class, off))
+        new_class.xrefconstclass.update(old_class.xrefconstclass)
+
+        for meth in old_class.get_methods():
+            new_meth = moved.get(meth, meth)
+            for src_cls, src_meth, off in meth.xreffrom:
+                src_meth.xrefto.discard((old_class, meth, off))
+                src_meth.xrefto.add((new_class, new_meth, off))
+            if new_meth is not meth:
+                new_meth.xreffrom.update(meth.xreffrom)
+
+    def create_xref(
+        self, workers: int = 0, cache: Union[AnalysisCache, None] = None
+    ) -> None:
         """
         Create Class, Method, String and Field crossreferences
         for all classes in the Analysis.
 
-        If you are using multiple DEX files, this function must
-        be called when all DEX files are added.
-        If you call the function after every DEX file, it will only work
-        for the first time.
-        """
-        if self.__created_xrefs:
-            # TODO on concurrent runs, we probably need to clean up first,
-            # or check that we do not write garbage.
+        If you are using multiple DEX files, this function can be called
+        after each [add][androguard.core.analysis.analysis.Analysis.add].
+        Only the XREFs of the DEX files added since the last call are created,
+        classes and methods which were external so far are resolved by `add`.
+
+        The instructions of all classes can be scanned in parallel by setting
+        `workers` to the number of processes to use.
+        The workers only collect the references of each class, all
+        `*Analysis` objects are still created and linked in this process,
+        in the same order as the serial path, thus the results are identical.
+        Parallel scanning requires the `fork` start method, on other platforms
+        the serial path is used.
+
+        If an [AnalysisCache][androguard.core.analysis.cache.AnalysisCache]
+        is given, the references of DEX files found in the cache are loaded
+        from it instead of scanning the instructions, and the references of
+        all other DEX files are stored in the cache.
+
+        :param workers: number of worker processes to scan the classes with (default: 0, no workers)
+        :param cache: the `AnalysisCache` to use (default: None, no cache)
+        """
+        first_vm = self.__xref_vms
+        if first_vm == len(self.vms):
             logger.error(
                 "You have requested to run create_xref() twice! "
-                "This will not work and cause problems! This function will exit right now. "
-                "If you want to add multiple DEX files, use add() several times and then run create_xref() once."
+                "There is no new DEX file, this function will exit right now. "
+                "Add another DEX file with add() before running create_xref() again."
             )
             return
 
-        self.__created_xrefs = True
+        self.__xref_vms = len(self.vms)
         logger.debug("Creating Crossreferences (XREF)")
         tic = time.time()
 
-        # TODO multiprocessing
-        # One reason why multiprocessing is hard to implement is the creation of
-        # the external classes and methods. This must be synchronized, which is now possible as we have a single method!
-        for vm in self.vms:
-            for current_class in vm.get_classes():
-                self._create_xref(current_class)
+        if workers > 1 and "fork" not in mp.get_all_start_methods():
+            logger.warning(
+                "Parallel XREF creation needs the 'fork' start method, "
+                "which is not available. Falling back to a single process."
+            )
+            workers = 0
+
+        vm_indexes = range(first_vm, len(self.vms))
+
+        loaded = {}
+        if cache is not None:
+            for vm_idx in vm_indexes:
+                vm = self.vms[vm_idx]
+                vm_refs = cache.load(vm)
+                if vm_refs is not None:
+                    loaded[vm_idx] = vm_refs
+
+        scanned = {}
+        if workers > 1:
+            scanned = self._create_xref_parallel(
+                workers, [i for i in vm_indexes if i not in loaded]
+            )
+
+        for vm_idx in vm_indexes:
+            vm = self.vms[vm_idx]
+            classes = vm.get_classes()
+            if vm_idx in loaded:
+                vm_refs = loaded[vm_idx]
+            else:
+                vm_refs = scanned.get(vm_idx)
+                if vm_refs is None:
+                    vm_refs = map(_scan_class_xref, classes)
+                if cache is not None:
+                    vm_refs = list(vm_refs)
+                    cache.store(vm, vm_refs)
+
+            for current_class, refs in zip(classes, vm_refs):
+                self._add_xref_refs(vm, current_class, refs)
+
+        # External classes, methods and strings were added
+        self.__query_indexes.clear()
 
         # TODO: After we collected all the information, we should add field and
         # string xrefs to each MethodAnalysis
@@ -1796,7 +2690,51 @@ class Analysis:
             )
         )
 
-    def _create_xref(self, current_class: dex.ClassDefItem) -> None:
+    def _create_xref_parallel(
+        self, workers: int, vm_indexes: list[int]
+    ) -> dict[int, list[list[tuple[int, int, int, object]]]]:
+        """
+        Scan all classes of the given DEX files in `workers` forked processes.
+
+        The DEX objects are inherited by the forked workers, hence only
+        the shard boundaries and the compact references are transferred.
+
+        :param workers: number of worker processes
+        :param vm_indexes: the indexes of the DEX files in `self.vms` to scan
+        :returns: a dictionary mapping the DEX index to the references of each of its classes
+        """
+        shards = []
+        for vm_idx in vm_indexes:
+            nb_classes = len(self.vms[vm_idx].get_classes())
+            for start in range(0, nb_classes, XREF_SHARD_SIZE):
+                shards.append(
+                    (vm_idx, start, min(start + XREF_SHARD_SIZE, nb_classes))
+                )
+
+        scanned = {vm_idx: [] for vm_idx in vm_indexes}
+        if not shards:
+            return scanned
+
+        logger.info(
+            "Scanning {} shards of classes using {} workers".format(
+                len(shards), workers
+            )
+        )
+        ctx = mp.get_context("fork")
+        with ctx.Pool(
+            workers, initializer=_init_xref_worker, initargs=(self.vms,)
+        ) as pool:
+            # imap keeps the order of the shards, thus the references
+            # are in the same order as the classes
+            for (vm_idx, _, _), shard_refs in zip(
+                shards, pool.imap(_scan_xref_shard, shards)
+            ):
+                scanned[vm_idx].extend(shard_refs)
+        return scanned
+
+    def _create_xref(
+        self, vm: dex.DEX, current_class: dex.ClassDefItem
+    ) -> None:
         """
         Create the xref for `current_class`
 
@@ -1810,156 +2748,142 @@ class Analysis:
 
         Note that this might be quite slow, as all instructions are parsed.
 
+        :param vm: the `DEX` containing the class
         :param current_class: The class to create xrefs for
         """
-        cur_cls_name = current_class.get_name()
+        self._add_xref_refs(vm, current_class, _scan_class_xref(current_class))
 
-        logger.debug(
-            "Creating XREF/DREF for class at @0x{:08x}".format(
-                current_class.get_class_data_off()
-            )
-        )
-        for current_method in current_class.get_methods():
-            logger.debug(
-                "Creating XREF for method at @0x{:08x}".format(
-                    current_method.get_code_off()
-                )
-            )
-
-            cur_meth = self.get_method(current_method)
-            cur_cls = self.classes[cur_cls_name]
+    def _add_xref_refs(
+        self,
+        vm: dex.DEX,
+        current_class: dex.ClassDefItem,
+        refs: list[tuple[int, int, int, object]],
+    ) -> None:
+        """
+        Store the references found by [_scan_class_xref][androguard.core.analysis.analysis._scan_class_xref]
+        in the *Analysis Objects.
 
-            for off, instruction in current_method.get_instructions_idx():
-                op_value = instruction.get_op_value()
+        External classes and methods are created here when they are first
+        referenced, hence this must always run in the order of the classes.
 
-                # 1) check for class calls: const-class (0x1c), new-instance (0x22)
-                if op_value in [0x1C, 0x22]:
-                    idx_type = instruction.get_ref_kind()
-                    # type_info is the string like 'Ljava/lang/Object;'
-                    type_info = instruction.cm.vm.get_cm_type(idx_type).lstrip(
-                        '['
+        :param vm: the `DEX` containing the class
+        :param current_class: the class the references were collected for
+        :param refs: list of `(method index, opcode, offset, reference)` tuples
+        """
+        cur_cls_name = current_class.get_name()
+        cur_cls = self.classes[cur_cls_name]
+        methods = current_class.get_methods()
+
+        for meth_idx, op_value, off, ref in refs:
+            cur_meth = self.get_method(methods[meth_idx])
+
+            # 1) class calls: const-class (0x1c), new-instance (0x22)
+            if op_value in [0x1C, 0x22]:
+                if ref not in self.classes:
+                    # Create new external class
+                    self.classes[ref] = ClassAnalysis(
+                        ExternalClass(ref), self.xref_store
                     )
-                    if type_info[0] != 'L':
-                        # Need to make sure, that we get class types and not other types
-                        continue
-
-                    if type_info == cur_cls_name:
-                        # FIXME: effectively ignoring calls to itself - do we want that?
-                        continue
-
-                    if type_info not in self.classes:
-                        # Create new external class
-                        self.classes[type_info] = ClassAnalysis(
-                            ExternalClass(type_info)
-                        )
 
-                    oth_cls = self.classes[type_info]
+                oth_cls = self.classes[ref]
 
-                    # FIXME: xref_to does not work here! current_method is wrong, as it is not the target!
-                    # In this case that means, that current_method calls the class oth_class.
-                    # Hence, on xref_to the method info is the calling method not the called one,
-                    # as there is no called method!
-                    # With the _new_instance and _const_class can this be deprecated?
-                    # Removing these does not impact tests
-                    cur_cls.add_xref_to(
-                        REF_TYPE(op_value), oth_cls, cur_meth, off
-                    )
-                    oth_cls.add_xref_from(
-                        REF_TYPE(op_value), cur_cls, cur_meth, off
+                if self.xref_store is not None:
+                    self.xref_store.add_class_ref(
+                        REF_TYPE(op_value), cur_cls, cur_meth, oth_cls, off
                     )
+                    continue
+
+                # FIXME: xref_to does not work here! current_method is wrong, as it is not the target!
+                # In this case that means, that current_method calls the class oth_class.
+                # Hence, on xref_to the method info is the calling method not the called one,
+                # as there is no called method!
+                # With the _new_instance and _const_class can this be deprecated?
+                # Removing these does not impact tests
+                cur_cls.add_xref_to(REF_TYPE(op_value), oth_cls, cur_meth, off)
+                oth_cls.add_xref_from(
+                    REF_TYPE(op_value), cur_cls, cur_meth, off
+                )
 
-                    if op_value == 0x1C:
-                        cur_meth.add_xref_const_class(oth_cls, off)
-                        oth_cls.add_xref_const_class(cur_meth, off)
-                    if op_value == 0x22:
-                        cur_meth.add_xref_new_instance(oth_cls, off)
-                        oth_cls.add_xref_new_instance(cur_meth, off)
-
-                # 2) check for method calls: invoke-* (0x6e ... 0x72), invoke-xxx/range (0x74 ... 0x78)
-                elif (0x6E <= op_value <= 0x72) or (0x74 <= op_value <= 0x78):
-                    idx_meth = instruction.get_ref_kind()
-                    method_info = instruction.cm.vm.get_cm_method(idx_meth)
-                    if not method_info:
-                        logger.warning(
-                            "Could not get method_info "
-                            "for instruction at {} in method at @{}. "
-                            "Requested IDX {}".format(
-                                off, current_method.get_code_off(), idx_meth
-                            )
-                        )
-                        continue
+                if op_value == 0x1C:
+                    cur_meth.add_xref_const_class(oth_cls, off)
+                    oth_cls.add_xref_const_class(cur_meth, off)
+                if op_value == 0x22:
+                    cur_meth.add_xref_new_instance(oth_cls, off)
+                    oth_cls.add_xref_new_instance(cur_meth, off)
 
-                    class_info = method_info[0].lstrip('[')
-                    if class_info[0] != 'L':
-                        # Need to make sure, that we get class types and not other types
-                        # If another type, like int is used, we simply skip it.
-                        continue
+            # 2) method calls: invoke-* (0x6e ... 0x72), invoke-xxx/range (0x74 ... 0x78)
+            elif (0x6E <= op_value <= 0x72) or (0x74 <= op_value <= 0x78):
+                class_info, method_name, method_descriptor = ref
 
-                    # Resolve the second MethodAnalysis
-                    oth_meth = self._resolve_method(
-                        class_info, method_info[1], method_info[2]
-                    )
+                # Resolve the second MethodAnalysis
+                oth_meth = self._resolve_method(
+                    class_info, method_name, method_descriptor
+                )
 
-                    oth_cls = self.classes[class_info]
+                oth_cls = self.classes[class_info]
 
-                    # FIXME: we could merge add_method_xref_* and add_xref_*
-                    cur_cls.add_method_xref_to(
-                        cur_meth, oth_cls, oth_meth, off
-                    )
-                    oth_cls.add_method_xref_from(
-                        oth_meth, cur_cls, cur_meth, off
-                    )
-                    # Internal xref related to class manipulation
-                    cur_cls.add_xref_to(
-                        REF_TYPE(op_value), oth_cls, oth_meth, off
-                    )
-                    oth_cls.add_xref_from(
-                        REF_TYPE(op_value), cur_cls, cur_meth, off
+                if self.xref_store is not None:
+                    self.xref_store.add_call(
+                        REF_TYPE(op_value),
+                        cur_cls,
+                        cur_cls._get_or_add_method(cur_meth),
+                        oth_cls,
+                        oth_cls._get_or_add_method(oth_meth),
+                        off,
                     )
+                    continue
+
+                # FIXME: we could merge add_method_xref_* and add_xref_*
+                cur_cls.add_method_xref_to(cur_meth, oth_cls, oth_meth, off)
+                oth_cls.add_method_xref_from(oth_meth, cur_cls, cur_meth, off)
+                # Internal xref related to class manipulation
+                cur_cls.add_xref_to(REF_TYPE(op_value), oth_cls, oth_meth, off)
+                oth_cls.add_xref_from(
+                    REF_TYPE(op_value), cur_cls, cur_meth, off
+                )
 
-                # 3) check for string usage: const-string (0x1a), const-string/jumbo (0x1b)
-                elif 0x1A <= op_value <= 0x1B:
-                    string_value = instruction.cm.vm.get_cm_string(
-                        instruction.get_ref_kind()
-                    )
-                    if string_value not in self.strings:
-                        self.strings[string_value] = StringAnalysis(
-                            string_value
-                        )
+            # 3) string usage: const-string (0x1a), const-string/jumbo (0x1b)
+            elif 0x1A <= op_value <= 0x1B:
+                if ref not in self.strings:
+                    self.strings[ref] = StringAnalysis(ref, self.xref_store)
 
-                    self.strings[string_value].add_xref_from(
-                        cur_cls, cur_meth, off
+                if self.xref_store is not None:
+                    self.xref_store.add_string(
+                        cur_cls, cur_meth, self.strings[ref], off
                     )
+                else:
+                    self.strings[ref].add_xref_from(cur_cls, cur_meth, off)
 
-                # TODO maybe we should add a step 3a) here and check for all const fields. You can then xref for integers etc!
-                # But: This does not work, as const fields are usually optimized internally to const calls...
+            # 4) field usage: i*op (0x52 ... 0x5f), s*op (0x60 ... 0x6d)
+            elif 0x52 <= op_value <= 0x6D:
+                field_item = vm.get_encoded_field_descriptor(*ref)
+                if not field_item:
+                    continue
 
-                # 4) check for field usage: i*op (0x52 ... 0x5f), s*op (0x60 ... 0x6d)
-                elif 0x52 <= op_value <= 0x6D:
-                    idx_field = instruction.get_ref_kind()
-                    field_info = instruction.cm.vm.get_cm_field(idx_field)
-                    field_item = (
-                        instruction.cm.vm.get_encoded_field_descriptor(
-                            field_info[0], field_info[2], field_info[1]
-                        )
+                is_read = (0x52 <= op_value <= 0x58) or (
+                    0x60 <= op_value <= 0x66
+                )
+
+                if self.xref_store is not None:
+                    self.xref_store.add_field(
+                        not is_read,
+                        cur_cls,
+                        cur_meth,
+                        cur_cls._get_or_add_field(field_item),
+                        off,
                     )
-                    if not field_item:
-                        continue
-
-                    if (0x52 <= op_value <= 0x58) or (
-                        0x60 <= op_value <= 0x66
-                    ):
-                        # read access to a field
-                        self.classes[cur_cls_name].add_field_xref_read(
-                            cur_meth, cur_cls, field_item, off
-                        )
-                        cur_meth.add_xref_read(cur_cls, field_item, off)
-                    else:
-                        # write access to a field
-                        self.classes[cur_cls_name].add_field_xref_write(
-                            cur_meth, cur_cls, field_item, off
-                        )
-                        cur_meth.add_xref_write(cur_cls, field_item, off)
+                elif is_read:
+                    # read access to a field
+                    cur_cls.add_field_xref_read(
+                        cur_meth, cur_cls, field_item, off
+                    )
+                    cur_meth.add_xref_read(cur_cls, field_item, off)
+                else:
+                    # write access to a field
+                    cur_cls.add_field_xref_write(
+                        cur_meth, cur_cls, field_item, off
+                    )
+                    cur_meth.add_xref_write(cur_cls, field_item, off)
 
     def get_method(
         self, method: dex.EncodedMethod
@@ -1996,14 +2920,14 @@ class Analysis:
             if class_name not in self.classes:
                 # External class? no problem!
                 self.classes[class_name] = ClassAnalysis(
-                    ExternalClass(class_name)
+                    ExternalClass(class_name), self.xref_store
                 )
 
             # Create external method
             meth = ExternalMethod(
                 class_name, method_name, ''.join(method_descriptor)
             )
-            meth_analysis = MethodAnalysis(None, meth)
+            meth_analysis = MethodAnalysis(None, meth, self.xref_store)
 
             # add to all the collections we have
             self.__method_hashes[m_hash] = meth_analysis
@@ -2170,6 +3094,49 @@ class Analysis:
             for f in c.get_fields():
                 yield f
 
+    def _get_query_index(self, kind: str) -> tuple[NameIndex, list]:
+        """
+        Return the [NameIndex][androguard.core.analysis.analysis.NameIndex]
+        used by the find_* methods and the list of the indexed objects.
+
+        The indexes are built on first use and dropped by
+        [add][androguard.core.analysis.analysis.Analysis.add] and
+        [create_xref][androguard.core.analysis.analysis.Analysis.create_xref],
+        which add and replace classes, methods and strings.
+
+        :param kind: one of `classes`, `methods` or `strings`
+        :returns: a tuple of the `NameIndex` and the list of objects
+        """
+        if kind in self.__query_indexes:
+            return self.__query_indexes[kind]
+
+        if kind == "classes":
+            names = list(self.classes.keys())
+            objs = list(self.classes.values())
+        elif kind == "methods":
+            # the methods are stored together with the name of their class
+            objs = [
+                (cname, m)
+                for cname, c in self.classes.items()
+                for m in c.get_methods()
+            ]
+            names = [m.get_method().get_name() for _, m in objs]
+        elif kind == "strings":
+            names = list(self.strings.keys())
+            objs = list(self.strings.values())
+        else:
+            raise ValueError("Unknown index '{}'".format(kind))
+
+        index = NameIndex(names)
+        self.__query_indexes[kind] = (index, objs)
+        return index, objs
+
+    def _find_classes_items(
+        self, name: str
+    ) -> list[tuple[str, ClassAnalysis]]:
+        index, classes = self._get_query_index("classes")
+        return [(index.names[i], classes[i]) for i in index.find(name)]
+
     def find_classes(
         self, name: str = ".*", no_external: bool = False
     ) -> Iterator[ClassAnalysis]:
@@ -2178,15 +3145,17 @@ class Analysis:
         This method will return all [ClassAnalysis][androguard.core.analysis.analysis.ClassAnalysis] Object that match the name of
         the class.
 
+        Patterns starting with a literal text, like `Landroid/app/`,
+        are answered from an index of the class names.
+
         :param name: regular expression for class name (default ".*")
         :param no_external: Remove external classes from the output (default False)
         :returns: generator of `ClassAnalysis` objects
         """
-        for cname, c in self.classes.items():
+        for cname, c in self._find_classes_items(name):
             if no_external and isinstance(c.get_vm_class(), ExternalClass):
                 continue
-            if re.match(name, cname):
-                yield c
+            yield c
 
     def find_methods(
         self,
@@ -2201,6 +3170,9 @@ class Analysis:
         This method will return all [MethodAnalysis][androguard.core.analysis.analysis.MethodAnalysis] objects, which match the
         classname, methodname, descriptor and accessflags of the method.
 
+        Patterns for the classname or methodname starting with a literal
+        text are answered from an index of the class or method names.
+
         :param classname: regular expression for the classname
         :param methodname: regular expression for the method name
         :param descriptor: regular expression for the descriptor
@@ -2208,36 +3180,55 @@ class Analysis:
         :param no_external: Remove external method from the output (default False)
         :returns: generator of `MethodAnalysis` objects
         """
-        for cname, c in self.classes.items():
-            if re.match(classname, cname):
-                for m in c.get_methods():
-                    z = m.get_method()
-
-                    # TODO is it even possible that an internal class has
-                    # external methods? Maybe we should check for ExternalClass
-                    # instead...
-                    # Above: Yes, it is possible.  Internal classes that inherit from
-                    # an External class and call inherited methods will show as
-                    # external calls
-                    if no_external and isinstance(z, ExternalMethod):
-                        continue
-                    if (
-                        re.match(methodname, z.get_name())
-                        and re.match(descriptor, z.get_descriptor())
-                        and re.match(accessflags, z.get_access_flags_string())
-                    ):
-                        yield m
+        if _literal_prefix(classname) or not _literal_prefix(methodname):
+            candidates = (
+                (cname, m)
+                for cname, c in self._find_classes_items(classname)
+                for m in c.get_methods()
+            )
+        else:
+            index, methods = self._get_query_index("methods")
+            class_prog = _compile(classname)
+            candidates = (
+                methods[i]
+                for i in index.find(methodname)
+                if class_prog.match(methods[i][0])
+            )
+
+        method_prog = _compile(methodname)
+        descriptor_prog = _compile(descriptor)
+        accessflags_prog = _compile(accessflags)
+        for cname, m in candidates:
+            z = m.get_method()
+
+            # TODO is it even possible that an internal class has
+            # external methods? Maybe we should check for ExternalClass
+            # instead...
+            # Above: Yes, it is possible.  Internal classes that inherit from
+            # an External class and call inherited methods will show as
+            # external calls
+            if no_external and isinstance(z, ExternalMethod):
+                continue
+            if (
+                method_prog.match(z.get_name())
+                and descriptor_prog.match(z.get_descriptor())
+                and accessflags_prog.match(z.get_access_flags_string())
+            ):
+                yield m
 
     def find_strings(self, string: str = ".*") -> Iterator[StringAnalysis]:
         """
         Find strings by regex
 
+        Patterns starting with a literal text are answered from an index
+        of the strings.
+
         :param string: regular expression for the string to search for
         :returns: generator of `StringAnalysis` objects
         """
-        for s, sa in self.strings.items():
-            if re.match(string, s):
-                yield sa
+        index, strings = self._get_query_index("strings")
+        for i in index.find(string):
+            yield strings[i]
 
     def find_fields(
         self,
@@ -2255,16 +3246,18 @@ class Analysis:
         :param accessflags: regular expression of the access flags
         :returns: generator of `FieldAnalysis`
         """
-        for cname, c in self.classes.items():
-            if re.match(classname, cname):
-                for f in c.get_fields():
-                    z = f.get_field()
-                    if (
-                        re.match(fieldname, z.get_name())
-                        and re.match(fieldtype, z.get_descriptor())
-                        and re.match(accessflags, z.get_access_flags_string())
-                    ):
-                        yield f
+        field_prog = _compile(fieldname)
+        fieldtype_prog = _compile(fieldtype)
+        accessflags_prog = _compile(accessflags)
+        for cname, c in self._find_classes_items(classname):
+            for f in c.get_fields():
+                z = f.get_field()
+                if (
+                    field_prog.match(z.get_name())
+                    and fieldtype_prog.match(z.get_descriptor())
+                    and accessflags_prog.match(z.get_access_flags_string())
+                ):
+                    yield f
 
     def __repr__(self):
         return "<analysis.Analysis VMs: {}, Classes: {}, Methods: {}, Strings: {}>".format(
@@ -2467,7 +3460,7 @@ class Analysis:
             for meth_analysis in cls.get_methods():
                 meth = meth_analysis.get_method()
                 if meth.permission_api_name in permmap:
-                    yield meth_analysis, permmap[meth.permission_api_name]
+                    yield meth_analysis, list(permmap[meth.permission_api_name])
 
     def get_permission_usage(
         self, permission: str, apilevel: Union[str, int, None] = None
@@ -2495,7 +3488,7 @@ class Analysis:
 
         # TODO maybe have the API level loading in the __init__ method and pass the APK as well?
         permmap = load_api_specific_resource_module(
-            'api_permission_mappings', apilevel
+            'permission_api_mappings', apilevel
         )
         if not permmap:
             raise ValueError(
@@ -2503,7 +3496,7 @@ class Analysis:
                 "The requested API level was '{}'".format(apilevel)
             )
 
-        apis = {k for k, v in permmap.items() if permission in v}
+        apis = permmap.get(permission)
         if not apis:
             raise ValueError(
                 "No API methods could be found which use the permission. "
@@ -2531,6 +3524,137 @@ class Analysis:
                     yield meth_analysis
 
 
+def _scan_class_xref(
+    current_class: dex.ClassDefItem,
+) -> list[tuple[int, int, int, object]]:
+    """
+    Collect all references of the methods in `current_class`.
+
+    This does not touch any *Analysis Objects, which makes it possible to
+    run it in a worker process.
+    Each reference is a tuple of `(method index, opcode, offset, reference)`,
+    where the method index is the position in `current_class.get_methods()`
+    and the reference depends on the opcode:
+
+    * const-class and new-instance: the type name
+    * invoke-*: a tuple of class name, method name and descriptor
+    * const-string: the string
+    * i*op and s*op: a tuple of class name, field name and descriptor
+
+    :param current_class: The class to collect the references for
+    :returns: the list of references
+    """
+    cur_cls_name = current_class.get_name()
+    refs = []
+
+    logger.debug(
+        "Creating XREF/DREF for class at @0x{:08x}".format(
+            current_class.get_class_data_off()
+        )
+    )
+    for meth_idx, current_method in enumerate(current_class.get_methods()):
+        logger.debug(
+            "Creating XREF for method at @0x{:08x}".format(
+                current_method.get_code_off()
+            )
+        )
+
+        for off, instruction in current_method.get_instructions_idx():
+            op_value = instruction.get_op_value()
+
+            # 1) check for class calls: const-class (0x1c), new-instance (0x22)
+            if op_value in [0x1C, 0x22]:
+                idx_type = instruction.get_ref_kind()
+                # type_info is the string like 'Ljava/lang/Object;'
+                type_info = instruction.cm.vm.get_cm_type(idx_type).lstrip('[')
+                if type_info[0] != 'L':
+                    # Need to make sure, that we get class types and not other types
+                    continue
+
+                if type_info == cur_cls_name:
+                    # FIXME: effectively ignoring calls to itself - do we want that?
+                    continue
+
+                refs.append((meth_idx, op_value, off, type_info))
+
+            # 2) check for method calls: invoke-* (0x6e ... 0x72), invoke-xxx/range (0x74 ... 0x78)
+            elif (0x6E <= op_value <= 0x72) or (0x74 <= op_value <= 0x78):
+                idx_meth = instruction.get_ref_kind()
+                method_info = instruction.cm.vm.get_cm_method(idx_meth)
+                if not method_info:
+                    logger.warning(
+                        "Could not get method_info "
+                        "for instruction at {} in method at @{}. "
+                        "Requested IDX {}".format(
+                            off, current_method.get_code_off(), idx_meth
+                        )
+                    )
+                    continue
+
+                class_info = method_info[0].lstrip('[')
+                if class_info[0] != 'L':
+                    # Need to make sure, that we get class types and not other types
+                    # If another type, like int is used, we simply skip it.
+                    continue
+
+                refs.append(
+                    (
+                        meth_idx,
+                        op_value,
+                        off,
+                        (class_info, method_info[1], method_info[2]),
+                    )
+                )
+
+            # 3) check for string usage: const-string (0x1a), const-string/jumbo (0x1b)
+            elif 0x1A <= op_value <= 0x1B:
+                string_value = instruction.cm.vm.get_cm_string(
+                    instruction.get_ref_kind()
+                )
+                refs.append((meth_idx, op_value, off, string_value))
+
+            # TODO maybe we should add a step 3a) here and check for all const fields. You can then xref for integers etc!
+            # But: This does not work, as const fields are usually optimized internally to const calls...
+
+            # 4) check for field usage: i*op (0x52 ... 0x5f), s*op (0x60 ... 0x6d)
+            elif 0x52 <= op_value <= 0x6D:
+                idx_field = instruction.get_ref_kind()
+                field_info = instruction.cm.vm.get_cm_field(idx_field)
+                refs.append(
+                    (
+                        meth_idx,
+                        op_value,
+                        off,
+                        (field_info[0], field_info[2], field_info[1]),
+                    )
+                )
+
+    return refs
+
+
+# DEX objects of the Analysis, inherited by the forked XREF workers
+_xref_worker_vms = None
+
+
+def _init_xref_worker(vms: list[dex.DEX]) -> None:
+    global _xref_worker_vms
+    _xref_worker_vms = vms
+
+
+def _scan_xref_shard(
+    shard: tuple[int, int, int],
+) -> list[list[tuple[int, int, int, object]]]:
+    """
+    Worker function of the parallel XREF creation.
+
+    :param shard: tuple of DEX index, first and last (exclusive) class index
+    :returns: the references of each class in the shard
+    """
+    vm_idx, start, end = shard
+    classes = _xref_worker_vms[vm_idx].get_classes()[start:end]
+    return [_scan_class_xref(current_class) for current_class in classes]
+
+
 def is_ascii_obfuscation(vm: dex.DEX) -> bool:
     """
     Tests if any class inside a [DEX][androguard.core.dex.DEX]
@@ -0,0 +1,267 @@
+# Allows type hinting of types not-yet-declared
+# in Python >= 3.7
+# see https://peps.python.org/pep-0563/
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Union
+
+from loguru import logger
+
+from androguard.core import dex
+from androguard.core.androconf import ANDROGUARD_VERSION
+
+# Marker for unused string columns of a reference
+NO_STRING = 0xFFFFFFFF
+
+
+class AnalysisCache:
+    """
+    On-disk cache of the cross references of DEX files.
+
+    Building the cross references requires to decode every instruction of
+    every method, which is the most expensive part of an
+    [Analysis][androguard.core.analysis.analysis.Analysis].
+    The cache stores the references collected for each class in a compact
+    binary file, so that
+    [Analysis.create_xref][androguard.core.analysis.analysis.Analysis.create_xref]
+    can rebuild all `*Analysis` objects without touching the bytecode again.
+
+    Entries are keyed by the SHA-1 signature of the
+    [HeaderItem][androguard.core.dex.HeaderItem] and the androguard
+    version, as the collected references might change between versions.
+    The `*Analysis` objects themselves reference the parsed DEX items, hence
+    the DEX file still has to be parsed and added to the `Analysis`.
+
+    The file consists of a header, a table of all referenced strings and
+    one column per field of the references:
+
+    * the index of the class in `DEX.get_classes()`
+    * the index of the method in `ClassDefItem.get_methods()`
+    * the opcode and the offset of the instruction
+    * up to four string indexes, depending on the opcode
+    """
+
+    MAGIC = b"AGXC"
+    FORMAT_VERSION = 1
+    EXTENSION = ".agxc"
+
+    _HEADER = struct.Struct("<4sHH20sIII")
+    _COLUMNS = (
+        ("class_idx", "I"),
+        ("method_idx", "I"),
+        ("op", "B"),
+        ("off", "I"),
+        ("a", "I"),
+        ("b", "I"),
+        ("c", "I"),
+        ("d", "I"),
+    )
+
+    def __init__(self, directory: str) -> None:
+        """
+        :param directory: the directory to store the cache files in, it is created if it does not exist
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, vm: dex.DEX) -> str:
+        """
+        Return the path of the cache file for `vm`
+
+        :param vm: the `DEX` object
+        :returns: the path of the cache file
+        """
+        return os.path.join(
+            self.directory,
+            "{}-{}{}".format(
+                _signature(vm).hex(), ANDROGUARD_VERSION, self.EXTENSION
+            ),
+        )
+
+    def load(
+        self, vm: dex.DEX
+    ) -> Union[list[list[tuple[int, int, int, object]]], None]:
+        """
+        Load the references of all classes of `vm` from the cache.
+
+        :param vm: the `DEX` object
+        :returns: a list containing the references of each class, in the same format as collected by `Analysis.create_xref`, or `None` if there is no valid entry for `vm`
+        """
+        path = self.get_path(vm)
+        try:
+            with open(path, "rb") as fd:
+                buff = fd.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Can not read cache file {}: {}".format(path, e))
+            return None
+
+        try:
+            refs = self._decode(vm, buff)
+        except (ValueError, IndexError, struct.error, UnicodeDecodeError) as e:
+            logger.warning("Invalid cache file {}: {}".format(path, e))
+            return None
+
+        if refs is not None:
+            logger.info("Loaded XREFs from cache {}".format(path))
+        return refs
+
+    def store(
+        self, vm: dex.DEX, refs: list[list[tuple[int, int, int, object]]]
+    ) -> None:
+        """
+        Store the references of all classes of `vm` in the cache.
+
+        The file is written to a temporary file first and then renamed,
+        thus concurrent readers never see a partial file.
+
+        :param vm: the `DEX` object
+        :param refs: a list containing the references of each class of `vm`
+        """
+        path = self.get_path(vm)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(self._encode(vm, refs))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Can not write cache file {}: {}".format(path, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _encode(
+        self, vm: dex.DEX, refs: list[list[tuple[int, int, int, object]]]
+    ) -> bytes:
+        strings = {}
+        columns = {name: array(typecode) for name, typecode in self._COLUMNS}
+
+        def string_idx(value: str) -> int:
+            idx = strings.get(value)
+            if idx is None:
+                idx = strings[value] = len(strings)
+            return idx
+
+        for class_idx, class_refs in enumerate(refs):
+            for method_idx, op, off, ref in class_refs:
+                if isinstance(ref, str):
+                    values = (ref,)
+                elif (0x6E <= op <= 0x72) or (0x74 <= op <= 0x78):
+                    # class name, method name and the descriptor list
+                    values = (ref[0], ref[1], *ref[2])
+                else:
+                    values = ref
+
+                columns["class_idx"].append(class_idx)
+                columns["method_idx"].append(method_idx)
+                columns["op"].append(op)
+                columns["off"].append(off)
+                indexes = [string_idx(value) for value in values]
+                indexes += [NO_STRING] * (4 - len(indexes))
+                for name, idx in zip("abcd", indexes):
+                    columns[name].append(idx)
+
+        encoded = [s.encode("utf-8", "surrogatepass") for s in strings.keys()]
+        lengths = array("I", map(len, encoded))
+
+        parts = [
+            self._HEADER.pack(
+                self.MAGIC,
+                self.FORMAT_VERSION,
+                len(ANDROGUARD_VERSION),
+                _signature(vm),
+                len(refs),
+                len(encoded),
+                len(columns["op"]),
+            ),
+            ANDROGUARD_VERSION.encode("ascii"),
+            _to_le(lengths),
+            b"".join(encoded),
+        ]
+        for name, _ in self._COLUMNS:
+            parts.append(_to_le(columns[name]))
+        return b"".join(parts)
+
+    def _decode(
+        self, vm: dex.DEX, buff: bytes
+    ) -> Union[list[list[tuple[int, int, int, object]]], None]:
+        (
+            magic,
+            format_version,
+            version_size,
+            signature,
+            nb_classes,
+            nb_strings,
+            nb_refs,
+        ) = self._HEADER.unpack_from(buff)
+        off = self._HEADER.size
+        version = buff[off : off + version_size].decode("ascii")
+        off += version_size
+
+        if (
+            magic != self.MAGIC
+            or format_version != self.FORMAT_VERSION
+            or version != ANDROGUARD_VERSION
+        ):
+            logger.debug("Cache file has a different format, ignoring it")
+            return None
+
+        if signature != _signature(vm) or nb_classes != len(vm.get_classes()):
+            logger.debug("Cache file does not belong to this DEX, ignoring it")
+            return None
+
+        lengths, off = _from_le(buff, off, "I", nb_strings)
+        strings = []
+        for length in lengths:
+            end = off + length
+            strings.append(buff[off:end].decode("utf-8", "surrogatepass"))
+            off = end
+
+        columns = {}
+        for name, typecode in self._COLUMNS:
+            columns[name], off = _from_le(buff, off, typecode, nb_refs)
+
+        if off != len(buff):
+            raise ValueError("unexpected size of the cache file")
+
+        refs = [[] for _ in range(nb_classes)]
+        for class_idx, method_idx, op, ins_off, a, b, c, d in zip(
+            *(columns[name] for name, _ in self._COLUMNS)
+        ):
+            if (0x6E <= op <= 0x72) or (0x74 <= op <= 0x78):
+                ref = (strings[a], strings[b], [strings[c], strings[d]])
+            elif 0x52 <= op <= 0x6D:
+                ref = (strings[a], strings[b], strings[c])
+            else:
+                ref = strings[a]
+            refs[class_idx].append((method_idx, op, ins_off, ref))
+        return refs
+
+
+def _signature(vm: dex.DEX) -> bytes:
+    return vm.get_header_item().signature
+
+
+def _to_le(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(
+    buff: bytes, off: int, typecode: str, count: int
+) -> tuple[array, int]:
+    values = array(typecode)
+    end = off + values.itemsize * count
+    if end > len(buff):
+        raise ValueError("truncated cache file")
+    values.frombytes(buff[off:end])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values, end
@@ -10,6 +10,7 @@ from typing import Union
 
 from androguard import __version__
 from androguard.core.api_specific_resources import (
+    load_permission_api_mappings,
     load_permission_mappings,
     load_permissions,
 )
@@ -276,6 +277,7 @@ def load_api_specific_resource_module(
     loader = dict(
         aosp_permissions=load_permissions,
         api_permission_mappings=load_permission_mappings,
+        permission_api_mappings=load_permission_api_mappings,
     )
 
     if resource_name not in loader:
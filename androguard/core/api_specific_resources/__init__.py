@@ -1,15 +1,131 @@
+import functools
 import json
+import marshal
 import os
 import re
+import sys
 from typing import Union
 
 from loguru import logger
 
+_ROOT = os.path.dirname(os.path.realpath(__file__))
+
 
 class APILevelNotFoundError(Exception):
     pass
 
 
+def _get_compiled_path(filename: str) -> Union[str, None]:
+    """
+    Return the path of the compiled form of a JSON resource file, which is
+    stored in `__pycache__` next to it, like compiled python files.
+
+    :param filename: the path of the JSON file
+    :returns: the path or None if the interpreter has no cache tag
+    """
+    tag = sys.implementation.cache_tag
+    if tag is None:
+        return None
+    directory, name = os.path.split(filename)
+    return os.path.join(
+        directory,
+        "__pycache__",
+        "{}.{}.marshal".format(os.path.splitext(name)[0], tag),
+    )
+
+
+def _get_source_stamp(filename: str) -> tuple[int, int]:
+    """
+    Return the size and modification time of a JSON resource file, which
+    is stored in its compiled form to detect a changed JSON file.
+
+    :param filename: the path of the JSON file
+    :returns: tuple of the size and the modification time in nanoseconds
+    """
+    st = os.stat(filename)
+    return st.st_size, st.st_mtime_ns
+
+
+@functools.lru_cache(maxsize=None)
+def _load_resource(filename: str) -> dict:
+    """
+    Load a JSON resource file, or its compiled form if it was compiled
+    from the current JSON file.
+
+    The result is cached for the whole process and shared between all
+    callers, thus it must not be modified nor be returned to the user.
+
+    :param filename: the path of the JSON file
+    :returns: the content of the file
+    """
+    compiled = _get_compiled_path(filename)
+    if compiled:
+        try:
+            with open(compiled, "rb") as fp:
+                stamp, data = marshal.load(fp)
+            if tuple(stamp) == _get_source_stamp(filename):
+                return data
+            logger.debug("{} is outdated, ignoring it".format(compiled))
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    with open(filename, "r") as fp:
+        return json.load(fp)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_levels(directory: str) -> tuple[int, ...]:
+    levels = filter(
+        lambda x: re.match(r'^permissions_\d+\.json$', x),
+        os.listdir(os.path.join(_ROOT, directory)),
+    )
+    return tuple(map(lambda x: int(x[:-5].split('_')[1]), levels))
+
+
+def compile_resources() -> list[str]:
+    """
+    Write the compiled form of all resource files.
+
+    The compiled files are read much faster than the JSON files, which
+    speeds up the first load of a resource in every new process, for
+    example in the workers of the [BatchScanner][androguard.batch.BatchScanner].
+    They are used automatically, as long as they were written by the same
+    python version and the size and modification time of the JSON file,
+    which are stored in the compiled file, did not change.
+
+    The files are written into the installation directory of androguard,
+    run `androguard compile-resources` once after installing or upgrading
+    androguard.
+
+    :raises OSError: if the files can not be written
+    :returns: the list of written files
+    """
+    written = []
+    for directory in ("aosp_permissions", "api_permission_mappings"):
+        for level in sorted(_get_levels(directory)):
+            filename = os.path.join(
+                _ROOT, directory, "permissions_{}.json".format(level)
+            )
+            compiled = _get_compiled_path(filename)
+            if compiled is None:
+                return written
+
+            stamp = _get_source_stamp(filename)
+            with open(filename, "r") as fp:
+                data = json.load(fp)
+            os.makedirs(os.path.dirname(compiled), exist_ok=True)
+            # write to a temporary file first, so other processes never
+            # read a partially written file
+            tmp = "{}.{}".format(compiled, os.getpid())
+            with open(tmp, "wb") as fp:
+                marshal.dump((stamp, data), fp)
+            os.replace(tmp, compiled)
+            written.append(compiled)
+
+    _load_resource.cache_clear()
+    return written
+
+
 def load_permissions(
     apilevel: Union[str, int], permtype: str = 'permissions'
 ) -> dict[str, dict[str, str]]:
@@ -26,6 +142,10 @@ def load_permissions(
     the lower level is returned. For example, if 5,6,7,10 is available and 8 is
     requested, 7 is returned instead.
 
+    The lists are loaded only once per process. Each call returns a new
+    dictionary, but the permission infos in it are shared and must not be
+    modified.
+
     :param apilevel:  integer value of the API level
     :param permtype: either load permissions (`'permissions'`) or
     permission groups (`'groups'`)
@@ -38,16 +158,7 @@ def load_permissions(
     # Usually apilevel is supplied as string...
     apilevel = int(apilevel)
 
-    root = os.path.dirname(os.path.realpath(__file__))
-    permissions_file = os.path.join(
-        root, "aosp_permissions", "permissions_{}.json".format(apilevel)
-    )
-
-    levels = filter(
-        lambda x: re.match(r'^permissions_\d+\.json$', x),
-        os.listdir(os.path.join(root, "aosp_permissions")),
-    )
-    levels = list(map(lambda x: int(x[:-5].split('_')[1]), levels))
+    levels = _get_levels("aosp_permissions")
 
     if not levels:
         logger.error("No Permissions available, can not load!")
@@ -57,7 +168,7 @@ def load_permissions(
         "Available API levels: {}".format(", ".join(map(str, sorted(levels))))
     )
 
-    if not os.path.isfile(permissions_file):
+    if apilevel not in levels:
         if apilevel > max(levels):
             logger.warning(
                 "Requested API level {} is larger than maximum we have, returning API level {} instead.".format(
@@ -82,8 +193,10 @@ def load_permissions(
         )
         return load_permissions(lower_level, permtype)
 
-    with open(permissions_file, "r") as fp:
-        return json.load(fp)[permtype]
+    permissions_file = os.path.join(
+        _ROOT, "aosp_permissions", "permissions_{}.json".format(apilevel)
+    )
+    return dict(_load_resource(permissions_file)[permtype])
 
 
 def load_permission_mappings(
@@ -93,16 +206,47 @@ def load_permission_mappings(
     Load the API/Permission mapping for the requested API level.
     If the requetsed level was not found, None is returned.
 
+    The mappings are loaded only once per process. Each call returns a new
+    dictionary, but the lists of permissions in it are shared and must not
+    be modified.
+
     :param apilevel: integer value of the API level, i.e. 24 for Android 7.0
     :return: a dictionary of {MethodSignature: [List of Permissions]}
     """
-    root = os.path.dirname(os.path.realpath(__file__))
     permissions_file = os.path.join(
-        root, "api_permission_mappings", "permissions_{}.json".format(apilevel)
+        _ROOT,
+        "api_permission_mappings",
+        "permissions_{}.json".format(apilevel),
     )
 
     if not os.path.isfile(permissions_file):
         return {}
 
-    with open(permissions_file, "r") as fp:
-        return json.load(fp)
+    return dict(_load_resource(permissions_file))
+
+
+@functools.lru_cache(maxsize=None)
+def _invert_permission_mappings(
+    apilevel: Union[str, int]
+) -> dict[str, frozenset[str]]:
+    apis = {}
+    for api, permissions in load_permission_mappings(apilevel).items():
+        for permission in permissions:
+            apis.setdefault(permission, set()).add(api)
+    return {k: frozenset(v) for k, v in apis.items()}
+
+
+def load_permission_api_mappings(
+    apilevel: Union[str, int]
+) -> dict[str, frozenset[str]]:
+    """
+    Load the inverted API/Permission mapping for the requested API level,
+    see [load_permission_mappings][androguard.core.api_specific_resources.load_permission_mappings].
+
+    The inverted mapping is computed only once per process, each call
+    returns a new dictionary.
+
+    :param apilevel: integer value of the API level, i.e. 24 for Android 7.0
+    :return: a dictionary of {Permission: set of MethodSignatures}
+    """
+    return dict(_invert_permission_mappings(apilevel))
@@ -8,12 +8,13 @@ from __future__ import annotations
 import binascii
 import hashlib
 import io
+import mmap
 import os
 import re
 import unicodedata
 import zipfile
 from hashlib import md5, sha1, sha224, sha256, sha384, sha512
-from struct import unpack
+from struct import unpack, unpack_from
 from typing import Any, Iterator, List, Tuple, Union
 from xml.dom.pulldom import SAX2DOM
 from zlib import crc32
@@ -147,6 +148,64 @@ def _dump_digests_or_signatures(digests_or_sigs):
     return infos
 
 
+class _MappedFile(io.RawIOBase):
+    """
+    A read only file object over a memory mapped file.
+
+    Only the pages which are actually read are loaded into memory,
+    hence opening a large file is cheap.
+    """
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as fp:
+            try:
+                self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BrokenAPKError("The file {} is empty".format(filename))
+        self.pos = 0
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.map)
+        if offset < 0:
+            raise ValueError("negative seek position {}".format(offset))
+        self.pos = offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def read(self, size: Union[int, None] = -1) -> bytes:
+        if size is None or size < 0:
+            end = len(self.map)
+        else:
+            end = self.pos + size
+        data = self.map[self.pos : end]
+        self.pos += len(data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.map.close()
+        super().close()
+
+
 class APKV2SignatureBlock:
     def __init__(self, id, is_duplicate_id, data):
         self.id = id
@@ -292,16 +351,320 @@ class APKV3Signer(APKV2Signer):
         )
 
 
+# Constants in ZipFile
+_PK_END_OF_CENTRAL_DIR = b"\x50\x4b\x05\x06"
+_PK_CENTRAL_DIR = b"\x50\x4b\x01\x02"
+_PK_ZIP64_END_OF_CENTRAL_DIR = b"\x50\x4b\x06\x06"
+_PK_ZIP64_END_OF_CENTRAL_DIR_LOCATOR = b"\x50\x4b\x06\x07"
+
+# The End of Central Directory record without the comment
+_EOCD_SIZE = 22
+# The EOCD has to be within the last _EOCD_SIZE bytes and the maximal comment
+_EOCD_SEARCH_SIZE = _EOCD_SIZE + 0xFFFF
+
+# Constants in the APK Signature Block
+APK_SIG_MAGIC = b"APK Sig Block 42"
+APK_SIG_KEY_V2_SIGNATURE = 0x7109871A
+APK_SIG_KEY_V3_SIGNATURE = 0xF05368C0
+APK_SIG_KEY_V31_SIGNATURE = 0x1B93AD61
+
+
+def find_central_directory(
+    f: io.RawIOBase,
+) -> Union[tuple[int, int], None]:
+    """
+    Locate the central directory of a ZIP file using its End of Central
+    Directory (EOCD) record.
+
+    The EOCD is searched in the last 64 KiB of the file, the maximal size of
+    the EOCD including its comment. If several EOCD signatures are found
+    there, the one whose comment ends exactly at the end of the file is
+    used, otherwise the last one. Files with more data appended after
+    the EOCD are searched backwards in chunks.
+    ZIP64 archives are supported.
+
+    :param f: a seekable file object of the ZIP file
+    :returns: a tuple of the offset and the size of the central directory, or None if no EOCD was found
+    """
+    file_size = f.seek(0, io.SEEK_END)
+    tail_start = max(0, file_size - _EOCD_SEARCH_SIZE)
+    f.seek(tail_start)
+    tail = f.read(file_size - tail_start)
+
+    eocd = None
+    pos = tail.rfind(_PK_END_OF_CENTRAL_DIR, 0, len(tail) - _EOCD_SIZE + 4)
+    while pos >= 0:
+        if eocd is None:
+            eocd = tail_start + pos
+        (comment_length,) = unpack_from('<H', tail, pos + 20)
+        if pos + _EOCD_SIZE + comment_length == len(tail):
+            eocd = tail_start + pos
+            break
+        pos = tail.rfind(_PK_END_OF_CENTRAL_DIR, 0, pos)
+
+    # The chunks overlap by 3 bytes to find signatures on the boundaries
+    end = tail_start + 3
+    while eocd is None and end > 3:
+        start = max(0, end - _EOCD_SEARCH_SIZE)
+        f.seek(start)
+        pos = f.read(end - start).rfind(_PK_END_OF_CENTRAL_DIR)
+        if pos >= 0:
+            eocd = start + pos
+        end = start + 3
+
+    if eocd is None:
+        return None
+
+    f.seek(eocd + 4)
+    (
+        this_disk,
+        disk_central,
+        this_entries,
+        total_entries,
+        size_central,
+        offset_central,
+    ) = unpack('<HHHHII', f.read(16))
+
+    # These things should not happen for APKs
+    if this_disk != 0 or disk_central != 0:
+        logger.warning(
+            "This is a multi disk ZIP! Attempting to process its signature anyway!"
+        )
+
+    if 0xFFFFFFFF in (size_central, offset_central) and eocd >= 20:
+        # The values are stored in the ZIP64 EOCD, which is found
+        # by the locator right before the EOCD
+        f.seek(eocd - 20)
+        signature, _, zip64_eocd, _ = unpack('<4sIQI', f.read(20))
+        if signature == _PK_ZIP64_END_OF_CENTRAL_DIR_LOCATOR:
+            f.seek(zip64_eocd)
+            record = f.read(56)
+            if len(record) == 56 and record[:4] == _PK_ZIP64_END_OF_CENTRAL_DIR:
+                size_central, offset_central = unpack_from('<QQ', record, 40)
+
+    return offset_central, size_central
+
+
+def parse_apk_signing_block(
+    f: io.RawIOBase,
+) -> Union[list[APKV2SignatureBlock], None]:
+    """
+    Parse the APK Signing Block, which holds the v2, v3 and v3.1 signatures.
+
+    The APK Signing Block is located right before the central directory.
+    All ID-value pairs are returned in the order of the file, pairs with an
+    ID which was already seen are marked as duplicates.
+
+    This function only needs a file object, thus it can be used without
+    creating an [APK][androguard.core.apk.APK] object:
+
+        >>> with open("app.apk", "rb") as f:
+        >>>     blocks = parse_apk_signing_block(f)
+        >>> v2 = [b for b in blocks if b.id == APK_SIG_KEY_V2_SIGNATURE]
+        >>> signers = parse_signers(v2[0].data)
+
+    :param f: a seekable file object of the APK
+    :raises BrokenAPKError: if the central directory or the APK Signing Block is broken
+    :returns: the list of `APKV2SignatureBlock`, an empty list if the APK has no APK Signing Block or None if the file is no ZIP file
+    """
+    # Need to find an v2 Block in the APK.
+    # The Google Docs gives you the following rule:
+    # * go to the end of the ZIP File
+    # * search for the End of Central directory
+    # * then jump to the beginning of the central directory
+    # * Read now the magic of the signing block
+    # * before the magic there is the size_of_block, so we can jump to
+    # the beginning.
+    # * There should be again the size_of_block
+    # * Now we can read the Key-Values
+    # * IDs with an unknown value should be ignored.
+    central = find_central_directory(f)
+    if central is None or not central[0]:
+        return None
+    offset_central = central[0]
+
+    f.seek(offset_central)
+    if f.read(4) != _PK_CENTRAL_DIR:
+        raise BrokenAPKError("No Central Dir at specified offset")
+
+    if offset_central < 24:
+        return []
+    # Go back and check if we have a magic
+    f.seek(offset_central - 24)
+    size_of_block, magic = unpack('<Q16s', f.read(24))
+    if magic != APK_SIG_MAGIC:
+        return []
+
+    # go back size_of_blocks + 8 and read size_of_block again
+    block_start = offset_central - size_of_block - 8
+    if block_start < 0:
+        raise BrokenAPKError("Size of the APK Signing Block is too large!")
+    f.seek(block_start)
+    (size_of_block_start,) = unpack("<Q", f.read(8))
+    if size_of_block_start != size_of_block:
+        raise BrokenAPKError("Sizes at beginning and end does not match!")
+
+    # Store all blocks
+    pairs = f.read(size_of_block - 24)
+    blocks = []
+    seen = set()
+    pos = 0
+    while pos < len(pairs):
+        size, key = unpack_from('<QI', pairs, pos)
+        value = pairs[pos + 12 : pos + 8 + size]
+        pos += 8 + size
+
+        is_duplicate_id = key in seen
+        if is_duplicate_id:
+            logger.warning(
+                "Duplicate block ID in APK Signing Block: {}".format(key)
+            )
+        seen.add(key)
+        blocks.append(APKV2SignatureBlock(key, is_duplicate_id, value))
+    return blocks
+
+
+def _read_uint32_le(io_stream) -> int:
+    (value,) = unpack('<I', io_stream.read(4))
+    return value
+
+
+def _parse_signatures_or_digests(
+    digest_bytes: bytes,
+) -> list[tuple[int, bytes]]:
+    if not len(digest_bytes):
+        return []
+
+    digests = []
+    block = io.BytesIO(digest_bytes)
+
+    data_len = _read_uint32_le(block)
+    while block.tell() < data_len:
+
+        algorithm_id = _read_uint32_le(block)
+        digest_len = _read_uint32_le(block)
+        digest = block.read(digest_len)
+
+        digests.append((algorithm_id, digest))
+
+    return digests
+
+
+def parse_signers(
+    block_bytes: bytes, v3: bool = False
+) -> list[Union[APKV2Signer, APKV3Signer]]:
+    """
+    Parse the signers of a v2, v3 or v3.1 signature block.
+
+    v3 and v3.1 signature blocks are structurally identical, they only
+    differ from v2 blocks by the additional SDK versions.
+
+    :param block_bytes: the value of the signature block, see [parse_apk_signing_block][androguard.core.apk.parse_apk_signing_block]
+    :param v3: parse a v3 or v3.1 block instead of a v2 block (default: `False`)
+    :raises BrokenAPKError: if the size of the block is wrong
+    :returns: the list of `APKV2Signer` or `APKV3Signer`
+    """
+    block = io.BytesIO(block_bytes)
+    view = block.getvalue()
+
+    # V2 and V3 signature Block data format:
+    #
+    # * signer:
+    #    * signed data:
+    #        * digests:
+    #            * signature algorithm ID (uint32)
+    #            * digest (length-prefixed)
+    #        * certificates
+    #        * minSDK (V3 only)
+    #        * maxSDK (V3 only)
+    #        * additional attributes
+    #    * minSDK (V3 only)
+    #    * maxSDK (V3 only)
+    #    * signatures
+    #    * publickey
+    size_sequence = _read_uint32_le(block)
+    if size_sequence + 4 != len(block_bytes):
+        raise BrokenAPKError("size of sequence and blocksize does not match")
+
+    signers = []
+    while block.tell() < len(block_bytes):
+        off_signer = block.tell()
+        size_signer = _read_uint32_le(block)
+
+        # read whole signed data, since we might to parse
+        # content within the signed data, and mess up offset
+        len_signed_data = _read_uint32_le(block)
+        signed_data_bytes = block.read(len_signed_data)
+        signed_data = io.BytesIO(signed_data_bytes)
+
+        # Digests
+        len_digests = _read_uint32_le(signed_data)
+        raw_digests = signed_data.read(len_digests)
+        digests = _parse_signatures_or_digests(raw_digests)
+
+        # Certs
+        certs = []
+        len_certs = _read_uint32_le(signed_data)
+        start_certs = signed_data.tell()
+        while signed_data.tell() < start_certs + len_certs:
+            len_cert = _read_uint32_le(signed_data)
+            cert = signed_data.read(len_cert)
+            certs.append(cert)
+
+        if v3:
+            signed_data_object = APKV3SignedData()
+            # versions
+            signed_data_object.minSDK = _read_uint32_le(signed_data)
+            signed_data_object.maxSDK = _read_uint32_le(signed_data)
+        else:
+            signed_data_object = APKV2SignedData()
+
+        # Additional attributes
+        len_attr = _read_uint32_le(signed_data)
+        attributes = signed_data.read(len_attr)
+
+        signed_data_object._bytes = signed_data_bytes
+        signed_data_object.digests = digests
+        signed_data_object.certificates = certs
+        signed_data_object.additional_attributes = attributes
+
+        if v3:
+            signer = APKV3Signer()
+            # versions (should be the same as signed data's versions)
+            signer.minSDK = _read_uint32_le(block)
+            signer.maxSDK = _read_uint32_le(block)
+        else:
+            signer = APKV2Signer()
+
+        # Signatures
+        len_sigs = _read_uint32_le(block)
+        raw_sigs = block.read(len_sigs)
+        sigs = _parse_signatures_or_digests(raw_sigs)
+
+        # PublicKey
+        len_publickey = _read_uint32_le(block)
+        publickey = block.read(len_publickey)
+
+        signer._bytes = view[off_signer : off_signer + size_signer]
+        signer.signed_data = signed_data_object
+        signer.signatures = sigs
+        signer.public_key = publickey
+
+        signers.append(signer)
+
+    return signers
+
+
 class APK:
     # Constants in ZipFile
-    _PK_END_OF_CENTRAL_DIR = b"\x50\x4b\x05\x06"
-    _PK_CENTRAL_DIR = b"\x50\x4b\x01\x02"
+    _PK_END_OF_CENTRAL_DIR = _PK_END_OF_CENTRAL_DIR
+    _PK_CENTRAL_DIR = _PK_CENTRAL_DIR
 
     # Constants in the APK Signature Block
-    _APK_SIG_MAGIC = b"APK Sig Block 42"
-    _APK_SIG_KEY_V2_SIGNATURE = 0x7109871A
-    _APK_SIG_KEY_V3_SIGNATURE = 0xF05368C0
-    _APK_SIG_KEY_V31_SIGNATURE = 0x1B93AD61
+    _APK_SIG_MAGIC = APK_SIG_MAGIC
+    _APK_SIG_KEY_V2_SIGNATURE = APK_SIG_KEY_V2_SIGNATURE
+    _APK_SIG_KEY_V3_SIGNATURE = APK_SIG_KEY_V3_SIGNATURE
+    _APK_SIG_KEY_V31_SIGNATURE = APK_SIG_KEY_V31_SIGNATURE
     _APK_SIG_ATTR_V2_STRIPPING_PROTECTION = 0xBEEFF00D
 
     _APK_SIG_ALGO_IDS = {
@@ -323,20 +686,29 @@ class APK:
         magic_file: Union[str, None] = None,
         skip_analysis: bool = False,
         testzip: bool = False,
+        lazy: bool = False,
     ) -> None:
         """
         This class can access to all elements in an APK file
 
+        In lazy mode, the file is memory mapped instead of read into memory.
+        The central directory and the entries are read on demand, thus the
+        memory used is bounded by the largest entry which is read and not by
+        the size of the APK. This is useful for very large APKs.
+        Lazy mode has no effect if `raw` is set.
+
         Examples:
 
             >>> APK("myfile.apk")
             >>> APK(read("myfile.apk"), raw=True)
+            >>> APK("large.apk", lazy=True)
 
         :param filename: specify the path of the file, or raw data
         :param raw: specify if the filename is a path or raw data (optional)
         :param magic_file: specify the magic file (not used anymore - legacy only)
         :param skip_analysis: Skip the analysis, e.g. no manifest files are read. (default: `False`)
         :param testzip: Test the APK for integrity, e.g. if the ZIP file is broken. Throw an exception on failure (default `False`)
+        :param lazy: memory map the file and read the entries on demand (default `False`)
         """
         if magic_file:
             logger.warning(
@@ -359,6 +731,8 @@ class APK:
         self._is_signed_v2 = None
         self._is_signed_v3 = None
         self._v2_blocks = []
+        # The first block of each ID in _v2_blocks
+        self._v2_block_ids = {}
         self._is_signed_v31 = None
         self._v2_signing_data = None
         self._v3_signing_data = None
@@ -367,12 +741,19 @@ class APK:
         self._files = {}
         self.files_crc32 = {}
 
+        # The memory mapped file in lazy mode
+        self._file = None
+
         if raw is True:
             self.__raw = filename
             self._sha256 = hashlib.sha256(self.__raw).hexdigest()
             # Set the filename to something sane
             self.filename = "raw_apk_sha256:{}".format(self._sha256)
             self.zip = ZipEntry.parse(io.BytesIO(self.__raw), True)
+        elif lazy:
+            self.__raw = None
+            self._file = _MappedFile(filename)
+            self.zip = ZipEntry.parse(self._file, True)
         else:
             self.zip = ZipEntry.parse(filename, False)
             self.__raw = self.zip.zip.getvalue()
@@ -388,7 +769,7 @@ class APK:
             # A short benchmark showed, that testing the zip takes about 10 times longer!
             # e.g. normal zip loading (skip_analysis=True) takes about 0.01s, where
             # testzip takes 0.1s!
-            test_zip = zipfile.ZipFile(io.BytesIO(self.__raw), mode="r")
+            test_zip = zipfile.ZipFile(self._get_stream(), mode="r")
             ret = test_zip.testzip()
             if ret is not None:
                 # we could print the filename here, but there are zip which are so broken
@@ -523,11 +904,15 @@ class APK:
 
         :returns: the picklable APK Object without zip.
         """
-        # Upon pickling, we need to remove the ZipFile
-        x = self.__dict__
+        # Upon pickling, we need to remove the ZipFile, from a copy of the
+        # state as the APK is still used afterwards
+        x = dict(self.__dict__)
         x['axml'] = str(x['axml'])
         x['xml'] = str(x['xml'])
         del x['zip']
+        if x['_file'] is not None:
+            # The file is mapped again on loading
+            x['_file'] = True
 
         return x
 
@@ -541,7 +926,12 @@ class APK:
         """
         self.__dict__ = state
 
-        self.zip = zipfile.ZipFile(io.BytesIO(self.get_raw()), mode="r")
+        if state.get('_file'):
+            self._file = _MappedFile(self.filename)
+            self.zip = ZipEntry.parse(self._file, True)
+        else:
+            self._file = None
+            self.zip = zipfile.ZipFile(io.BytesIO(self.get_raw()), mode="r")
 
     def _get_res_string_value(self, string):
         if not string.startswith('@string/'):
@@ -964,9 +1354,14 @@ class APK:
         """
         Return raw bytes of the APK
 
+        In lazy mode, the whole file is read on each call.
+        Use [get_digest][androguard.core.apk.APK.get_digest] to hash the APK without reading it into memory.
+
         :returns: bytes of the APK
         """
 
+        if self._file is not None:
+            return self._file.map[:]
         if self.__raw:
             return self.__raw
         else:
@@ -974,6 +1369,56 @@ class APK:
                 self.__raw = bytearray(f.read())
             return self.__raw
 
+    def _get_stream(self) -> io.RawIOBase:
+        """
+        Return a seekable file object over the whole APK
+
+        :returns: the file object
+        """
+        if self._file is not None:
+            return self._file
+        return io.BytesIO(self.get_raw())
+
+    def get_digest(
+        self,
+        algorithm: str = "sha256",
+        start: int = 0,
+        end: Union[int, None] = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> bytes:
+        """
+        Return the digest of the APK or of a range of it
+
+        The range is hashed in chunks of `chunk_size` bytes,
+        in lazy mode the file is never read into memory as a whole.
+
+        :param algorithm: the name of the hash algorithm as used by `hashlib` (default: `sha256`)
+        :param start: the offset of the first byte to hash (default: 0)
+        :param end: the offset after the last byte to hash (default: None, the end of the file)
+        :param chunk_size: the number of bytes to hash at once (default: 1 MiB)
+        :returns: the digest
+        """
+        h = hashlib.new(algorithm)
+        if self._file is not None:
+            data = self._file.map
+        else:
+            data = self.get_raw()
+        if end is None:
+            end = len(data)
+        with memoryview(data) as view:
+            for offset in range(start, end, chunk_size):
+                h.update(view[offset : min(offset + chunk_size, end)])
+        return h.digest()
+
+    def close(self) -> None:
+        """
+        Close the memory mapped file of an APK opened in lazy mode
+
+        The entries of the APK can not be read anymore afterwards.
+        """
+        if self._file is not None:
+            self._file.close()
+
     def get_file(self, filename: str) -> bytes:
         """
         Return the raw data of the specified filename
@@ -1609,7 +2054,7 @@ class APK:
         l = {}
         for i in self.permissions:
             try:
-                l[i] = self.permission_module[i]
+                l[i] = dict(self.permission_module[i])
             except KeyError:
                 # if we have not found permission do nothing
                 continue
@@ -1775,16 +2220,30 @@ class APK:
 
         # Prior to Android N, Android attempts to verify only the first SignerInfo. From N onwards, Android attempts
         # to verify all SignerInfos and then picks the first verified SignerInfo.
-        min_sdk_version = self.get_min_sdk_version()
-        if (
-            min_sdk_version is None or int(min_sdk_version) < 24
-        ):  # AndroidSdkVersion.N
-            logger.info(
-                f"minSdkVersion: {min_sdk_version} is less than 24. Getting the first signerInfo only!"
-            )
+        # With a single SignerInfo both are the same, thus the minSdkVersion
+        # is only read from the manifest if there are several.
+        min_sdk_version = None
+        if len(signer_infos) == 1:
             unverified_signer_infos_to_try = [signer_infos[0]]
         else:
-            unverified_signer_infos_to_try = signer_infos
+            min_sdk_version = self.get_min_sdk_version()
+            if min_sdk_version is None and not self.xml:
+                # the manifest was not analysed, see skip_analysis
+                try:
+                    min_sdk_version = get_min_sdk_version(
+                        self.get_file("AndroidManifest.xml")
+                    )
+                except FileNotPresent:
+                    pass
+            if (
+                min_sdk_version is None or int(min_sdk_version) < 24
+            ):  # AndroidSdkVersion.N
+                logger.info(
+                    f"minSdkVersion: {min_sdk_version} is less than 24. Getting the first signerInfo only!"
+                )
+                unverified_signer_infos_to_try = [signer_infos[0]]
+            else:
+                unverified_signer_infos_to_try = signer_infos
 
         # Extract certificates from the PKCS7 object
         certificates = signed_data['content']['certificates']
@@ -2244,8 +2703,10 @@ class APK:
                 # There is a rare case, that no resource file is supplied.
                 # Maybe it was added manually, thus we check here
                 return None
+            # Most lookups only need a few resources, thus the entries
+            # are decoded on demand
             self.arsc["resources.arsc"] = ARSCParser(
-                self.zip.read("resources.arsc")
+                self.zip.read("resources.arsc"), lazy=True
             )
             return self.arsc["resources.arsc"]
 
@@ -2318,8 +2779,7 @@ class APK:
         :param io_stream: the stream to get a `uint32_le` from
         :return: the `uint32_le` value
         """
-        (value,) = unpack('<I', io_stream.read(4))
-        return value
+        return _read_uint32_le(io_stream)
 
     def parse_signatures_or_digests(
         self, digest_bytes: bytes
@@ -2329,124 +2789,32 @@ class APK:
         :param digest_bytes: the digests bytes
         :returns: a list of tuple where the first element is the `algorithm_id` and the second is the digest bytes
         """
-        
-        if not len(digest_bytes):
-            return []
-
-        digests = []
-        block = io.BytesIO(digest_bytes)
-
-        data_len = self.read_uint32_le(block)
-        while block.tell() < data_len:
-
-            algorithm_id = self.read_uint32_le(block)
-            digest_len = self.read_uint32_le(block)
-            digest = block.read(digest_len)
-
-            digests.append((algorithm_id, digest))
-
-        return digests
+        return _parse_signatures_or_digests(digest_bytes)
 
     def parse_v2_v3_signature(self) -> None:
-        # Need to find an v2 Block in the APK.
-        # The Google Docs gives you the following rule:
-        # * go to the end of the ZIP File
-        # * search for the End of Central directory
-        # * then jump to the beginning of the central directory
-        # * Read now the magic of the signing block
-        # * before the magic there is the size_of_block, so we can jump to
-        # the beginning.
-        # * There should be again the size_of_block
-        # * Now we can read the Key-Values
-        # * IDs with an unknown value should be ignored.
-        f = io.BytesIO(self.get_raw())
-
-        size_central = None
-        offset_central = None
-
-        # Go to the end
-        f.seek(-1, io.SEEK_END)
-        # we know the minimal length for the central dir is 16+4+2
-        f.seek(-20, io.SEEK_CUR)
-
-        while f.tell() > 0:
-            f.seek(-1, io.SEEK_CUR)
-            (r,) = unpack('<4s', f.read(4))
-            if r == self._PK_END_OF_CENTRAL_DIR:
-                # Read central dir
-                (
-                    this_disk,
-                    disk_central,
-                    this_entries,
-                    total_entries,
-                    size_central,
-                    offset_central,
-                ) = unpack('<HHHHII', f.read(16))
-                # TODO according to the standard we need to check if the
-                # end of central directory is the last item in the zip file
-                # TODO We also need to check if the central dir is exactly
-                # before the end of central dir...
-
-                # These things should not happen for APKs
-                if this_disk != 0:
-                    logger.warning(
-                        "This is a multi disk ZIP! Attempting to process its signature anyway!"
-                    )
-                if disk_central != 0:
-                    logger.warning(
-                        "This is a multi disk ZIP! Attempting to process its signature anyway!"
-                    )
-                break
-            f.seek(-4, io.SEEK_CUR)
-
-        if not offset_central:
-            return
-
-        f.seek(offset_central)
-        (r,) = unpack('<4s', f.read(4))
-        f.seek(-4, io.SEEK_CUR)
-        if r != self._PK_CENTRAL_DIR:
-            raise BrokenAPKError("No Central Dir at specified offset")
-
-        # Go back and check if we have a magic
-        end_offset = f.tell()
-        f.seek(-24, io.SEEK_CUR)
-        size_of_block, magic = unpack('<Q16s', f.read(24))
-
-        self._is_signed_v2 = False
-        self._is_signed_v3 = False
-        self._is_signed_v31 = False
-
-        if magic != self._APK_SIG_MAGIC:
+        """
+        Parse the APK Signing Block, see [parse_apk_signing_block][androguard.core.apk.parse_apk_signing_block]
+        """
+        blocks = parse_apk_signing_block(self._get_stream())
+        if blocks is None:
             return
 
-        # go back size_of_blocks + 8 and read size_of_block again
-        f.seek(-(size_of_block + 8), io.SEEK_CUR)
-        (size_of_block_start,) = unpack("<Q", f.read(8))
-        if size_of_block_start != size_of_block:
-            raise BrokenAPKError("Sizes at beginning and end does not match!")
-
-        # Store all blocks
-        while f.tell() < end_offset - 24:
-            size, key = unpack('<QI', f.read(12))
-            value = f.read(size - 4)
-            is_duplicate_id = False
-            if key in [b.id for b in self._v2_blocks]:
-                is_duplicate_id = True
-                logger.warning(
-                    "Duplicate block ID in APK Signing Block: {}".format(key)
-                )
-            self._v2_blocks.append(APKV2SignatureBlock(key, is_duplicate_id, value))
+        self._v2_blocks = blocks
+        self._v2_block_ids = {}
+        for block in blocks:
+            # only the first block of an ID is used to mimic apksig behavior
+            self._v2_block_ids.setdefault(block.id, block)
 
         # Test if a signature is found
-        if self._APK_SIG_KEY_V2_SIGNATURE in [b.id for b in self._v2_blocks]:
-            self._is_signed_v2 = True
-
-        if self._APK_SIG_KEY_V3_SIGNATURE in [b.id for b in self._v2_blocks]:
-            self._is_signed_v3 = True
-
-        if self._APK_SIG_KEY_V31_SIGNATURE in [b.id for b in self._v2_blocks]:
-            self._is_signed_v31 = True
+        self._is_signed_v2 = (
+            self._APK_SIG_KEY_V2_SIGNATURE in self._v2_block_ids
+        )
+        self._is_signed_v3 = (
+            self._APK_SIG_KEY_V3_SIGNATURE in self._v2_block_ids
+        )
+        self._is_signed_v31 = (
+            self._APK_SIG_KEY_V31_SIGNATURE in self._v2_block_ids
+        )
 
     def parse_v3_signing_block(self, v31=False) -> None:
         """
@@ -2469,101 +2837,14 @@ class APK:
 
         # only selecting the first block to mimic apksig behavior
         sig_key = self._APK_SIG_KEY_V31_SIGNATURE if v31 else self._APK_SIG_KEY_V3_SIGNATURE
-        try:
-            block_bytes = next(b.data for b in self._v2_blocks if b.id == sig_key)
-        except StopIteration:
+        if sig_key not in self._v2_block_ids:
             raise ValueError(f"Missing signature block for {sig_key!r}")
-            
-        block = io.BytesIO(block_bytes)
-        view = block.getvalue()
-
-        # V3 signature Block data format:
-        #
-        # * signer:
-        #    * signed data:
-        #        * digests:
-        #            * signature algorithm ID (uint32)
-        #            * digest (length-prefixed)
-        #        * certificates
-        #        * minSDK
-        #        * maxSDK
-        #        * additional attributes
-        #    * minSDK
-        #    * maxSDK
-        #    * signatures
-        #    * publickey
-        size_sequence = self.read_uint32_le(block)
-        if size_sequence + 4 != len(block_bytes):
-            raise BrokenAPKError(
-                "size of sequence and blocksize does not match"
-            )
 
-        while block.tell() < len(block_bytes):
-            off_signer = block.tell()
-            size_signer = self.read_uint32_le(block)
-
-            # read whole signed data, since we might to parse
-            # content within the signed data, and mess up offset
-            len_signed_data = self.read_uint32_le(block)
-            signed_data_bytes = block.read(len_signed_data)
-            signed_data = io.BytesIO(signed_data_bytes)
-
-            # Digests
-            len_digests = self.read_uint32_le(signed_data)
-            raw_digests = signed_data.read(len_digests)
-            digests = self.parse_signatures_or_digests(raw_digests)
-
-            # Certs
-            certs = []
-            len_certs = self.read_uint32_le(signed_data)
-            start_certs = signed_data.tell()
-            while signed_data.tell() < start_certs + len_certs:
-
-                len_cert = self.read_uint32_le(signed_data)
-                cert = signed_data.read(len_cert)
-                certs.append(cert)
-
-            # versions
-            signed_data_min_sdk = self.read_uint32_le(signed_data)
-            signed_data_max_sdk = self.read_uint32_le(signed_data)
-
-            # Addional attributes
-            len_attr = self.read_uint32_le(signed_data)
-            attr = signed_data.read(len_attr)
-
-            signed_data_object = APKV3SignedData()
-            signed_data_object._bytes = signed_data_bytes
-            signed_data_object.digests = digests
-            signed_data_object.certificates = certs
-            signed_data_object.additional_attributes = attr
-            signed_data_object.minSDK = signed_data_min_sdk
-            signed_data_object.maxSDK = signed_data_max_sdk
-
-            # versions (should be the same as signed data's versions)
-            signer_min_sdk = self.read_uint32_le(block)
-            signer_max_sdk = self.read_uint32_le(block)
-
-            # Signatures
-            len_sigs = self.read_uint32_le(block)
-            raw_sigs = block.read(len_sigs)
-            sigs = self.parse_signatures_or_digests(raw_sigs)
-
-            # PublicKey
-            len_publickey = self.read_uint32_le(block)
-            publickey = block.read(len_publickey)
-
-            signer = APKV3Signer()
-            signer._bytes = view[off_signer : off_signer + size_signer]
-            signer.signed_data = signed_data_object
-            signer.signatures = sigs
-            signer.public_key = publickey
-            signer.minSDK = signer_min_sdk
-            signer.maxSDK = signer_max_sdk
-
-            if v31:
-                self._v31_signing_data.append(signer)
-            else:
-                self._v3_signing_data.append(signer)
+        signers = parse_signers(self._v2_block_ids[sig_key].data, v3=True)
+        if v31:
+            self._v31_signing_data = signers
+        else:
+            self._v3_signing_data = signers
 
     def parse_v2_signing_block(self) -> None:
         """
@@ -2577,78 +2858,9 @@ class APK:
             return
 
         # only selecting the first block to mimic apksig behavior
-        block_bytes = next((b.data for b in self._v2_blocks if b.id == self._APK_SIG_KEY_V2_SIGNATURE))
-        block = io.BytesIO(block_bytes)
-        view = block.getvalue()
-
-        # V2 signature Block data format:
-        #
-        # * signer:
-        #    * signed data:
-        #        * digests:
-        #            * signature algorithm ID (uint32)
-        #            * digest (length-prefixed)
-        #        * certificates
-        #        * additional attributes
-        #    * signatures
-        #    * publickey
-
-        size_sequence = self.read_uint32_le(block)
-        if size_sequence + 4 != len(block_bytes):
-            raise BrokenAPKError(
-                "size of sequence and blocksize does not match"
-            )
-
-        while block.tell() < len(block_bytes):
-            off_signer = block.tell()
-            size_signer = self.read_uint32_le(block)
-
-            # read whole signed data, since we might to parse
-            # content within the signed data, and mess up offset
-            len_signed_data = self.read_uint32_le(block)
-            signed_data_bytes = block.read(len_signed_data)
-            signed_data = io.BytesIO(signed_data_bytes)
-
-            # Digests
-            len_digests = self.read_uint32_le(signed_data)
-            raw_digests = signed_data.read(len_digests)
-            digests = self.parse_signatures_or_digests(raw_digests)
-
-            # Certs
-            certs = []
-            len_certs = self.read_uint32_le(signed_data)
-            start_certs = signed_data.tell()
-            while signed_data.tell() < start_certs + len_certs:
-                len_cert = self.read_uint32_le(signed_data)
-                cert = signed_data.read(len_cert)
-                certs.append(cert)
-
-            # Additional attributes
-            len_attr = self.read_uint32_le(signed_data)
-            attributes = signed_data.read(len_attr)
-
-            signed_data_object = APKV2SignedData()
-            signed_data_object._bytes = signed_data_bytes
-            signed_data_object.digests = digests
-            signed_data_object.certificates = certs
-            signed_data_object.additional_attributes = attributes
-
-            # Signatures
-            len_sigs = self.read_uint32_le(block)
-            raw_sigs = block.read(len_sigs)
-            sigs = self.parse_signatures_or_digests(raw_sigs)
-
-            # PublicKey
-            len_publickey = self.read_uint32_le(block)
-            publickey = block.read(len_publickey)
-
-            signer = APKV2Signer()
-            signer._bytes = view[off_signer : off_signer + size_signer]
-            signer.signed_data = signed_data_object
-            signer.signatures = sigs
-            signer.public_key = publickey
-
-            self._v2_signing_data.append(signer)
+        self._v2_signing_data = parse_signers(
+            self._v2_block_ids[self._APK_SIG_KEY_V2_SIGNATURE].data
+        )
 
     def get_public_keys_der_v31(self) -> list[bytes]:
         """
@@ -3032,33 +3244,24 @@ def ensure_final_value(packageName: str, arsc: ARSCParser, value: str) -> str:
     return ''
 
 
-def get_apkid(apkfile: str) -> tuple[str, str, str]:
-    """Read (appid, versionCode, versionName) from an APK
+def get_manifest_attributes(
+    manifest: bytes, filename: str = 'AndroidManifest.xml'
+) -> dict[str, str]:
+    """Read the attributes of the `<manifest>` tag of a binary AndroidManifest.xml
 
-    This first tries to do quick binary XML parsing to just get the
-    values that are needed.  It will fallback to full androguard
-    parsing, which is slow, if it can't find the versionName value or
-    versionName is set to a Android String Resource (e.g. an integer
-    hex value that starts with @).
+    Only the start of the file is parsed, up to the `<manifest>` tag, thus
+    this is much faster than parsing the whole manifest. Attribute values
+    which are references to resources are not resolved.
 
+    :param manifest: the binary AndroidManifest.xml
+    :param filename: the name of the file, used in the error message
     :raises RuntimeError: if manifest is malformed
-    :returns: tuple of format (appid, versionCode, versionName) of a given apkfile
+    :returns: a dictionary of the attribute names, without namespace, and their values
     """
-    logger.debug("GET_APKID")
-
-    if not os.path.exists(apkfile):
-        logger.error("'{apkfile}' does not exist!".format(apkfile=apkfile))
-
-    appid = None
-    versionCode = None
-    versionName = None
-    apk = ZipEntry.parse(apkfile, False)
-    manifest = apk.read('AndroidManifest.xml')
+    attributes = {}
     axml = AXMLParser(manifest)
-    count = 0
     while axml.is_valid():
         _type = next(axml)
-        count += 1
         if _type == START_TAG:
             for i in range(0, axml.getAttributeCount()):
                 name = axml.getAttributeName(i)
@@ -3067,30 +3270,82 @@ def get_apkid(apkfile: str) -> tuple[str, str, str]:
                 value = format_value(
                     _type, _data, lambda _: axml.getAttributeValue(i)
                 )
-                if appid is None and name == 'package':
-                    appid = value
-                elif versionCode is None and name == 'versionCode':
-                    if value.startswith('0x'):
-                        versionCode = str(int(value, 16))
-                    else:
-                        versionCode = value
-                elif versionName is None and name == 'versionName':
-                    versionName = value
+                attributes.setdefault(name, value)
 
             if axml.name == 'manifest':
                 break
         elif _type == END_TAG or _type == TEXT or _type == END_DOCUMENT:
             raise RuntimeError(
                 '{path}: <manifest> must be the first element in AndroidManifest.xml'.format(
-                    path=apkfile
+                    path=filename
                 )
             )
+    return attributes
 
-    if not versionName or versionName[0] == '@':
-        a = APK(apkfile)
-        versionName = ensure_final_value(
-            a.package, a.get_android_resources(), a.get_androidversion_name()
-        )
+
+def get_min_sdk_version(manifest: bytes) -> Union[str, None]:
+    """Read the minSdkVersion of a binary AndroidManifest.xml
+
+    Only the start of the file is parsed, up to the `<uses-sdk>` tag, like
+    [get_manifest_attributes][androguard.core.apk.get_manifest_attributes].
+
+    :param manifest: the binary AndroidManifest.xml
+    :returns: the `android:minSdkVersion` attribute or None if it is not set
+    """
+    axml = AXMLParser(manifest)
+    while axml.is_valid():
+        _type = next(axml)
+        if _type == END_DOCUMENT:
+            break
+        if _type == START_TAG and axml.name == 'uses-sdk':
+            for i in range(0, axml.getAttributeCount()):
+                if axml.getAttributeName(i) == 'minSdkVersion':
+                    return format_value(
+                        axml.getAttributeValueType(i),
+                        axml.getAttributeValueData(i),
+                        lambda _: axml.getAttributeValue(i),
+                    )
+            break
+    return None
+
+
+def get_apkid(apkfile: str) -> tuple[str, str, str]:
+    """Read (appid, versionCode, versionName) from an APK
+
+    This only does quick binary XML parsing up to the `<manifest>` tag
+    to just get the values that are needed.  If versionName is set to
+    a Android String Resource (e.g. an integer hex value that starts
+    with @), only the referenced entry is decoded from `resources.arsc`
+    instead of parsing the whole APK.
+
+    :raises RuntimeError: if manifest is malformed
+    :returns: tuple of format (appid, versionCode, versionName) of a given apkfile
+    """
+    logger.debug("GET_APKID")
+
+    if not os.path.exists(apkfile):
+        logger.error("'{apkfile}' does not exist!".format(apkfile=apkfile))
+
+    apk = ZipEntry.parse(apkfile, False)
+    manifest = apk.read('AndroidManifest.xml')
+    attributes = get_manifest_attributes(manifest, apkfile)
+
+    appid = attributes.get('package')
+    versionCode = attributes.get('versionCode')
+    if versionCode is not None and versionCode.startswith('0x'):
+        versionCode = str(int(versionCode, 16))
+    versionName = attributes.get('versionName')
+
+    if versionName and versionName[0] == '@':
+        if 'resources.arsc' in apk.namelist():
+            arsc = ARSCParser(apk.read('resources.arsc'), lazy=True)
+            versionName = ensure_final_value(appid, arsc, versionName)
+        else:
+            logger.warning(
+                "{}: versionName is a resource, but there is no resources.arsc".format(
+                    apkfile
+                )
+            )
     if not versionName:
         versionName = ''  # versionName is expected to always be a str
 
@@ -8,9 +8,11 @@ import collections
 import io
 import random
 import re
+import sys
+from array import array
 from collections import defaultdict
-from struct import pack, unpack
-from typing import BinaryIO, Union
+from struct import iter_unpack, pack, unpack, unpack_from
+from typing import BinaryIO, Iterator, Union
 from xml.sax.saxutils import escape
 
 from loguru import logger
@@ -114,7 +116,6 @@ class StringBlock:
         :param buff: buffer which holds the string block
         :param header: a instance of [ARSCHeader][androguard.core.axml.ARSCHeader]
         """
-        self._cache = {}
         self.header = header
         # We already read the header (which was chunk_type and chunk_size
         # Now, we read the string_count:
@@ -148,20 +149,19 @@ class StringBlock:
                 "This is not a problem but could indicate packers."
             )
 
-        self.m_stringOffsets = []
-        self.m_styleOffsets = []
         self.m_charbuff = ""
         self.m_styles = []
 
         # Next, there is a list of string following.
         # This is only a list of offsets (4 byte each)
-        for i in range(self.stringCount):
-            self.m_stringOffsets.append(unpack('<I', buff.read(4))[0])
+        self.m_stringOffsets = self._read_uint32_array(buff, self.stringCount)
 
         # And a list of styles
         # again, a list of offsets
-        for i in range(self.styleCount):
-            self.m_styleOffsets.append(unpack('<I', buff.read(4))[0])
+        self.m_styleOffsets = self._read_uint32_array(buff, self.styleCount)
+
+        # the decoded strings, None if not yet decoded
+        self._strings = [None] * len(self.m_stringOffsets)
 
         # FIXME it is probably better to parse n strings and not calculate the size
         size = self.header.size - self.stringsOffset
@@ -182,8 +182,31 @@ class StringBlock:
             if (size % 4) != 0:
                 logger.warning("Size of styles is not aligned by four bytes.")
 
-            for i in range(0, size // 4):
-                self.m_styles.append(unpack('<I', buff.read(4))[0])
+            self.m_styles = self._read_uint32_array(buff, size // 4)
+
+    @staticmethod
+    def _read_uint32_array(buff: BinaryIO, count: int) -> array:
+        """
+        Read `count` little endian uint32 with a single read
+
+        :raises ResParserError: if the buffer is too short
+        :returns: an array of the integers
+        """
+        count = max(count, 0)
+        data = buff.read(count * 4)
+        if len(data) != count * 4:
+            raise ResParserError(
+                "Can not read {} offsets, the string pool is truncated!".format(
+                    count
+                )
+            )
+        values = array('I')
+        if values.itemsize != 4:
+            values = array('L')
+        values.frombytes(data)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
 
     def __repr__(self):
         return "<StringPool #strings={}, #styles={}, UTF8={}>".format(
@@ -222,20 +245,76 @@ class StringBlock:
         :param idx: index in the string table
         :return: the string
         """
-        if idx in self._cache:
-            return self._cache[idx]
-
-        if idx < 0 or not self.m_stringOffsets or idx >= self.stringCount:
+        if idx < 0 or idx >= len(self._strings):
             return ""
 
-        offset = self.m_stringOffsets[idx]
+        string = self._strings[idx]
+        if string is None:
+            offset = self.m_stringOffsets[idx]
+            if self.m_isUTF8:
+                string = self._decode8(offset)
+            else:
+                string = self._decode16(offset)
+            self._strings[idx] = string
 
-        if self.m_isUTF8:
-            self._cache[idx] = self._decode8(offset)
-        else:
-            self._cache[idx] = self._decode16(offset)
+        return string
+
+    def decode_all(self) -> list[str]:
+        """
+        Decode all strings of the string table at once.
+
+        This is faster than calling [getString][androguard.core.axml.StringBlock.getString]
+        for each index, if most strings are required anyways.
+        Strings with short lengths, which are the vast majority, are decoded
+        directly, all others are decoded like in `getString`.
+
+        :returns: the list of all strings
+        """
+        self._decode_short_strings()
+        return [self.getString(idx) for idx in range(len(self._strings))]
+
+    def _decode_short_strings(self) -> None:
+        """
+        Decode all strings with a short length, which are null terminated,
+        in a single pass.
+
+        All other strings are left to `getString`, hence this never raises
+        for broken strings which are not used.
+        """
+        strings = self._strings
+        data = self.m_charbuff
+        size = len(data)
 
-        return self._cache[idx]
+        for idx, offset in enumerate(self.m_stringOffsets):
+            if strings[idx] is not None or offset + 1 >= size:
+                continue
+
+            string = None
+            if self.m_isUTF8:
+                str_len = data[offset]
+                encoded_bytes = data[offset + 1]
+                end = offset + 2 + encoded_bytes
+                if (
+                    str_len < 0x80
+                    and encoded_bytes < 0x80
+                    and end < size
+                    and data[end] == 0
+                ):
+                    string = data[offset + 2 : end].decode('utf-8', 'replace')
+            else:
+                str_len = data[offset] | (data[offset + 1] << 8)
+                end = offset + 2 + str_len * 2
+                if (
+                    str_len < 0x8000
+                    and end + 2 <= size
+                    and data[end : end + 2] == b"\x00\x00"
+                ):
+                    # AXML is always little endian, there is no BOM
+                    string = data[offset + 2 : end].decode(
+                        'utf-16-le', 'replace'
+                    )
+            if string is not None and len(string) == str_len:
+                strings[idx] = string
 
     def getStyle(self, idx: int) -> int:
         """
@@ -321,7 +400,7 @@ class StringBlock:
                 )
             )
 
-        return self._decode_bytes(data, 'utf-16', str_len)
+        return self._decode_bytes(data, 'utf-16-le', str_len)
 
     @staticmethod
     def _decode_bytes(data: bytes, encoding: str, str_len: int) -> str:
@@ -332,7 +411,7 @@ class StringBlock:
         The string is decoded using the "replace" method.
 
         :param data: bytes
-        :param encoding: encoding name ("utf-8" or "utf-16")
+        :param encoding: encoding name ("utf-8" or "utf-16-le")
         :param str_len: length of the decoded string
         :return: the decoded bytes
         """
@@ -1136,6 +1215,9 @@ class AXMLPrinter:
         logger.debug("AXMLPrinter")
 
         self.axml = AXMLParser(raw_buff)
+        if self.axml.is_valid():
+            # the whole document is printed, thus nearly all strings are used
+            self.axml.sb._decode_short_strings()
 
         self.root = None
         self.packerwarning = False
@@ -1640,12 +1722,27 @@ class ARSCParser:
 
     Each package is a chunk of type `RES_TABLE_PACKAGE_TYPE`.
     It contains again many more chunks.
+
+    In lazy mode, only the headers of the chunks are parsed on creation and
+    the position of the entries of each type and configuration is recorded.
+    [get_string][androguard.core.axml.ARSCParser.get_string],
+    [get_id][androguard.core.axml.ARSCParser.get_id],
+    [get_res_id_by_key][androguard.core.axml.ARSCParser.get_res_id_by_key] and
+    [get_res_configs][androguard.core.axml.ARSCParser.get_res_configs]
+    then only decode the entries of the requested resource or type, which
+    are kept in a LRU cache.
+    All other methods decode the whole table on their first call.
     """
 
-    def __init__(self, raw_buff: bytes) -> None:
+    # Number of decoded entries kept in lazy mode
+    ENTRY_CACHE_SIZE = 4096
+
+    def __init__(self, raw_buff: bytes, lazy: bool = False) -> None:
         """
         :param bytes raw_buff: the raw bytes of the file
+        :param bool lazy: decode the entries on demand (default: False)
         """
+        self._raw = raw_buff
         self.buff = io.BufferedReader(io.BytesIO(raw_buff))
         self.buff_size = self.buff.raw.getbuffer().nbytes
 
@@ -1665,6 +1762,15 @@ class ARSCParser:
         self.resource_keys = defaultdict(lambda: defaultdict(defaultdict))
         self.stringpool_main = None
 
+        self._lazy = lazy
+        # (package name, ARSCResType, end of chunk) of each type chunk
+        self._type_chunks = defaultdict(list)
+        # the type chunks by the upper 16 bit of the resource id
+        self._type_index = defaultdict(list)
+        self._key_indexes = {}
+        self._indexed_keys = set()
+        self._entry_cache = collections.OrderedDict()
+
         # First, there is a ResTable_header.
         self.header = ARSCHeader(self.buff, expected_type=RES_TABLE_TYPE)
 
@@ -1827,10 +1933,6 @@ class ARSCParser:
                     elif pkg_chunk_header.type == RES_TABLE_TYPE_TYPE:
                         # Parse a RES_TABLE_TYPE
                         # http://androidxref.com/9.0.0_r3/xref/frameworks/base/tools/aapt2/format/binary/BinaryResourceParser.cpp#311
-                        start_of_chunk = self.buff.tell() - 8
-                        expected_end_of_chunk = (
-                            start_of_chunk + pkg_chunk_header.size
-                        )
                         a_res_type = ARSCResType(self.buff, pc)
                         self.packages[package_name].append(a_res_type)
                         self.resource_configs[package_name][a_res_type].add(
@@ -1839,78 +1941,21 @@ class ARSCParser:
 
                         logger.debug("Config: {}".format(a_res_type.config))
 
-                        entries = []
-                        FLAG_SPARSE = 0x01
-                        FLAG_OFFSET16 = 0x02
-                        NO_ENTRY_16 = 0xFFFF
-                        NO_ENTRY_32 = 0xFFFFFFFF
-                        expected_entries_start = (
-                            start_of_chunk + a_res_type.entriesStart
+                        end_of_chunk = (
+                            a_res_type.start - 8 + pkg_chunk_header.size
                         )
-
-                        # Helper function to convert 16-bit offset to 32-bit
-                        def offset_from16(off16):
-                            return (
-                                NO_ENTRY_16
-                                if off16 == NO_ENTRY_16
-                                else off16 * 4
+                        if self._lazy:
+                            # Only remember where the entries are, they are
+                            # decoded on demand
+                            chunk = (package_name, a_res_type, end_of_chunk)
+                            self._type_chunks[package_name].append(chunk)
+                            self._type_index[a_res_type.mResId >> 16].append(
+                                chunk
                             )
-
-                        for i in range(0, a_res_type.entryCount):
-                            # Check if FLAG_SPARSE is set
-                            if a_res_type.flags & FLAG_SPARSE:
-                                entry = self.buff.read(4)
-                                idx, off = unpack('<HH', entry)
-                                current_package.mResId = (
-                                    current_package.mResId & 0xFFFF0000 | idx
-                                )
-                                offset = off * 4
-                            else:
-                                current_package.mResId = (
-                                    current_package.mResId & 0xFFFF0000 | i
-                                )
-                                # Check if FLAG_OFFSET16 is set
-                                if a_res_type.flags & FLAG_OFFSET16:
-                                    # Read as 16-bit offset
-                                    offset_16 = unpack('<H', self.buff.read(2))[0]
-                                    offset = offset_from16(offset_16)
-                                    if offset == NO_ENTRY_16:
-                                        continue
-                                else:
-                                    # Read as 32-bit offset
-                                    offset = unpack('<I', self.buff.read(4))[0]
-                                    if offset == NO_ENTRY_32:
-                                        continue
-                            entries.append((offset, current_package.mResId))
-
-                        self.packages[package_name].append(entries)
-
-                        base_offset = self.buff.tell()
-                        if base_offset + ((4 - (base_offset % 4)) % 4) != expected_entries_start:
-                            # FIXME: seems like I am missing 2 bytes here in some cases, though it does not affect the result
-                            logger.warning(
-                                "Something is off here! We are not where the entries should start."
+                        else:
+                            self.packages[package_name].extend(
+                                self._parse_entries(a_res_type, end_of_chunk)
                             )
-                        base_offset = expected_entries_start
-                        for entry_offset, res_id in entries:
-                            if entry_offset != -1:
-                                ate = ARSCResTableEntry(
-                                    self.buff,
-                                    base_offset + entry_offset,
-                                    expected_end_of_chunk,
-                                    res_id,
-                                    pc,
-                                )
-                                self.packages[package_name].append(ate)
-                                if ate.is_weak():
-                                    # FIXME we are not sure how to implement the FLAG_WEAK!
-                                    # We saw the following: There is just a single Res_value after the ARSCResTableEntry
-                                    # and then comes the next ARSCHeader.
-                                    # Therefore we think this means all entries are somehow replicated?
-                                    # So we do some kind of hack here. We set the idx to the entry again...
-                                    # Now we will read all entries!
-                                    # Not sure if this is a good solution though
-                                    self.buff.seek(ate.start)
                     elif pkg_chunk_header.type == RES_TABLE_LIBRARY_TYPE:
                         logger.warning(
                             "RES_TABLE_LIBRARY_TYPE chunk is not supported"
@@ -1933,15 +1978,230 @@ class ARSCParser:
             # move to the next resource chunk
             self.buff.seek(res_header.end)
 
+    def _parse_entries(
+        self, a_res_type: ARSCResType, end_of_chunk: int
+    ) -> list:
+        """
+        Parse all entries of a `ResTable_type`, the buffer has to be set to
+        the start of the entry offsets.
+
+        :param a_res_type: the type the entries belong to
+        :param end_of_chunk: the offset of the end of the type chunk
+        :returns: the list of `(offset, resource id)` tuples, followed by all
+            [ARSCResTableEntry][androguard.core.axml.ARSCResTableEntry]
+        """
+        entries = self._read_entry_offsets(a_res_type)
+        result = [entries]
+
+        base_offset = self.buff.tell()
+        expected_entries_start = a_res_type.get_entries_start()
+        if (
+            base_offset + ((4 - (base_offset % 4)) % 4)
+            != expected_entries_start
+        ):
+            # FIXME: seems like I am missing 2 bytes here in some cases, though it does not affect the result
+            logger.warning(
+                "Something is off here! We are not where the entries should start."
+            )
+        for entry_offset, res_id in entries:
+            ate = ARSCResTableEntry(
+                self.buff,
+                expected_entries_start + entry_offset,
+                end_of_chunk,
+                res_id,
+                a_res_type.parent,
+            )
+            result.append(ate)
+            if ate.is_weak():
+                # FIXME we are not sure how to implement the FLAG_WEAK!
+                # We saw the following: There is just a single Res_value after the ARSCResTableEntry
+                # and then comes the next ARSCHeader.
+                # Therefore we think this means all entries are somehow replicated?
+                # So we do some kind of hack here. We set the idx to the entry again...
+                # Now we will read all entries!
+                # Not sure if this is a good solution though
+                self.buff.seek(ate.start)
+        return result
+
+    def _read_entry_offsets(
+        self, a_res_type: ARSCResType
+    ) -> list[tuple[int, int]]:
+        """
+        Read the entry offsets of a `ResTable_type`, the buffer has to be
+        set to the start of the entry offsets.
+
+        Missing entries are skipped.
+
+        :param a_res_type: the type the entries belong to
+        :returns: a list of tuples of the offset relative to the start of
+            the entries and the resource id
+        """
+        entries = []
+        base_id = a_res_type.mResId & 0xFFFF0000
+        if a_res_type.flags & ARSCResType.FLAG_SPARSE:
+            data = self.buff.read(4 * a_res_type.entryCount)
+            for idx, off in iter_unpack('<HH', data):
+                entries.append((off * 4, base_id | idx))
+        elif a_res_type.flags & ARSCResType.FLAG_OFFSET16:
+            data = self.buff.read(2 * a_res_type.entryCount)
+            for i, (off,) in enumerate(iter_unpack('<H', data)):
+                if off != ARSCResType.NO_ENTRY_16:
+                    entries.append((off * 4, base_id | i))
+        else:
+            data = self.buff.read(4 * a_res_type.entryCount)
+            for i, (off,) in enumerate(iter_unpack('<I', data)):
+                if off != ARSCResType.NO_ENTRY_32:
+                    entries.append((off, base_id | i))
+        return entries
+
+    def _find_entry_offset(
+        self, a_res_type: ARSCResType, idx: int
+    ) -> Union[int, None]:
+        """
+        Return the offset of the entry with index `idx` of a `ResTable_type`,
+        without reading all entry offsets.
+
+        :param a_res_type: the type to search in
+        :param idx: the lower 16 bit of the resource id
+        :returns: the offset relative to the start of the entries or None
+        """
+        pos = a_res_type.offsets_start
+        count = a_res_type.entryCount
+        if a_res_type.flags & ARSCResType.FLAG_SPARSE:
+            # sparse entries are sorted by their index
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                entry_idx, off = unpack_from('<HH', self._raw, pos + mid * 4)
+                if entry_idx == idx:
+                    return off * 4
+                if entry_idx < idx:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return None
+        if idx >= count:
+            return None
+        if a_res_type.flags & ARSCResType.FLAG_OFFSET16:
+            (off,) = unpack_from('<H', self._raw, pos + idx * 2)
+            if off == ARSCResType.NO_ENTRY_16:
+                return None
+            return off * 4
+        (off,) = unpack_from('<I', self._raw, pos + idx * 4)
+        if off == ARSCResType.NO_ENTRY_32:
+            return None
+        return off
+
+    def _get_entry(
+        self, chunk: tuple, offset: int, res_id: int
+    ) -> ARSCResTableEntry:
+        """
+        Return the decoded entry at `offset` of a type chunk.
+        The last [ENTRY_CACHE_SIZE][androguard.core.axml.ARSCParser.ENTRY_CACHE_SIZE]
+        decoded entries are cached.
+
+        :param chunk: the type chunk
+        :param offset: the offset relative to the start of the entries
+        :param res_id: the resource id of the entry
+        :returns: the `ARSCResTableEntry`
+        """
+        _, a_res_type, end_of_chunk = chunk
+        key = (a_res_type.get_entries_start() + offset, res_id)
+        ate = self._entry_cache.get(key)
+        if ate is not None:
+            self._entry_cache.move_to_end(key)
+            return ate
+
+        ate = ARSCResTableEntry(
+            self.buff, key[0], end_of_chunk, res_id, a_res_type.parent
+        )
+        self._entry_cache[key] = ate
+        if len(self._entry_cache) > self.ENTRY_CACHE_SIZE:
+            self._entry_cache.popitem(last=False)
+        return ate
+
+    def _iter_entry_keys(
+        self, chunk: tuple
+    ) -> Iterator[tuple[str, int, int]]:
+        """
+        Yield the key name, offset and resource id of all entries of a type
+        chunk, without decoding the entries.
+
+        :param chunk: the type chunk
+        """
+        _, a_res_type, _ = chunk
+        self.buff.seek(a_res_type.offsets_start)
+        entries = self._read_entry_offsets(a_res_type)
+        entries_start = a_res_type.get_entries_start()
+        key_strings = a_res_type.parent.mKeyStrings
+        for offset, res_id in entries:
+            size, flags, index = unpack_from(
+                '<HHI', self._raw, entries_start + offset
+            )
+            if flags & ARSCResTableEntry.FLAG_COMPACT:
+                index = size
+            yield key_strings.getString(index), offset, res_id
+
+    def _get_key_index(self, chunk: tuple) -> dict[str, tuple[int, int]]:
+        """
+        Return a dict of the key names of a type chunk to the offset and
+        resource id of the first entry with that name.
+
+        :param chunk: the type chunk
+        """
+        if chunk not in self._key_indexes:
+            index = {}
+            for name, offset, res_id in self._iter_entry_keys(chunk):
+                index.setdefault(name, (offset, res_id))
+            self._key_indexes[chunk] = index
+        return self._key_indexes[chunk]
+
+    def _is_lazy(self) -> bool:
+        return self._lazy and not self.analyzed
+
+    def _decode_entries(self) -> None:
+        """
+        Decode all entries which were skipped in lazy mode and insert them
+        into `packages`, like they were parsed in the non lazy mode.
+        """
+        for package_name, chunks in self._type_chunks.items():
+            entries = {}
+            for chunk in chunks:
+                _, a_res_type, end_of_chunk = chunk
+                self.buff.seek(a_res_type.offsets_start)
+                entries[a_res_type] = self._parse_entries(
+                    a_res_type, end_of_chunk
+                )
+
+            items = []
+            for item in self.packages[package_name]:
+                items.append(item)
+                if isinstance(item, ARSCResType):
+                    items.extend(entries[item])
+            self.packages[package_name] = items
+
+        self._type_chunks.clear()
+        self._type_index.clear()
+        self._key_indexes.clear()
+        self._entry_cache.clear()
+
     def _analyse(self):
         if self.analyzed:
             return
 
+        if self._lazy:
+            self._decode_entries()
+
         self.analyzed = True
 
         for package_name in self.packages:
             self.values[package_name] = {}
 
+            # the type and key of every entry are decoded below
+            for item in self.packages[package_name]:
+                if isinstance(item, StringBlock):
+                    item._decode_short_strings()
+
             nb = 3
             while nb < len(self.packages[package_name]):
                 header = self.packages[package_name][nb]
@@ -2381,6 +2641,20 @@ class ARSCParser:
         :param locale: specific locale
         :returns: tuple of (resource_type, resource_name, resource_id)
         """
+        if self._is_lazy():
+            for chunk in self._type_index.get(rid >> 16, ()):
+                package, a_res_type, _ = chunk
+                if (
+                    package != package_name
+                    or a_res_type.config.get_language_and_region() != locale
+                ):
+                    continue
+                offset = self._find_entry_offset(a_res_type, rid & 0xFFFF)
+                if offset is not None:
+                    ate = self._get_entry(chunk, offset, rid)
+                    return a_res_type.get_type(), ate.get_value(), rid
+            return None, None, None
+
         self._analyse()
 
         try:
@@ -2586,14 +2860,25 @@ class ARSCParser:
         :param fallback: Enable the fallback for resolving default configuration (default: True)
         :return: a list of `ARSCResTableConfig`
         """
-        self._analyse()
-
         if not rid:
             raise ValueError("'rid' should be set")
         if not isinstance(rid, int):
             raise ValueError("'rid' must be an int")
 
-        if rid not in self.resource_values:
+        if self._is_lazy():
+            res_options = {}
+            for chunk in self._type_index.get(rid >> 16, ()):
+                a_res_type = chunk[1]
+                offset = self._find_entry_offset(a_res_type, rid & 0xFFFF)
+                if offset is not None:
+                    res_options[a_res_type.config] = self._get_entry(
+                        chunk, offset, rid
+                    )
+        else:
+            self._analyse()
+            res_options = self.resource_values.get(rid)
+
+        if not res_options:
             logger.warning(
                 "The requested rid '0x{:08x}' could not be found in the list of resources.".format(
                     rid
@@ -2601,7 +2886,6 @@ class ARSCParser:
             )
             return []
 
-        res_options = self.resource_values[rid]
         if len(res_options) > 1 and config:
             if config in res_options:
                 return [(config, res_options[config])]
@@ -2611,7 +2895,7 @@ class ARSCParser:
                         rid
                     )
                 )
-                return [list(self.resource_values[rid].items())[0]]
+                return [list(res_options.items())[0]]
             else:
                 return []
         else:
@@ -2620,6 +2904,21 @@ class ARSCParser:
     def get_string(
         self, package_name: str, name: str, locale: str = '\x00\x00'
     ) -> Union[str, None]:
+        if self._is_lazy():
+            for chunk in self._type_chunks.get(package_name, ()):
+                a_res_type = chunk[1]
+                if (
+                    a_res_type.get_type() != "string"
+                    or a_res_type.config.get_language_and_region() != locale
+                ):
+                    continue
+                entry = self._get_key_index(chunk).get(name)
+                if entry:
+                    return self.get_resource_string(
+                        self._get_entry(chunk, *entry)
+                    )
+            return None
+
         self._analyse()
 
         try:
@@ -2630,7 +2929,16 @@ class ARSCParser:
             return None
 
     def get_res_id_by_key(self, package_name: str, resource_type: str, key: str) -> Union[int, None]:
-        self._analyse()
+        if not self._is_lazy():
+            self._analyse()
+        elif (package_name, resource_type) not in self._indexed_keys:
+            # only index the keys of the requested type
+            self._indexed_keys.add((package_name, resource_type))
+            keys = self.resource_keys[package_name][resource_type]
+            for chunk in self._type_chunks.get(package_name, ()):
+                if chunk[1].get_type() == resource_type:
+                    for name, _, res_id in self._iter_entry_keys(chunk):
+                        keys[name] = res_id
         try:
             return self.resource_keys[package_name][resource_type][key]
         except KeyError:
@@ -2960,6 +3268,16 @@ class ARSCResType:
     See http://androidxref.com/9.0.0_r3/xref/frameworks/base/libs/androidfw/include/androidfw/ResourceTypes.h#1364
     """
 
+    # If set, the entry offsets are a sorted list of (index, offset/4)
+    # pairs, only containing the existing entries
+    FLAG_SPARSE = 0x01
+
+    # If set, the entry offsets are 16 bit, holding the offset/4
+    FLAG_OFFSET16 = 0x02
+
+    NO_ENTRY_16 = 0xFFFF
+    NO_ENTRY_32 = 0xFFFFFFFF
+
     def __init__(
         self, buff: BinaryIO, parent: Union[PackageContext, None] = None
     ) -> None:
@@ -2967,7 +3285,6 @@ class ARSCResType:
         self.parent = parent
 
         self.id = unpack('<B', buff.read(1))[0]
-        # TODO there is now FLAG_SPARSE: http://androidxref.com/9.0.0_r3/xref/frameworks/base/libs/androidfw/include/androidfw/ResourceTypes.h#1401
         (self.flags,) = unpack('<B', buff.read(1))
         self.reserved = unpack('<H', buff.read(2))[0]
         if self.reserved != 0:
@@ -2980,9 +3297,18 @@ class ARSCResType:
         self.parent.set_mResId(self.mResId)
 
         self.config = ARSCResTableConfig(buff)
+        # the entry offsets follow the config
+        self.offsets_start = buff.tell()
 
         logger.debug("Parsed {}".format(self))
 
+    def get_entries_start(self) -> int:
+        """
+        Return the absolute offset of the entries of this type.
+        """
+        # start points behind the ResChunk_header
+        return self.start - ARSCHeader.SIZE + self.entriesStart
+
     def get_type(self) -> str:
         return self.parent.mTableStrings.getString(self.id - 1)
 
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import binascii
+import collections
 import hashlib
 import io
 import re
@@ -229,6 +230,10 @@ def get_byte(cm: ClassManager, buff: BinaryIO) -> int:
     return cm.packer["B"].unpack(buff.read(1))[0]
 
 
+# The message of the struct.error raised by get_byte at the end of the data
+_LEB128_EOF = "unpack requires a buffer of 1 bytes"
+
+
 def readuleb128(cm: ClassManager, buff: BinaryIO) -> int:
     """
     Read an unsigned LEB128 at the current position of the buffer
@@ -236,21 +241,28 @@ def readuleb128(cm: ClassManager, buff: BinaryIO) -> int:
     :param buff: a file like object
     :returns: decoded unsigned LEB128
     """
-    result = get_byte(cm, buff)
-    if result > 0x7F:
-        cur = get_byte(cm, buff)
-        result = (result & 0x7F) | ((cur & 0x7F) << 7)
-        if cur > 0x7F:
-            cur = get_byte(cm, buff)
-            result |= (cur & 0x7F) << 14
+    # Indexing the read bytes is much faster than unpacking them
+    # and raises IndexError instead of struct.error at the end of the data
+    try:
+        result = buff.read(1)[0]
+        if result > 0x7F:
+            cur = buff.read(1)[0]
+            result = (result & 0x7F) | ((cur & 0x7F) << 7)
             if cur > 0x7F:
-                cur = get_byte(cm, buff)
-                result |= (cur & 0x7F) << 21
+                cur = buff.read(1)[0]
+                result |= (cur & 0x7F) << 14
                 if cur > 0x7F:
-                    cur = get_byte(cm, buff)
-                    if cur > 0x0F:
-                        logger.warning("possible error while decoding number")
-                    result |= cur << 28
+                    cur = buff.read(1)[0]
+                    result |= (cur & 0x7F) << 21
+                    if cur > 0x7F:
+                        cur = buff.read(1)[0]
+                        if cur > 0x0F:
+                            logger.warning(
+                                "possible error while decoding number"
+                            )
+                        result |= cur << 28
+    except IndexError:
+        raise struct.error(_LEB128_EOF) from None
 
     return result
 
@@ -277,7 +289,10 @@ def readsleb128(cm: ClassManager, buff: BinaryIO) -> int:
     shift = 0
 
     for x in range(0, 5):
-        cur = get_byte(cm, buff)
+        try:
+            cur = buff.read(1)[0]
+        except IndexError:
+            raise struct.error(_LEB128_EOF) from None
         result |= (cur & 0x7F) << shift
         shift += 7
 
@@ -1690,9 +1705,10 @@ class DebugInfoItemEmpty:
 
         self.offset = buff.tell()
         self.__buff = buff
-        self.__raw = ""
+        self.__raw = None
 
-        self.reload()
+        if not cm.lazy:
+            self.reload()
 
     def set_off(self, off: int):
         self.offset = off
@@ -1717,10 +1733,12 @@ class DebugInfoItemEmpty:
         return []
 
     def get_raw(self):
+        if self.__raw is None:
+            self.reload()
         return self.__raw
 
     def get_length(self):
-        return len(self.__raw)
+        return len(self.get_raw())
 
 
 class EncodedArray:
@@ -2173,6 +2191,10 @@ class StringDataItem:
 
         :returns: string
         """
+        # MUTF-8 only differs from ASCII for non ASCII characters and for
+        # the null character, which is encoded with two bytes
+        if self.data.isascii():
+            return self.data.decode('ascii')
         try:
             return mutf8.decode(self.data)
         except UnicodeDecodeError:
@@ -3878,7 +3900,8 @@ class ClassDefItem:
         ) = cm.packer["8I"].unpack(buff.read(32))
 
         self.interfaces = []
-        self.class_data_item = None
+        self._class_data_item = None
+        self._class_data_loaded = False
         self.static_values = None
         self.annotations_directory_item = None
 
@@ -3893,11 +3916,6 @@ class ClassDefItem:
         self.sname = self.CM.get_type(self.superclass_idx)
         self.interfaces = self.CM.get_type_list(self.interfaces_off)
 
-        if self.class_data_off != 0:
-            self.class_data_item = self.CM.get_class_data_item(
-                self.class_data_off
-            )
-
         if self.annotations_off != 0:
             self.annotations_directory_item = (
                 self.CM.get_annotations_directory_item(self.annotations_off)
@@ -3908,11 +3926,33 @@ class ClassDefItem:
                 self.static_values_off
             )
 
-            if self.class_data_item:
-                self.class_data_item.set_static_fields(
+        self._class_data_item = None
+        self._class_data_loaded = False
+        if not self.CM.lazy:
+            self._load_class_data_item()
+
+    def _load_class_data_item(self) -> None:
+        self._class_data_loaded = True
+        if self.class_data_off != 0:
+            self._class_data_item = self.CM.get_class_data_item(
+                self.class_data_off
+            )
+
+            if self._class_data_item and self.static_values:
+                self._class_data_item.set_static_fields(
                     self.static_values.get_value()
                 )
 
+    @property
+    def class_data_item(self) -> Union[ClassDataItem, None]:
+        """
+        The `ClassDataItem` of this class, or None if the class has no data.
+        In lazy mode, it is parsed on first access.
+        """
+        if not self._class_data_loaded:
+            self._load_class_data_item()
+        return self._class_data_item
+
     def __str__(self):
         return "{}->{}".format(self.get_superclassname(), self.get_name())
 
@@ -4540,8 +4580,9 @@ class Instruction:
     we are not bound to specific size.
     """
 
+    __slots__ = ("cm", "OP")
+
     length = 0
-    OP = 0
 
     def get_kind(self) -> int:
         """
@@ -4552,9 +4593,7 @@ class Instruction:
 
         :returns: the kind
         """
-        if self.OP >= 0xF2FF:
-            return DALVIK_OPCODES_OPTIMIZED[self.OP][1][1]
-        return DALVIK_OPCODES_FORMAT[self.OP][1][1]
+        return DALVIK_OPCODES_INFO[self.OP][1]
 
     def get_name(self) -> str:
         """
@@ -4562,9 +4601,7 @@ class Instruction:
 
         :returns: the mnemonic
         """
-        if self.OP >= 0xF2FF:
-            return DALVIK_OPCODES_OPTIMIZED[self.OP][1][0]
-        return DALVIK_OPCODES_FORMAT[self.OP][1][0]
+        return DALVIK_OPCODES_INFO[self.OP][0]
 
     def get_op_value(self) -> int:
         """
@@ -4687,6 +4724,17 @@ class FillArrayData:
     :param buff: a Buff object which represents a buffer where the instruction is stored
     """
 
+    __slots__ = (
+        "OP",
+        "notes",
+        "CM",
+        "format_general_size",
+        "ident",
+        "element_width",
+        "size",
+        "data",
+    )
+
     # FIXME: why is this not a subclass of Instruction?
     def __init__(self, cm: ClassManager, buff: BinaryIO) -> None:
         self.OP = 0x0
@@ -4702,9 +4750,9 @@ class FillArrayData:
         if buf_len % 2:
             buf_len += 1
 
-        self.data = buff[
-            self.format_general_size : self.format_general_size + buf_len
-        ]
+        self.data = bytes(
+            buff[self.format_general_size : self.format_general_size + buf_len]
+        )
 
     def add_note(self, msg: str) -> None:
         """
@@ -4833,6 +4881,17 @@ class SparseSwitch:
     :param buff: a Buff object which represents a buffer where the instruction is stored
     """
 
+    __slots__ = (
+        "OP",
+        "notes",
+        "CM",
+        "format_general_size",
+        "ident",
+        "size",
+        "keys",
+        "targets",
+    )
+
     # FIXME: why is this not a subclass of Instruction?
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
         self.OP = 0x0
@@ -4973,6 +5032,17 @@ class PackedSwitch:
     :param buff: a Buff object which represents a buffer where the instruction is stored
     """
 
+    __slots__ = (
+        "OP",
+        "notes",
+        "CM",
+        "format_general_size",
+        "ident",
+        "size",
+        "first_key",
+        "targets",
+    )
+
     # FIXME: why is this not a subclass of Instruction?
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
         self.OP = 0x0
@@ -5114,10 +5184,11 @@ class Instruction35c(Instruction):
     This class represents all instructions which have the 35c format
     """
 
+    __slots__ = ("BBBB", "G", "A", "C", "D", "E", "F")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         i16a, self.BBBB, i16b = cm.packer["3H"].unpack(buff[: self.length])
@@ -5231,10 +5302,11 @@ class Instruction10x(Instruction):
     This class represents all instructions which have the 10x format
     """
 
+    __slots__ = ()
+
     length = 2
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, padding = cm.packer["BB"].unpack(buff[: self.length])
@@ -5252,10 +5324,11 @@ class Instruction21h(Instruction):
     This class represents all instructions which have the 21h format
     """
 
+    __slots__ = ("AA", "__BBBB", "BBBB")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.__BBBB = cm.packer["BBh"].unpack(
@@ -5290,10 +5363,11 @@ class Instruction11n(Instruction):
     This class represents all instructions which have the 11n format
     """
 
+    __slots__ = ("A", "B")
+
     length = 2
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, i8 = cm.packer["Bb"].unpack(buff[: self.length])
@@ -5321,10 +5395,11 @@ class Instruction21c(Instruction):
     This class represents all instructions which have the 21c format
     """
 
+    __slots__ = ("AA", "BBBB")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
         self.OP, self.AA, self.BBBB = cm.packer["BBH"].unpack(
             buff[: self.length]
@@ -5361,10 +5436,11 @@ class Instruction21s(Instruction):
     This class represents all instructions which have the 21s format
     """
 
+    __slots__ = ("AA", "BBBB")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> bytes:
-        super().__init__()
         self.cm = cm
 
         # BBBB is a signed int (16bit)
@@ -5390,10 +5466,11 @@ class Instruction22c(Instruction):
     This class represents all instructions which have the 22c format
     """
 
+    __slots__ = ("CCCC", "A", "B")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         i16, self.CCCC = cm.packer["2H"].unpack(buff[: self.length])
@@ -5427,10 +5504,11 @@ class Instruction22cs(Instruction):
     This class represents all instructions which have the 22cs format
     """
 
+    __slots__ = ("CCCC", "A", "B")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> str:
-        super().__init__()
         self.cm = cm
 
         i16, self.CCCC = cm.packer["2H"].unpack(buff[: self.length])
@@ -5464,10 +5542,11 @@ class Instruction31t(Instruction):
     This class represents all instructions which have the 31t format
     """
 
+    __slots__ = ("AA", "BBBBBBBB")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBBBBBB = cm.packer["BBi"].unpack(
@@ -5494,10 +5573,11 @@ class Instruction31c(Instruction):
     This class represents all instructions which have the 31c format
     """
 
+    __slots__ = ("AA", "BBBBBBBB")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
         self.OP, self.AA, self.BBBBBBBB = cm.packer["BBi"].unpack(
             buff[: self.length]
@@ -5539,10 +5619,11 @@ class Instruction12x(Instruction):
     This class represents all instructions which have the 12x format
     """
 
+    __slots__ = ("A", "B")
+
     length = 2
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         (i16,) = cm.packer["h"].unpack(buff[: self.length])
@@ -5567,10 +5648,11 @@ class Instruction11x(Instruction):
     This class represents all instructions which have the 11x format
     """
 
+    __slots__ = ("AA",)
+
     length = 2
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA = cm.packer["BB"].unpack(buff[: self.length])
@@ -5590,10 +5672,11 @@ class Instruction51l(Instruction):
     This class represents all instructions which have the 51l format
     """
 
+    __slots__ = ("AA", "BBBBBBBBBBBBBBBB")
+
     length = 10
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         # arbitrary double-width (64-bit) constant
@@ -5624,10 +5707,11 @@ class Instruction31i(Instruction):
     This class represents all instructions which have the 31i format
     """
 
+    __slots__ = ("AA", "BBBBBBBB")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBBBBBB = cm.packer["BBi"].unpack(
@@ -5656,10 +5740,11 @@ class Instruction22x(Instruction):
     This class represents all instructions which have the 22x format
     """
 
+    __slots__ = ("AA", "BBBB")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB = cm.packer["BBH"].unpack(
@@ -5681,10 +5766,11 @@ class Instruction23x(Instruction):
     This class represents all instructions which have the 23x format
     """
 
+    __slots__ = ("AA", "BB", "CC")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BB, self.CC = cm.packer["BBBB"].unpack(
@@ -5712,10 +5798,11 @@ class Instruction20t(Instruction):
     This class represents all instructions which have the 20t format
     """
 
+    __slots__ = ("AAAA",)
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, padding, self.AAAA = cm.packer["BBh"].unpack(
@@ -5745,10 +5832,11 @@ class Instruction21t(Instruction):
     This class represents all instructions which have the 21t format
     """
 
+    __slots__ = ("AA", "BBBB")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB = cm.packer["BBh"].unpack(
@@ -5773,10 +5861,11 @@ class Instruction10t(Instruction):
     This class represents all instructions which have the 10t format
     """
 
+    __slots__ = ("AA",)
+
     length = 2
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA = cm.packer["Bb"].unpack(buff[: self.length])
@@ -5800,10 +5889,11 @@ class Instruction22t(Instruction):
     This class represents all instructions which have the 22t format
     """
 
+    __slots__ = ("CCCC", "A", "B")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         i16, self.CCCC = cm.packer["Hh"].unpack(buff[: self.length])
@@ -5835,10 +5925,11 @@ class Instruction22s(Instruction):
     This class represents all instructions which have the 22s format
     """
 
+    __slots__ = ("CCCC", "A", "B")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         i16, self.CCCC = cm.packer["Hh"].unpack(buff[: self.length])
@@ -5870,10 +5961,11 @@ class Instruction22b(Instruction):
     This class represents all instructions which have the 22b format
     """
 
+    __slots__ = ("AA", "BB", "CC")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BB, self.CC = cm.packer["BBBb"].unpack(
@@ -5904,10 +5996,11 @@ class Instruction30t(Instruction):
     This class represents all instructions which have the 30t format
     """
 
+    __slots__ = ("AAAAAAAA",)
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, padding, self.AAAAAAAA = cm.packer["BBi"].unpack(
@@ -5936,10 +6029,11 @@ class Instruction3rc(Instruction):
     This class represents all instructions which have the 3rc format
     """
 
+    __slots__ = ("AA", "BBBB", "CCCC", "NNNN")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB, self.CCCC = cm.packer["BBHH"].unpack(
@@ -5977,10 +6071,11 @@ class Instruction32x(Instruction):
     This class represents all instructions which have the 32x format
     """
 
+    __slots__ = ("AAAA", "BBBB")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, padding, self.AAAA, self.BBBB = cm.packer["BBHH"].unpack(
@@ -6006,10 +6101,11 @@ class Instruction20bc(Instruction):
     This class represents all instructions which have the 20bc format
     """
 
+    __slots__ = ("AA", "BBBB")
+
     length = 4
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB = cm.packer["BBH"].unpack(
@@ -6031,10 +6127,11 @@ class Instruction35mi(Instruction):
     This class represents all instructions which have the 35mi format
     """
 
+    __slots__ = ("BBBB", "G", "A", "C", "D", "E", "F")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         i16a, self.BBBB, i16b = cm.packer["3H"].unpack(buff[: self.length])
@@ -6141,10 +6238,11 @@ class Instruction35ms(Instruction):
     This class represents all instructions which have the 35ms format
     """
 
+    __slots__ = ("BBBB", "G", "A", "C", "D", "E", "F")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         i16a, self.BBBB, i16b = cm.packer["3H"].unpack(buff[: self.length])
@@ -6253,10 +6351,11 @@ class Instruction3rmi(Instruction):
     Note, this instruction is similar to 3rc but holds an inline
     """
 
+    __slots__ = ("AA", "BBBB", "CCCC", "NNNN")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB, self.CCCC = cm.packer["BBHH"].unpack(
@@ -6305,10 +6404,11 @@ class Instruction3rms(Instruction):
     Note, this instruction is similar to 3rc but holds a vtaboff
     """
 
+    __slots__ = ("AA", "BBBB", "CCCC", "NNNN")
+
     length = 6
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB, self.CCCC = cm.packer["BBHH"].unpack(
@@ -6357,10 +6457,11 @@ class Instruction41c(Instruction):
     This instruction is only used in ODEX
     """
 
+    __slots__ = ("BBBBBBBB", "AAAA")
+
     length = 8
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.BBBBBBBB, self.AAAA = cm.packer["HIH"].unpack(
@@ -6392,10 +6493,11 @@ class Instruction40sc(Instruction):
     This instruction is only used in ODEX
     """
 
+    __slots__ = ("BBBBBBBB", "AAAA")
+
     length = 8
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.BBBBBBBB, self.AAAA = cm.packer["HIH"].unpack(
@@ -6427,10 +6529,11 @@ class Instruction52c(Instruction):
     This instruction is only used in ODEX
     """
 
+    __slots__ = ("CCCCCCCC", "AAAA", "BBBB")
+
     length = 10
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         # FIXME: Not in the documentation!
@@ -6467,10 +6570,11 @@ class Instruction5rc(Instruction):
     This instruction is only used in ODEX
     """
 
+    __slots__ = ("BBBBBBBB", "AAAA", "CCCC", "NNNN")
+
     length = 10
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.BBBBBBBB, self.AAAA, self.CCCC = cm.packer[
@@ -6513,11 +6617,12 @@ class Instruction5rc(Instruction):
 
 
 class Instruction45cc(Instruction):
+    __slots__ = ("BBBB", "HHHH", "A", "G", "D", "C", "F", "E")
+
     length = 8
 
     # FIXME!!!
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         # Note: the documentation says A|G|op|BBBB ... but we need to parse op|A|G because of LE
@@ -6578,11 +6683,12 @@ class Instruction45cc(Instruction):
 
 
 class Instruction4rcc(Instruction):
+    __slots__ = ("AA", "BBBB", "CCCC", "HHHH", "NNNN")
+
     length = 8
 
     # FIXME!!!
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
-        super().__init__()
         self.cm = cm
 
         self.OP, self.AA, self.BBBB, self.CCCC, self.HHHH = self.cm.packer[
@@ -6609,6 +6715,8 @@ class Instruction4rcc(Instruction):
 class Instruction00x(Instruction):
     """A class for unused instructions, has zero length and raises an error on initialization"""
 
+    __slots__ = ()
+
     length = 0
 
     def __init__(self, cm: ClassManager, buff: bytes) -> None:
@@ -6960,6 +7068,20 @@ DALVIK_OPCODES_OPTIMIZED = {
     0xFFFF: [Instruction40sc, ["throw-verification-error/jumbo", Kind.VARIES]],
 }
 
+# Mnemonic and kind of each opcode value, shared by all Instruction objects.
+# Opcodes from 0xF2FF on are the optimized ones.
+DALVIK_OPCODES_INFO = {
+    op: items[1] for op, items in DALVIK_OPCODES_FORMAT.items() if op < 0xF2FF
+}
+DALVIK_OPCODES_INFO.update(
+    (op, items[1])
+    for op, items in DALVIK_OPCODES_OPTIMIZED.items()
+    if op >= 0xF2FF
+)
+
+# Number of bytes of the bytecode shown in the error of invalid instructions
+MAX_INSTRUCTION_REPR = 16
+
 
 def get_instruction(
     cm: ClassManager, op_value: int, buff: bytearray
@@ -6979,7 +7101,7 @@ def get_instruction(
         # FIXME: there are other possible errors too...
         raise InvalidInstruction(
             "Invalid Instruction for '0x{:02x}': {}".format(
-                op_value, repr(buff)
+                op_value, repr(bytes(buff[:MAX_INSTRUCTION_REPR]))
             )
         )
 
@@ -7001,7 +7123,7 @@ def get_optimized_instruction(
         # FIXME: there are other possible errors too...
         raise InvalidInstruction(
             "Invalid Instruction for '0x{:04x}': {}".format(
-                op_value, repr(buff)
+                op_value, repr(bytes(buff[:MAX_INSTRUCTION_REPR]))
             )
         )
 
@@ -7015,7 +7137,7 @@ def get_instruction_payload(
         # FIXME: there are other possible errors too...
         raise InvalidInstruction(
             "Invalid Instruction for '0x{:04x}': {}".format(
-                op_value, repr(buff)
+                op_value, repr(bytes(buff[:MAX_INSTRUCTION_REPR]))
             )
         )
 
@@ -7046,12 +7168,17 @@ class LinearSweepAlgorithm:
         """
         is_odex = cm.get_odex_format()
 
+        # All instructions get a view of the remaining bytecode, slicing a
+        # memoryview does not copy the buffer.
+        view = memoryview(insn)
+        unpack_from = cm.packer['H'].unpack_from
+
         max_idx = size * calcsize('H')
-        if max_idx > len(insn):
+        if max_idx > len(view):
             logger.warning(
                 "Declared size of instructions is larger than the bytecode!"
             )
-            max_idx = len(insn)
+            max_idx = len(view)
 
         # Get instructions
         # TODO sometimes there are padding bytes after the last instruction, to ensure 16bit alignment.
@@ -7059,25 +7186,34 @@ class LinearSweepAlgorithm:
             # Get one 16bit unit
             # TODO: possible optimization; instead of reading the first 16 bits twice,
             #       just push this into the Instruction's constructor
-            (op_value,) = cm.packer['H'].unpack(insn[idx : idx + 2])
+            try:
+                (op_value,) = unpack_from(view, idx)
+            except struct.error:
+                raise InvalidInstruction(
+                    "Invalid instruction encountered! Stop parsing bytecode at idx %s. Message: %s",
+                    idx,
+                    "Incomplete opcode",
+                )
 
             try:
                 if op_value > 0xFF and (op_value & 0xFF) in (0x00, 0xFF):
                     # FIXME: in theory, it could happen that this is a normal opcode? I.e. a 0xff opcode with AA being non zero
                     if op_value in DALVIK_OPCODES_PAYLOAD:
                         # payload instructions, i.e. for arrays or switch
-                        obj = get_instruction_payload(op_value, cm, insn[idx:])
+                        obj = get_instruction_payload(
+                            op_value, cm, view[idx:]
+                        )
                     elif is_odex and (op_value in DALVIK_OPCODES_OPTIMIZED):
                         # optimized instructions, only of ODEX file
                         obj = get_optimized_instruction(
-                            cm, op_value, insn[idx:]
+                            cm, op_value, view[idx:]
                         )
                     else:
                         raise InvalidInstruction(
                             "Unknown Instruction '0x{:04x}'".format(op_value)
                         )
                 else:
-                    obj = get_instruction(cm, op_value & 0xFF, insn[idx:])
+                    obj = get_instruction(cm, op_value & 0xFF, view[idx:])
             except InvalidInstruction as e:
                 raise InvalidInstruction(
                     "Invalid instruction encountered! Stop parsing bytecode at idx %s. Message: %s",
@@ -7539,9 +7675,13 @@ class CodeItem:
 
         self.offset = buff.tell()
 
-        self.code = []
         self.__code_off = {}
 
+        if cm.lazy:
+            self.code = LazyItemList(DalvikCode, size, buff, cm, alignment=4)
+            return
+
+        self.code = []
         for i in range(0, size):
             # As we read the DalvikCode items from the map, there might be
             # padding bytes in between.
@@ -7561,6 +7701,8 @@ class CodeItem:
         return self.offset
 
     def get_code(self, off: int) -> DalvikCode:
+        if self.CM.lazy:
+            return self.code.get_item(off)
         try:
             return self.__code_off[off]
         except KeyError:
@@ -7592,6 +7734,109 @@ class CodeItem:
         return length
 
 
+class LazyItemList:
+    """
+    The items of a [MapItem][androguard.core.dex.MapItem] if the `DEX` is parsed lazily.
+
+    Single items are only parsed when they are requested by their offset
+    using [get_item][androguard.core.dex.LazyItemList.get_item].
+    The whole list is only parsed when it is iterated over.
+    Items are never parsed twice, hence there is always only one object per item.
+    """
+
+    def __init__(
+        self,
+        item_type: type,
+        size: int,
+        buff: BinaryIO,
+        cm: ClassManager,
+        alignment: int = 1,
+    ) -> None:
+        """
+        :param item_type: class of the items, called with a buffer and the `ClassManager`
+        :param size: number of items
+        :param buff: the buffer, at the position of the first item
+        :param cm: the `ClassManager`
+        :param alignment: alignment of the items in bytes
+        """
+        self.CM = cm
+        self.item_type = item_type
+        self.size = size
+        self.offset = buff.tell()
+        self.alignment = alignment
+
+        self.__items = None
+        # offset -> (item, end offset)
+        self.__items_off = {}
+
+    def _parse_item(self, buff: BinaryIO) -> object:
+        off = buff.tell()
+        if off not in self.__items_off:
+            item = self.item_type(buff, self.CM)
+            self.__items_off[off] = (item, buff.tell())
+        item, end = self.__items_off[off]
+        buff.seek(end)
+        return item
+
+    def get_item(self, off: int) -> Union[object, None]:
+        """
+        Return the item at offset `off`, parse it if required.
+
+        :param off: offset of the item in the DEX file
+        :returns: the item or None if it can not be parsed
+        """
+        if off < self.offset:
+            # Can not be an item of this list
+            return None
+
+        buff = self.CM.get_lazy_buff()
+        buff.seek(off)
+        try:
+            return self._parse_item(buff)
+        except Exception as e:
+            logger.warning(
+                "Could not parse {} @ 0x{:x}: {}".format(
+                    self.item_type.__name__, off, e
+                )
+            )
+            return None
+
+    def get_items(self) -> list[object]:
+        """
+        Return all items, parse all missing ones.
+
+        :returns: the list of items
+        """
+        if self.__items is None:
+            buff = self.CM.get_lazy_buff()
+            buff.seek(self.offset)
+
+            items = []
+            for _ in range(self.size):
+                off = buff.tell()
+                if off % self.alignment != 0:
+                    buff.seek(off + (self.alignment - (off % self.alignment)))
+                items.append(self._parse_item(buff))
+            self.__items = items
+        return self.__items
+
+    def get_off(self) -> int:
+        return self.offset
+
+    def show(self) -> None:
+        for i in self.get_items():
+            i.show()
+
+    def __iter__(self) -> Iterator[object]:
+        return iter(self.get_items())
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, idx: int) -> object:
+        return self.get_items()[idx]
+
+
 class MapItem:
     def __init__(self, buff: bytes, cm: ClassManager) -> None:
         """
@@ -7721,7 +7966,12 @@ class MapItem:
         elif TypeMapItem.STRING_DATA_ITEM == self.type:
             # Byte aligned
             buff.seek(self.offset)
-            self.item = [StringDataItem(buff, cm) for _ in range(self.size)]
+            if cm.lazy:
+                self.item = LazyItemList(StringDataItem, self.size, buff, cm)
+            else:
+                self.item = [
+                    StringDataItem(buff, cm) for _ in range(self.size)
+                ]
 
         elif TypeMapItem.DEBUG_INFO_ITEM == self.type:
             # Byte aligned
@@ -7736,7 +7986,12 @@ class MapItem:
         elif TypeMapItem.CLASS_DATA_ITEM == self.type:
             # Byte aligned
             buff.seek(self.offset)
-            self.item = [ClassDataItem(buff, cm) for _ in range(self.size)]
+            if cm.lazy:
+                self.item = LazyItemList(ClassDataItem, self.size, buff, cm)
+            else:
+                self.item = [
+                    ClassDataItem(buff, cm) for _ in range(self.size)
+                ]
 
         elif TypeMapItem.MAP_LIST == self.type:
             # 4-byte aligned
@@ -7837,8 +8092,10 @@ class ClassManager:
 
         if self.vm:
             self.odex_format = self.vm.get_format_type() == "ODEX"
+            self.lazy = self.vm.lazy
         else:
             self.odex_format = False
+            self.lazy = False
 
     @property
     def packer(self):
@@ -7878,8 +8135,23 @@ class ClassManager:
         return self.__item_offset[offset]
 
     def get_string_by_offset(self, offset: int) -> object:
+        if self.lazy:
+            return self.__manage_item[TypeMapItem.STRING_DATA_ITEM].get_item(
+                offset
+            )
         return self.__strings_off[offset]
 
+    def get_lazy_buff(self) -> BinaryIO:
+        """
+        Return a new buffer of the whole DEX file, used to parse
+        items on demand if the `DEX` is parsed lazily.
+        Each call returns a new buffer, so parsing an item does not change
+        the position of any other buffer.
+
+        :returns: the buffer
+        """
+        return io.BytesIO(self.vm.lazy_buff)
+
     def set_decompiler(self, decompiler: DecompilerDAD) -> None:
         self.decompiler_ob = decompiler
 
@@ -7922,7 +8194,10 @@ class ClassManager:
             return None
 
     def get_class_data_item(self, off: int) -> ClassDataItem:
-        i = self.__classdata_off.get(off)
+        if self.lazy:
+            i = self.__manage_item[TypeMapItem.CLASS_DATA_ITEM].get_item(off)
+        else:
+            i = self.__classdata_off.get(off)
         if i is None:
             logger.warning("unknown class data item @ 0x%x" % off)
         return i
@@ -7990,11 +8265,15 @@ class ClassManager:
             logger.warning("unknown string item @ %d" % idx)
             return "AG:IS: invalid string"
 
-        try:
-            return self.__strings_off[off].get()
-        except KeyError:
+        if self.lazy:
+            string_data = self.get_string_by_offset(off)
+        else:
+            string_data = self.__strings_off.get(off)
+
+        if string_data is None:
             logger.warning("unknown string item @ 0x%x(%d)" % (off, idx))
             return "AG:IS: invalid string"
+        return string_data.get()
 
     def get_type_list(self, off: int) -> list[str]:
         if off == 0:
@@ -8079,6 +8358,8 @@ class ClassManager:
         if python_export:
             self.vm._create_python_export_class(class_def)
 
+        self._flush_vm()
+
     def set_hook_method_name(
         self, encoded_method: EncodedMethod, value: str
     ) -> None:
@@ -8141,6 +8422,7 @@ class ClassManager:
                 logger.debug("skipping creating new name in python")
 
         method.reload()
+        self._flush_vm()
 
     def set_hook_field_name(
         self, encoded_field: EncodedField, value: str
@@ -8173,6 +8455,14 @@ class ClassManager:
                 setattr(class_def.F, name, encoded_field)
 
         field.reload()
+        self._flush_vm()
+
+    def _flush_vm(self) -> None:
+        """
+        Flush the name based caches of the `DEX` after a rename
+        """
+        if self.vm:
+            self.vm._flush()
 
     def set_hook_string(self, idx: int, value: str) -> None:
         self.hook_strings[idx] = value
@@ -8327,7 +8617,20 @@ class DEX:
         decompiler: Union[DecompilerDAD, None] = None,
         config=None,
         using_api: Union[int, None] = None,
+        lazy: bool = False,
     ) -> None:
+        """
+        In lazy mode, the items which make up most of a DEX file
+        (`ClassDataItem`, `DalvikCode`, debug info and `StringDataItem`)
+        are only parsed on first access.
+        This is useful if only a few classes are required.
+
+        :param buff: the bytes of the DEX file or an `APK`
+        :param decompiler: associate a decompiler object to display the java source code
+        :param config: unused
+        :param using_api: the API level to use, otherwise the default one
+        :param lazy: parse the items on demand (default: False)
+        """
         logger.debug("DEX {} {} {}".format(decompiler, config, using_api))
 
         # to allow to pass apk object ==> we do not need to pass additionally target version
@@ -8339,6 +8642,11 @@ class DEX:
         else:
             self.api_version = CONF["DEFAULT_API"]
 
+        self.lazy = lazy
+        # In lazy mode, the items are parsed from the original buffer,
+        # which is shared (and not copied) as long as it is bytes
+        self.lazy_buff = bytes(buff) if lazy else None
+
         self.raw = io.BufferedReader(io.BytesIO(buff))
 
         self._flush()
@@ -8397,6 +8705,12 @@ class DEX:
         self.__cache_all_methods = None
         self.__cache_all_fields = None
 
+        # indexes by class name and by (class name, method name)
+        self.__cache_classes = None
+        self.__cache_methods_class = None
+        self.__cache_fields_class = None
+        self.__cache_methods_class_method = None
+
     @property
     def version(self) -> int:
         """
@@ -8508,7 +8822,7 @@ class DEX:
         for i in self.map_list.get_obj():
             length = 0
 
-            if isinstance(i, list):
+            if isinstance(i, (list, LazyItemList)):
                 for j in i:
                     if isinstance(j, AnnotationsDirectoryItem):
                         if idx % 4 != 0:
@@ -8676,10 +8990,13 @@ class DEX:
 
         :returns: a `ClassDefItem`
         """
-        for i in self.get_classes():
-            if i.get_name() == name:
-                return i
-        return None
+        if self.__cache_classes is None:
+            self.__cache_classes = {}
+            for i in self.get_classes():
+                # keep the first class, if the name is used twice
+                self.__cache_classes.setdefault(i.get_name(), i)
+
+        return self.__cache_classes.get(name)
 
     def get_field(self, name: str) -> list[FieldIdItem]:
         """get field id item by name
@@ -8882,13 +9199,14 @@ class DEX:
 
         :returns: `None` or a `EncodedMethod` object
         """
-        for i in self.get_encoded_methods():
-            if (
-                i.get_name() == method_name
-                and i.get_class_name() == class_name
-            ):
-                return i
-        return None
+        if self.__cache_methods_class_method is None:
+            self.__cache_methods_class_method = {}
+            for i in self.get_encoded_methods():
+                self.__cache_methods_class_method.setdefault(
+                    (i.get_class_name(), i.get_name()), i
+                )
+
+        return self.__cache_methods_class_method.get((class_name, method_name))
 
     def get_encoded_methods_class(
         self, class_name: str
@@ -8900,11 +9218,12 @@ class DEX:
 
         :returns: a list with `EncodedMethod` objects
         """
-        l = []
-        for i in self.get_encoded_methods():
-            if class_name == i.get_class_name():
-                l.append(i)
-        return l
+        if self.__cache_methods_class is None:
+            self.__cache_methods_class = collections.defaultdict(list)
+            for i in self.get_encoded_methods():
+                self.__cache_methods_class[i.get_class_name()].append(i)
+
+        return list(self.__cache_methods_class.get(class_name, []))
 
     def get_encoded_fields_class(self, class_name: str) -> list[EncodedField]:
         """
@@ -8914,11 +9233,12 @@ class DEX:
 
         :returns: a list with `EncodedField` objects
         """
-        l = []
-        for i in self.get_encoded_fields():
-            if class_name == i.get_class_name():
-                l.append(i)
-        return l
+        if self.__cache_fields_class is None:
+            self.__cache_fields_class = collections.defaultdict(list)
+            for i in self.get_encoded_fields():
+                self.__cache_fields_class[i.get_class_name()].append(i)
+
+        return list(self.__cache_fields_class.get(class_name, []))
 
     def get_encoded_field_descriptor(
         self, class_name: str, field_name: str, descriptor: str
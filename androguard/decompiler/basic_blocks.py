@@ -31,7 +31,8 @@ class BasicBlock(Node):
         self.ins = block_ins
         self.ins_range = None
         self.loc_ins = None
-        self.var_to_declare = set()
+        # a dict keeps the order of the declarations deterministic
+        self.var_to_declare = {}
         self.catch_type = None
 
     def get_ins(self) -> list:
@@ -51,7 +52,7 @@ class BasicBlock(Node):
             self.ins.append(new_ins)
 
     def add_variable_declaration(self, variable):
-        self.var_to_declare.add(variable)
+        self.var_to_declare[variable] = None
 
     def number_ins(self, num: int) -> int:
         last_ins_num = num + len(self.ins)
@@ -0,0 +1,215 @@
+# This file is part of Androguard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Allows type hinting of types not-yet-declared
+# in Python >= 3.7
+# see https://peps.python.org/pep-0563/
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from androguard.core.analysis.analysis import MethodAnalysis
+
+from loguru import logger
+
+from androguard import __version__
+from androguard.core import dex
+
+# Bump this if the format of the cached entries changes
+CACHE_VERSION = 1
+
+
+def get_method_key(methanalysis: MethodAnalysis) -> str:
+    """
+    Compute the cache key of a method.
+
+    The key is a hash over everything the decompiled method depends on:
+    the signature and access flags of the method, the size of its
+    registers, its instructions with all referenced strings, types, fields
+    and methods resolved to their names, and its exception handlers.
+    Hence identical methods in different versions of an application get
+    the same key, even if the indices in their DEX files differ.
+
+    :param androguard.core.analysis.analysis.MethodAnalysis methanalysis:
+    :return: the key as hex string
+    """
+    method = methanalysis.get_method()
+    h = hashlib.sha256()
+
+    def update(*values):
+        for value in values:
+            h.update(str(value).encode('utf-8', 'surrogatepass'))
+            h.update(b'\x00')
+
+    update(
+        __version__,
+        CACHE_VERSION,
+        method.get_class_name(),
+        method.get_name(),
+        method.get_descriptor(),
+        method.get_access_flags(),
+    )
+
+    code = method.get_code()
+    if code is None:
+        return h.hexdigest()
+
+    update(code.get_registers_size(), code.get_ins_size())
+    for ins in method.get_instructions():
+        update(ins.get_name(), ins.get_output())
+    update(dex.determineException(method.CM.vm, method))
+    return h.hexdigest()
+
+
+class DecompilationCache:
+    """
+    A content addressed cache of decompiled methods, stored on disk.
+
+    Every entry is a file in the cache directory, named after the key of
+    the method (see :func:`get_method_key`) and the kind of the entry,
+    which is either `source` for the Java code created by the
+    :class:`~androguard.decompiler.writer.Writer` or `ast` for the AST
+    created by the :class:`~androguard.decompiler.dast.JSONWriter`.
+
+    The total size of the entries is bounded by `max_size`. If it is
+    exceeded, the least recently used entries are removed. The last use
+    of an entry is stored as the modification time of its file, so the
+    order is kept between processes.
+
+    The cache can be shared by several processes, entries are written
+    atomically. Entries written by other processes are found, but are
+    only counted to the total size once they were read.
+
+    :param path: the directory of the cache, it is created if needed
+    :param max_size: the maximum total size of the entries in bytes
+    """
+
+    KINDS = ('source', 'ast')
+
+    def __init__(self, path: str, max_size: int = 256 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(path, exist_ok=True)
+
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.endswith(self.KINDS) and entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name, st.st_size))
+        entries.sort()
+
+        # file name -> size, the least recently used entry comes first
+        self._entries = OrderedDict((name, size) for _, name, size in entries)
+        self.size = sum(self._entries.values())
+
+    def _get_filename(self, key: str, kind: str) -> str:
+        if kind not in self.KINDS:
+            raise ValueError("Unknown kind of entry: {}".format(kind))
+        return "{}.{}".format(key, kind)
+
+    def get(self, key: str, kind: str) -> Union[str, dict, None]:
+        """
+        Return the entry of the given kind for the key.
+
+        :param key: the key of the method
+        :param kind: either `'source'` or `'ast'`
+        :return: the source code or the AST, or None if it is not cached
+        """
+        name = self._get_filename(key, kind)
+        filename = os.path.join(self.path, name)
+        try:
+            with open(filename, 'rb') as fp:
+                data = fp.read()
+            value = marshal.loads(data)
+            os.utime(filename)
+        except FileNotFoundError:
+            # removed by another process
+            self.size -= self._entries.pop(name, 0)
+            self.misses += 1
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logger.warning("Invalid cache entry {}: {}".format(filename, e))
+            self._remove(name)
+            self.misses += 1
+            return None
+
+        if name not in self._entries:
+            self._entries[name] = len(data)
+            self.size += len(data)
+        self._entries.move_to_end(name)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, kind: str, value: Union[str, dict]) -> None:
+        """
+        Store the entry of the given kind for the key and remove the least
+        recently used entries, if the cache got too large.
+
+        :param key: the key of the method
+        :param kind: either `'source'` or `'ast'`
+        :param value: the source code or the AST
+        """
+        name = self._get_filename(key, kind)
+        data = marshal.dumps(value)
+        if len(data) > self.max_size:
+            return
+
+        filename = os.path.join(self.path, name)
+        # write to a temporary file first, so other processes never
+        # read a partially written entry
+        tmp = "{}.{}.tmp".format(filename, os.getpid())
+        try:
+            with open(tmp, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp, filename)
+        except OSError as e:
+            logger.warning("Can not write cache entry {}: {}".format(name, e))
+            return
+
+        self.size -= self._entries.pop(name, 0)
+        self._entries[name] = len(data)
+        self.size += len(data)
+
+        while self.size > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, name: str) -> None:
+        self.size -= self._entries.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.path, name))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.name.endswith(self.KINDS):
+                    self._remove(entry.name)
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -248,15 +248,17 @@ def switch_struct(graph, idoms):
 # TODO: deal with preds which are in catch
 def short_circuit_struct(graph, idom, node_map):
     def MergeNodes(node1, node2, is_and, is_not):
-        lpreds = set()
-        ldests = set()
+        # dicts keep the order of the edges deterministic
+        lpreds = {}
+        ldests = {}
         for node in (node1, node2):
-            lpreds.update(graph.preds(node))
-            ldests.update(graph.sucs(node))
+            lpreds.update(dict.fromkeys(graph.preds(node)))
+            ldests.update(dict.fromkeys(graph.sucs(node)))
             graph.remove_node(node)
             done.add(node)
-        lpreds.difference_update((node1, node2))
-        ldests.difference_update((node1, node2))
+        for node in (node1, node2):
+            lpreds.pop(node, None)
+            ldests.pop(node, None)
 
         entry = graph.entry in (node1, node2)
 
@@ -20,12 +20,13 @@
 # see https://peps.python.org/pep-0563/
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 if TYPE_CHECKING:
     from androguard.core.analysis.analysis import Analysis, MethodAnalysis
     from androguard.core.dex import EncodedField
 
+import multiprocessing as mp
 import struct
 import sys
 from collections import defaultdict
@@ -543,6 +544,8 @@ class DvMachine:
             dvclass.orig_class.get_name(): dvclass.orig_class
             for dvclass in self.vma.get_classes()
         }
+        # source code of the classes processed by workers
+        self.sources = {}
         # TODO why not?
         # util.merge_inner(self.classes)
 
@@ -574,12 +577,33 @@ class DvMachine:
                 dvclass = self.classes[name] = DvClass(klass, self.vma)
                 return dvclass
 
-    def process(self) -> None:
+    def process(self, workers: int = 0) -> None:
         """
         Process all classes inside the machine.
 
         This calls :meth:`~androgaurd.decompiler.decompile.DvClass.process` on each :class:`DvClass`.
+
+        With more than one worker, the classes are decompiled in forked
+        processes using :func:`decompile_classes`. Only the source code is
+        transferred back, which is stored in :py:attr:`sources` instead of
+        replacing the classes by :class:`DvClass` items.
+
+        :param workers: number of worker processes (default: 0, no workers)
         """
+        if workers > 1:
+            self.sources.update(
+                decompile_classes(
+                    self.vma,
+                    [
+                        name
+                        for name, klass in self.classes.items()
+                        if not isinstance(klass, DvClass)
+                    ],
+                    workers,
+                )
+            )
+            return
+
         for name, klass in self.classes.items():
             logger.debug('Processing class: %s', name)
             if isinstance(klass, DvClass):
@@ -595,13 +619,25 @@ class DvMachine:
 
         This calls :meth:`~androgaurd.decompiler.decompile.DvClass.show_source` on each :class:`DvClass`.
         """
-        for klass in self.classes.values():
-            klass.show_source()
+        for name, klass in self.classes.items():
+            if name in self.sources:
+                print(self.sources[name])
+            else:
+                klass.show_source()
 
-    def process_and_show(self) -> None:
+    def process_and_show(self, workers: int = 0) -> None:
         """
         Run :meth:`process` and :meth:`show_source` after each other.
+
+        :param workers: number of worker processes (default: 0, no workers)
         """
+        if workers > 1:
+            for _, source in decompile_classes(
+                self.vma, sorted(self.classes), workers
+            ):
+                print(source)
+            return
+
         for name, klass in sorted(self.classes.items()):
             logger.debug('Processing class: %s', name)
             if not isinstance(klass, DvClass):
@@ -625,3 +661,80 @@ class DvMachine:
             cls.process(doAST=True)
             ret[name] = cls.get_ast()
         return ret
+
+
+def decompile_classes(
+    vmx: analysis.Analysis, class_names: Iterable[str], workers: int = 0
+) -> Iterator[tuple[str, str]]:
+    """
+    Decompile the given classes of an Analysis and yield the source code of
+    each class.
+
+    Each class is decompiled independently, hence the classes can be
+    decompiled in `workers` forked processes, which inherit the Analysis.
+    Only the class names and the source code are transferred between the
+    processes.
+    The results are yielded in the order of `class_names` as soon as they
+    are available and are the same for any number of workers.
+
+    Parallel decompilation requires the `fork` start method, on other
+    platforms the classes are decompiled in this process.
+
+    :param vmx: the :class:`~androguard.core.analysis.analysis.Analysis` containing the classes
+    :param class_names: the names of the classes, in the format Lxxx;
+    :param workers: number of worker processes (default: 0, no workers)
+    :returns: an iterator of tuples of class name and source code
+    """
+    class_names = list(class_names)
+    if workers > 1 and "fork" not in mp.get_all_start_methods():
+        logger.warning(
+            "Parallel decompilation needs the 'fork' start method, "
+            "decompiling the classes in this process"
+        )
+        workers = 0
+
+    if workers <= 1 or len(class_names) <= 1:
+        for name in class_names:
+            yield name, _decompile(vmx, name)
+        return
+
+    logger.info(
+        "Decompiling {} classes using {} workers".format(
+            len(class_names), workers
+        )
+    )
+    ctx = mp.get_context("fork")
+    with ctx.Pool(
+        workers, initializer=_init_decompile_worker, initargs=(vmx,)
+    ) as pool:
+        # imap keeps the order of the classes
+        for name, source in zip(
+            class_names, pool.imap(_decompile_class, class_names)
+        ):
+            yield name, source
+
+
+# Analysis of the decompiled classes, inherited by the forked workers
+_decompile_worker_vmx = None
+
+
+def _init_decompile_worker(vmx: analysis.Analysis) -> None:
+    global _decompile_worker_vmx
+    _decompile_worker_vmx = vmx
+
+
+def _decompile(vmx: analysis.Analysis, name: str) -> str:
+    logger.debug('Processing class: %s', name)
+    dvclass = DvClass(vmx.get_class_analysis(name).get_vm_class(), vmx)
+    dvclass.process()
+    return dvclass.get_source()
+
+
+def _decompile_class(name: str) -> str:
+    """
+    Worker function of :func:`decompile_classes`.
+
+    :param name: the name of the class
+    :returns: the source code of the class
+    """
+    return _decompile(_decompile_worker_vmx, name)
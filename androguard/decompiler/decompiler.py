@@ -20,11 +20,12 @@
 # see https://peps.python.org/pep-0563/
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     from androguard.core.analysis.analysis import Analysis, MethodAnalysis
     from androguard.core.dex import DEX, ClassDefItem
+    from androguard.decompiler.cache import DecompilationCache
 
 from loguru import logger
 from pygments import highlight
@@ -33,10 +34,16 @@ from pygments.lexers import get_lexer_by_name
 from pygments.token import Token
 
 from androguard.decompiler import decompile
+from androguard.decompiler.cache import get_method_key
 
 
 class DecompilerDAD:
-    def __init__(self, vm: DEX, vmx: Analysis) -> None:
+    def __init__(
+        self,
+        vm: DEX,
+        vmx: Analysis,
+        cache: Union[DecompilationCache, None] = None,
+    ) -> None:
         """
         Decompiler wrapper for DAD: **D**AD is **A** **D**ecompiler
         DAD is the androguard internal decompiler.
@@ -45,23 +52,45 @@ class DecompilerDAD:
         creates :class:`~androguard.decompiler.decompile.DvClass` and
         :class:`~androguard.decompiler.decompile.DvMethod` on demand.
 
+        If a :class:`~androguard.decompiler.cache.DecompilationCache` is
+        given, the source code and the AST of single methods are looked up
+        in the cache first, and stored there after they were decompiled.
+
         :param androguard.core.bytecodes.DEX vm: `DEX` object
         :param androguard.core.analysis.analysis.Analysis vmx: `Analysis` object
+        :param androguard.decompiler.cache.DecompilationCache cache: an optional cache for decompiled methods
         """
         self.vm = vm
         self.vmx = vmx
+        self.cache = cache
 
-    def get_source_method(self, m: MethodAnalysis) -> str:
+    def _process_method(
+        self, m: MethodAnalysis, kind: str
+    ) -> Union[str, dict]:
         mx = self.vmx.get_method(m)
+        if self.cache is not None:
+            key = get_method_key(mx)
+            result = self.cache.get(key, kind)
+            if result is not None:
+                return result
+
         z = decompile.DvMethod(mx)
-        z.process()
-        return z.get_source()
+        if kind == 'ast':
+            z.process(doAST=True)
+            result = z.get_ast()
+        else:
+            z.process()
+            result = z.get_source()
+
+        if self.cache is not None:
+            self.cache.put(key, kind, result)
+        return result
+
+    def get_source_method(self, m: MethodAnalysis) -> str:
+        return self._process_method(m, 'source')
 
     def get_ast_method(self, m: MethodAnalysis) -> dict:
-        mx = self.vmx.get_method(m)
-        z = decompile.DvMethod(mx)
-        z.process(doAST=True)
-        return z.get_ast()
+        return self._process_method(m, 'ast')
 
     def display_source(self, m: MethodAnalysis) -> None:
         result = self.get_source_method(m)
@@ -124,7 +124,9 @@ class Node:
 class Interval:
     def __init__(self, head):
         self.name = 'Interval-%s' % head.name
-        self.content = {head}
+        # a dict keeps the nodes in insertion order, thus the end of the
+        # interval does not depend on the hashes of the nodes
+        self.content = {head: None}
         self.end = None
         self.head = head
         self.in_catch = head.in_catch
@@ -142,7 +144,7 @@ class Interval:
     def add_node(self, node):
         if node in self.content:
             return False
-        self.content.add(node)
+        self.content[node] = None
         node.interval = self
         return True
 
@@ -12,6 +12,7 @@ from loguru import logger
 
 from androguard.core import androconf, apk, dex
 from androguard.core.analysis.analysis import Analysis
+from androguard.core.analysis.cache import AnalysisCache
 from androguard.decompiler import decompiler
 from androguard.session import Session
 
@@ -32,6 +33,7 @@ def AnalyzeAPK(
     _file: Union[str, bytes],
     session: Union[Session, None] = None,
     raw: bool = False,
+    cache_dir: Union[str, None] = None,
 ) -> tuple[apk.APK, list[dex.DEX], Analysis]:
     """
     Analyze an android application and setup all stuff for a more quickly
@@ -45,6 +47,7 @@ def AnalyzeAPK(
     :param _file: the filename of the android application or a buffer which represents the application
     :param session: A session (default: None)
     :param raw: boolean if raw bytes are supplied instead of a filename
+    :param cache_dir: directory of an [AnalysisCache][androguard.core.analysis.cache.AnalysisCache] to load and store the cross references of the DEX files, only used without session (default: None)
     :returns: the `androguard.core.apk.APK`, list of `androguard.core.dex.DEX`, and `androguard.core.analysis.analysis.Analysis` objects
     """
     logger.debug("AnalyzeAPK")
@@ -75,7 +78,10 @@ def AnalyzeAPK(
             d.append(df)
             df.set_decompiler(decompiler.DecompilerDAD(df, dx))
 
-        dx.create_xref()
+        cache = None
+        if cache_dir:
+            cache = AnalysisCache(cache_dir)
+        dx.create_xref(cache=cache)
 
         return a, d, dx
 
@@ -160,14 +160,14 @@ class Pentest:
                 function_callee = msg_payload["stacktrace"][1]
                 ret_value = json.dumps(msg_payload.get("ret"))
 
+                # let loguru format the message, only if it is logged
                 logger.info(
-                    "{} - [{}:{}] [{}] -> [{}]".format(
-                        msg_payload["timestamp"],
-                        function_call,
-                        function_callee,
-                        params,
-                        ret_value,
-                    )
+                    "{} - [{}:{}] [{}] -> [{}]",
+                    msg_payload["timestamp"],
+                    function_call,
+                    function_callee,
+                    params,
+                    ret_value,
                 )
                 self.message_queue.put(
                     MessageEvent(
@@ -208,13 +208,12 @@ class Pentest:
                     function_callee = information
 
                 logger.warning(
-                    "{} - [{}:{}] [{}] -> [{}]".format(
-                        msg_payload["timestamp"],
-                        function_call,
-                        function_callee,
-                        information,
-                        params,
-                    )
+                    "{} - [{}:{}] [{}] -> [{}]",
+                    msg_payload["timestamp"],
+                    function_call,
+                    function_callee,
+                    information,
+                    params,
                 )
                 self.message_queue.put(
                     MessageSystem(
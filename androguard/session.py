@@ -1,5 +1,9 @@
 import collections
 import hashlib
+import os
+import queue
+import threading
+import time
 from typing import Iterator, Union
 
 import dataset
@@ -7,9 +11,254 @@ from loguru import logger
 
 from androguard.core import androconf, apk, dex
 from androguard.core.analysis.analysis import Analysis, StringAnalysis
+from androguard.core.analysis.cache import AnalysisCache
 from androguard.decompiler.decompiler import DecompilerDAD
 
 
+class EventWriter:
+    """
+    Write the events of a [Session][androguard.session.Session] to the
+    database in batches, on a background thread.
+
+    Events are put into a bounded queue. The thread takes them from the
+    queue and writes them in batches of up to `batch_size` events, each
+    batch in a single transaction. A batch is written at the latest
+    `flush_interval` seconds after its first event was taken from the
+    queue.
+
+    If the queue is full, [put][androguard.session.EventWriter.put] blocks
+    until the thread made room again. This backpressure, and how much of the
+    queue was used, is reported by
+    [get_metrics][androguard.session.EventWriter.get_metrics].
+
+    Note that for SQLite, every thread has its own connection, thus the
+    events are not visible in an in-memory database. Use a database file
+    instead.
+
+    :param db: the `dataset` database to write to
+    :param max_queue_size: the maximum number of queued events
+    :param batch_size: the maximum number of events written at once
+    :param flush_interval: the maximum time in seconds an event is kept
+        before it is written
+    """
+
+    def __init__(
+        self,
+        db: dataset.Database,
+        max_queue_size: int = 10000,
+        batch_size: int = 1000,
+        flush_interval: float = 0.5,
+    ) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(max_queue_size)
+        self._closed = False
+
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.blocked = 0
+        self.blocked_time = 0.0
+        self.max_queued = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="androguard-event-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, table: str, row: dict) -> None:
+        """
+        Queue a row to be inserted into a table.
+
+        Blocks if the queue is full.
+
+        :param table: the name of the table
+        :param row: the row to insert
+        :raises ValueError: if the writer was closed
+        """
+        if self._closed:
+            raise ValueError("The event writer is closed")
+
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self.blocked += 1
+            tic = time.perf_counter()
+            self._queue.put((table, row))
+            self.blocked_time += time.perf_counter() - tic
+
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self._queue.qsize())
+
+    def flush(self) -> None:
+        """
+        Wait until all queued events are written.
+        """
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        """
+        Write all queued events and stop the thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def get_metrics(self) -> dict[str, Union[int, float]]:
+        """
+        Return the metrics of the writer:
+
+        * `queued`: the number of events queued so far
+        * `written`: the number of events written so far
+        * `pending`: the number of events currently in the queue
+        * `batches`: the number of written batches
+        * `errors`: the number of batches which could not be written
+        * `blocked`: how often [put][androguard.session.EventWriter.put]
+          had to wait, because the queue was full
+        * `blocked_time`: the total time in seconds spent waiting
+        * `max_queued`: the maximum number of events in the queue
+
+        :returns: a dictionary of the metrics
+        """
+        return dict(
+            queued=self.queued,
+            written=self.written,
+            pending=self._queue.qsize(),
+            batches=self.batches,
+            errors=self.errors,
+            blocked=self.blocked,
+            blocked_time=self.blocked_time,
+            max_queued=self.max_queued,
+        )
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = []
+            marker = None
+
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    # flush() waits for everything queued before
+                    marker = item
+                    break
+
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            if marker is not None:
+                marker.set()
+
+    def _write(self, batch: list[tuple[str, dict]]) -> None:
+        rows = collections.defaultdict(list)
+        for table, row in batch:
+            rows[table].append(row)
+
+        try:
+            # create new columns before the transaction, changing the
+            # schema inside of it is not safe with several threads
+            for table, r in rows.items():
+                t = self.db[table]
+                examples = {}
+                for row in r:
+                    for name, value in row.items():
+                        if examples.get(name) is None:
+                            examples[name] = value
+                for name, value in examples.items():
+                    if not t.has_column(name):
+                        t.create_column_by_example(name, value)
+            with self.db as tx:
+                for table, r in rows.items():
+                    tx[table].insert_many(r, chunk_size=self.batch_size)
+        except Exception as e:
+            self.errors += 1
+            logger.error(
+                "Could not write {} events: {}".format(len(batch), e)
+            )
+        else:
+            self.written += len(batch)
+        self.batches += 1
+
+
+class SessionStore:
+    """
+    Stores the files analyzed in a [Session][androguard.session.Session] on
+    disk, so their objects can be removed from memory and loaded again.
+
+    `DEX` and `Analysis` objects can not be pickled, thus the store keeps
+    what is needed to restore them: the raw file, named after its SHA256
+    digest and its type, and the cross references of its DEX files in an
+    [AnalysisCache][androguard.core.analysis.cache.AnalysisCache] in the
+    `xref` subdirectory. Restoring a file only parses it again, the cross
+    references are not created from the bytecode a second time.
+
+    Files are written atomically and never change, as they are content
+    addressed. Hence a store can be shared between sessions.
+
+    :param path: the directory of the store, it is created if needed
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.xref_cache = AnalysisCache(os.path.join(path, "xref"))
+
+    def _get_path(self, digest: str, filetype: str) -> str:
+        return os.path.join(self.path, "{}.{}".format(digest, filetype))
+
+    def put(self, digest: str, filetype: str, data: bytes) -> None:
+        """
+        Store a file, if it is not stored yet.
+
+        :param digest: the SHA256 digest of the file
+        :param filetype: the type of the file, as returned by [is_android_raw][androguard.core.androconf.is_android_raw]
+        :param data: the content of the file
+        """
+        path = self._get_path(digest, filetype)
+        if os.path.exists(path):
+            return
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+
+    def get(self, digest: str, filetype: str) -> bytes:
+        """
+        Return the content of a stored file.
+
+        :param digest: the SHA256 digest of the file
+        :param filetype: the type of the file
+        :raises FileNotFoundError: if the file is not stored
+        :returns: the content of the file
+        """
+        with open(self._get_path(digest, filetype), "rb") as fp:
+            return fp.read()
+
+
 class Session:
     """
     A Session is able to store in a database, basic information about APK, DEX or ODEX files.
@@ -20,19 +269,35 @@ class Session:
     but is NOT finished!
 
     > Should we go back to pickling or proceed further with the dataset ?
+
+    By default, all `APK`, `DEX` and `Analysis` objects are kept in memory.
+    If a `store_path` is given, the analyzed files are kept in a
+    [SessionStore][androguard.session.SessionStore] instead, and only the
+    objects of the `max_loaded` most recently used files stay in memory.
+    [get_objects_apk][androguard.session.Session.get_objects_apk],
+    [get_objects_dex][androguard.session.Session.get_objects_dex] and
+    [get_all_apks][androguard.session.Session.get_all_apks] load removed
+    objects again, all other methods only look at the objects in memory.
     """
 
     def __init__(
         self,
         export_ipython: bool = False,
         db_url: str = 'sqlite:///androguard.db',
+        store_path: Union[str, None] = None,
+        max_loaded: int = 16,
     ) -> None:
         """
         Create a new Session object
 
         :param export_ipython: set to True in order to create attributes for the
         use in iPython
+        :param db_url: the URL of the database
+        :param store_path: the directory of a `SessionStore`, or None to keep all objects in memory
+        :param max_loaded: the maximum number of analyzed files with their objects in memory, if a store is used
         """
+        self.store = SessionStore(store_path) if store_path else None
+        self.max_loaded = max_loaded
         self._setup_objects()
         self.export_ipython = export_ipython
 
@@ -43,6 +308,8 @@ class Session:
         self.table_pentest = self.db["pentest"]
         self.table_system = self.db["system"]
 
+        self.event_writer = None
+
         self.session_id = len(self.table_session)
 
         self.table_session.insert(dict(id=self.session_id))
@@ -53,8 +320,37 @@ class Session:
         Save the current session
         """
         logger.info("Saving the database")
+        if self.event_writer:
+            self.event_writer.flush()
         self.db.commit()
 
+    def start_event_writer(self, **kwargs) -> EventWriter:
+        """
+        Write the events of [insert_event][androguard.session.Session.insert_event]
+        and [insert_system_event][androguard.session.Session.insert_system_event]
+        in batches on a background thread, instead of inserting every single
+        event.
+
+        This keeps up with heavy tracing, where thousands of events per
+        second are inserted. The events are written at the latest after the
+        flush interval of the writer, or when the session is saved.
+
+        :param kwargs: the arguments of [EventWriter][androguard.session.EventWriter]
+        :returns: the writer
+        """
+        if self.event_writer is None:
+            self.event_writer = EventWriter(self.db, **kwargs)
+        return self.event_writer
+
+    def stop_event_writer(self) -> None:
+        """
+        Write all buffered events and stop the background thread.
+        Events are inserted one by one again afterwards.
+        """
+        if self.event_writer is not None:
+            self.event_writer.close()
+            self.event_writer = None
+
     def _setup_objects(self):
         self.analyzed_files = collections.defaultdict(list)
         self.analyzed_digest = dict()
@@ -71,6 +367,13 @@ class Session:
         # files as well, but we do not remove it here for legacy reasons
         self.analyzed_dex = dict()
 
+        # Digest of every added file -> its type and the digests of its DEX
+        # files, in the order they were added
+        self._added = collections.OrderedDict()
+        # Digests of the added files with their objects in memory, the least
+        # recently used comes first
+        self._loaded = collections.OrderedDict()
+
     def reset(self) -> None:
         """
         Reset the current session, delete all added files.
@@ -103,26 +406,30 @@ class Session:
             print("\t{}: {}".format(d, a))
 
     def insert_event(self, call, callee, params, ret):
-        self.table_pentest.insert(
-            dict(
-                session_id=str(self.session_id),
-                call=call,
-                callee=callee,
-                params=params,
-                ret=ret,
-            )
+        row = dict(
+            session_id=str(self.session_id),
+            call=call,
+            callee=callee,
+            params=params,
+            ret=ret,
         )
+        if self.event_writer:
+            self.event_writer.put("pentest", row)
+        else:
+            self.table_pentest.insert(row)
 
     def insert_system_event(self, call, callee, information, params):
-        self.table_system.insert(
-            dict(
-                session_id=str(self.session_id),
-                call=call,
-                callee=callee,
-                information=information,
-                params=params,
-            )
+        row = dict(
+            session_id=str(self.session_id),
+            call=call,
+            callee=callee,
+            information=information,
+            params=params,
         )
+        if self.event_writer:
+            self.event_writer.put("system", row)
+        else:
+            self.table_system.insert(row)
 
     def addAPK(self, filename: str, data: bytes) -> tuple[str, apk.APK]:
         """
@@ -144,21 +451,24 @@ class Session:
             )
         )
 
-        newapk = apk.APK(data, True)
-        self.analyzed_apk[digest] = [newapk]
+        newapk, dex_digests = self._load_apk(digest, data)
         self.analyzed_files[filename].append(digest)
         self.analyzed_digest[digest] = filename
         self.added_files.append(filename)
 
-        dx = Analysis()
-        self.analyzed_vms[digest] = dx
-
-        for dex in newapk.get_all_dex():
-            # we throw away the output... FIXME?
-            self.addDEX(filename, dex, dx, postpone_xref=True)
+        for dex_digest in dex_digests:
+            self.table_information.insert(
+                dict(
+                    session_id=str(self.session_id),
+                    filename=filename,
+                    digest=dex_digest,
+                    type="DEX",
+                )
+            )
+            self.analyzed_files[filename].append(dex_digest)
+            self.analyzed_digest[dex_digest] = filename
 
-        # Postponed
-        dx.create_xref()
+        self._added_file(digest, "APK", data, dex_digests)
 
         logger.info("added APK {}:{}".format(filename, digest))
         return digest, newapk
@@ -191,32 +501,12 @@ class Session:
             )
         )
 
-        logger.debug("Parsing format ...")
-        d = dex.DEX(data)
-        logger.info("added DEX:{}".format(digest))
+        d, dx = self._load_dex(digest, data, dx, postpone_xref)
 
         self.analyzed_files[filename].append(digest)
         self.analyzed_digest[digest] = filename
 
-        self.analyzed_dex[digest] = d
-
-        if dx is None:
-            dx = Analysis()
-
-        dx.add(d)
-        if not postpone_xref:
-            dx.create_xref()
-
-        logger.debug("Associated decompiler to the DEX objects")
-        for d in dx.vms:
-            # TODO: allow different decompiler here!
-            d.set_decompiler(DecompilerDAD(d, dx))
-            d.set_analysis(dx)
-        self.analyzed_vms[digest] = dx
-
-        if self.export_ipython:
-            logger.debug("Exporting in ipython")
-            d.create_python_export()
+        self._added_file(digest, "DEX", data, [digest])
 
         return digest, d, dx
 
@@ -243,12 +533,94 @@ class Session:
             )
         )
 
-        d = dex.ODEX(data)
-        logger.debug("added ODEX:%s" % digest)
+        d, dx = self._load_odex(digest, data, dx)
 
         self.analyzed_files[filename].append(digest)
         self.analyzed_digest[digest] = filename
 
+        self._added_file(digest, "DEY", data, [digest])
+
+        return digest, d, dx
+
+    def _create_xref(self, dx: Analysis) -> None:
+        # with a store, the cross references are stored as well, so they are
+        # not created again when the objects are loaded from the store
+        dx.create_xref(cache=self.store.xref_cache if self.store else None)
+
+    def _load_apk(
+        self, digest: str, data: bytes
+    ) -> tuple[apk.APK, list[str]]:
+        """
+        Create the objects of an APK file and its DEX files.
+
+        :returns: the `APK` object and the SHA256 digests of its DEX files
+        """
+        newapk = apk.APK(data, True)
+        self.analyzed_apk[digest] = [newapk]
+
+        dx = Analysis()
+        self.analyzed_vms[digest] = dx
+
+        dex_digests = []
+        for raw in newapk.get_all_dex():
+            dex_digest = hashlib.sha256(raw).hexdigest()
+            self._load_dex(dex_digest, raw, dx, postpone_xref=True)
+            dex_digests.append(dex_digest)
+
+        # Postponed
+        self._create_xref(dx)
+
+        return newapk, dex_digests
+
+    def _load_dex(
+        self,
+        digest: str,
+        data: bytes,
+        dx: Union[Analysis, None] = None,
+        postpone_xref: bool = False,
+    ) -> tuple[dex.DEX, Analysis]:
+        """
+        Create the objects of a DEX file.
+
+        :returns: the `DEX` and the `Analysis` object
+        """
+        logger.debug("Parsing format ...")
+        d = dex.DEX(data)
+        logger.info("added DEX:{}".format(digest))
+
+        self.analyzed_dex[digest] = d
+
+        if dx is None:
+            dx = Analysis()
+
+        dx.add(d)
+        if not postpone_xref:
+            self._create_xref(dx)
+
+        logger.debug("Associated decompiler to the DEX objects")
+        for vm in dx.vms:
+            # TODO: allow different decompiler here!
+            vm.set_decompiler(DecompilerDAD(vm, dx))
+            vm.set_analysis(dx)
+        self.analyzed_vms[digest] = dx
+
+        if self.export_ipython:
+            logger.debug("Exporting in ipython")
+            d.create_python_export()
+
+        return d, dx
+
+    def _load_odex(
+        self, digest: str, data: bytes, dx: Union[Analysis, None] = None
+    ) -> tuple[dex.ODEX, Analysis]:
+        """
+        Create the objects of an ODEX file.
+
+        :returns: the `ODEX` and the `Analysis` object
+        """
+        d = dex.ODEX(data)
+        logger.debug("added ODEX:%s" % digest)
+
         self.analyzed_dex[digest] = d
 
         if self.export_ipython:
@@ -258,16 +630,73 @@ class Session:
             dx = Analysis()
 
         dx.add(d)
-        dx.create_xref()
+        self._create_xref(dx)
 
-        for d in dx.vms:
+        for vm in dx.vms:
             # TODO: allow different decompiler here!
-            d.set_decompiler(DecompilerDAD(d, dx))
-            d.set_vmanalysis(dx)
+            vm.set_decompiler(DecompilerDAD(vm, dx))
+            vm.set_vmanalysis(dx)
 
         self.analyzed_vms[digest] = dx
 
-        return digest, d, dx
+        return d, dx
+
+    def _added_file(
+        self, digest: str, filetype: str, data: bytes, dex_digests: list[str]
+    ) -> None:
+        """
+        Remember an added file, and put it into the store, if there is one
+        """
+        self._added[digest] = (filetype, dex_digests)
+        if self.store is not None:
+            self.store.put(digest, filetype, data)
+            self._touch(digest)
+
+    def _touch(self, digest: str) -> None:
+        """
+        Mark the objects of an added file as most recently used, and remove
+        the least recently used objects from memory if there are too many.
+        """
+        self._loaded[digest] = True
+        self._loaded.move_to_end(digest)
+        while len(self._loaded) > max(self.max_loaded, 1):
+            self._unload(next(iter(self._loaded)))
+
+    def _unload(self, digest: str) -> None:
+        """
+        Remove the objects of an added file from memory
+        """
+        logger.debug("Removing the objects of {} from memory".format(digest))
+        del self._loaded[digest]
+        _, dex_digests = self._added[digest]
+        self.analyzed_apk.pop(digest, None)
+        dx = self.analyzed_vms.pop(digest, None)
+        if digest in dex_digests:
+            self.analyzed_dex.pop(digest, None)
+        for dex_digest in dex_digests:
+            # the same DEX file might be part of another loaded file
+            if self.analyzed_vms.get(dex_digest) is dx:
+                del self.analyzed_vms[dex_digest]
+                self.analyzed_dex.pop(dex_digest, None)
+
+    def _load(self, digest: str) -> None:
+        """
+        Make sure the objects of an added file are in memory, loading them
+        from the store if they were removed.
+        """
+        if self.store is None or digest not in self._added:
+            return
+        if digest not in self._loaded:
+            logger.info("Loading {} from the session store".format(digest))
+            filetype, _ = self._added[digest]
+            data = self.store.get(digest, filetype)
+            if filetype == "APK":
+                self._load_apk(digest, data)
+            elif filetype == "DEX":
+                self._load_dex(digest, data)
+            else:
+                self._load_odex(digest, data)
+        self._touch(digest)
 
     def add(
         self,
@@ -421,8 +850,14 @@ class Session:
 
         :returns: an iterator where each element is a tuple of sha256 of the APK, and the `APK` object
         """
-        for digest, a in self.analyzed_apk.items():
-            yield digest, a
+        if self.store is None:
+            yield from self.analyzed_apk.items()
+            return
+
+        for digest, (filetype, _) in list(self._added.items()):
+            if filetype == "APK":
+                self._load(digest)
+                yield digest, self.analyzed_apk[digest]
 
     def get_objects_apk(
         self,
@@ -462,6 +897,7 @@ class Session:
                 return None, None, None
             digest = digests[0]
 
+        self._load(digest)
         a = self.analyzed_apk[digest][0]
         dx = self.analyzed_vms[digest]
         return a, dx.vms, dx
@@ -473,5 +909,18 @@ class Session:
         :returns: tuple of (sha256, DEX, Analysis)
         """
         # TODO: there is no variant like get_objects_apk
-        for digest, d in self.analyzed_dex.items():
-            yield digest, d, self.analyzed_vms[digest]
+        if self.store is None:
+            for digest, d in self.analyzed_dex.items():
+                yield digest, d, self.analyzed_vms[digest]
+            return
+
+        seen = set()
+        for digest, (_, dex_digests) in list(self._added.items()):
+            self._load(digest)
+            for dex_digest in dex_digests:
+                if dex_digest in seen:
+                    continue
+                seen.add(dex_digest)
+                yield dex_digest, self.analyzed_dex[
+                    dex_digest
+                ], self.analyzed_vms[dex_digest]
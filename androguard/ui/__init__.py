@@ -24,6 +24,7 @@ from androguard.message import Message
 from androguard.ui.data_types import DisplayTransaction
 from androguard.ui.filter import Filter
 from androguard.ui.selection import SelectionViewList
+from androguard.ui.store import TransactionStore
 from androguard.ui.widget.details import DetailsFrame
 from androguard.ui.widget.filters import FiltersPanel
 from androguard.ui.widget.help import HelpPanel
@@ -53,12 +54,20 @@ class DummyControl(UIControl):
 
 
 class DynamicUI:
-    def __init__(self, input_queue):
+    def __init__(
+        self,
+        input_queue,
+        max_transactions: int = 100000,
+        batch_size: int = 1000,
+    ):
         logger.info("Starting the Terminal UI")
         self.filter: Filter | None = None
 
         self.input_queue = input_queue
-        self.all_transactions = []
+        # maximum number of messages handled at once
+        self.batch_size = batch_size
+        # only the last max_transactions transactions are kept
+        self.all_transactions = TransactionStore(max_transactions)
 
         self.transactions = SelectionViewList([], max_view_size=1)
         self.transaction_table = TransactionFrame(self.transactions)
@@ -189,7 +198,7 @@ class DynamicUI:
             else:
                 self.filter = self.filter_panel.filter()
                 self.transactions.assign(
-                    [t for t in self.all_transactions if self.filter.passes(t)]
+                    self.all_transactions.select(self.filter)
                 )
                 get_app().layout.focus(dummy_control)
 
@@ -246,9 +255,9 @@ class DynamicUI:
 
     def get_available_blocks(self):
         blocks: list[Message] = []
-        # Retrieve every unhandled block currently available in the queue
+        # Retrieve the unhandled blocks currently available in the queue, up to the batch size
         try:
-            for _ in range(10):
+            for _ in range(self.batch_size):
                 blocks.append(self.input_queue.get_nowait())
         except queue.Empty:
             pass
@@ -256,12 +265,26 @@ class DynamicUI:
 
     def process_data(self):
         blocks = self.get_available_blocks()
-        # For every block...
-        for block in blocks:
-            block = DisplayTransaction(block)
-            if not self.filter or self.filter.passes(block):
-                self.transactions.append(block)
+        if not blocks:
+            return False
+
+        new = [DisplayTransaction(block) for block in blocks]
+        dropped = self.all_transactions.extend(new)
+        if dropped:
+            # The dropped transactions are the oldest ones, so the ones which are displayed come first
+            dropped_ids = {id(t) for t in dropped}
+            count = 0
+            for t in self.transactions.data:
+                if id(t) not in dropped_ids:
+                    break
+                count += 1
+            self.transactions.remove_first(count)
+            new = [t for t in new if id(t) not in dropped_ids]
+
+        if self.filter:
+            new = [t for t in new if self.filter.passes(t)]
+        # Add the whole batch at once, so the table is only updated once
+        if new:
+            self.transactions.extend(new)
 
-            self.all_transactions.append(block)
-
-        return bool(blocks)
+        return True
@@ -8,6 +8,17 @@ class DisplayTransaction:
     def __init__(self, block: Message) -> None:
         self.block: Message = block
         self.timestamp = (datetime.datetime.now().strftime('%H:%M:%S'),)
+        # Parsed once, the filters and their indexes look them up often
+        self.interface, self.method = self._split_method(block.to_method)
+
+    @staticmethod
+    def _split_method(name: str | None) -> tuple[str, str]:
+        """Splits a frame of a Java stack trace, like `a.b.C.m(C.java:1)`, into the class and the method"""
+        if not name:
+            return '', ''
+        name = name.split('(', 1)[0]
+        interface, _, method = name.rpartition('.')
+        return interface, method
 
     @property
     def index(self) -> int:
@@ -25,7 +25,7 @@ class Filter:
         )  # List of associated types of the filter (call, return, etc)
         self.inclusive = include
 
-    def passes(self):
+    def passes(self, block) -> bool:
         """
         FUNCTION passes
             Brief - Returns whether a block should be displayed
@@ -36,13 +36,12 @@ class Filter:
                 The code checks if the filter passes the checks, and then tailors the output to the filter_mode
                 The type is either Inclusive ("Incl") or Exclusive ("Excl")
         """
-        # matches = (
-        #    (not self.types or block.type() in self.types) and
-        #    (not self.interface or self.interface in block.interface) and
-        #    (not self.method or self.method in block.method)
-        # )
-        # return not matches ^ self.inclusive
-        return False
+        matches = (
+            (not self.types or block.type() in self.types)
+            and (not self.interface or self.interface in block.interface)
+            and (not self.method or self.method in block.method)
+        )
+        return matches == self.inclusive
 
     def toggle_inclusivity(self):
         self.inclusive = not self.inclusive
@@ -60,6 +59,6 @@ _T = TypeVar('_T', bound=Filter)
 
 class FilterSet(UserList[_T]):
 
-    def passes(self, interface=None, method=None, call_type=None):
+    def passes(self, block) -> bool:
         """Return True if all filters in the set pass, False otherwise."""
-        return all([f.passes(interface, method, call_type) for f in self.data])
+        return all(f.passes(block) for f in self.data)
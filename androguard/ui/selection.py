@@ -150,6 +150,23 @@ class SelectionViewList(UserList[_T]):
         super().__delitem__(i)
         self._delete_from_view(i)
 
+    def remove_first(self, count: int):
+        # Removing the items at once, instead of popping them one by one, moves the remaining items only once
+        if count <= 0:
+            return
+        del self.data[:count]
+        if not self.data:
+            self._reset_view()
+            return
+
+        # Keep the selection and the view on the same items, as long as they are still there
+        if self.selection_valid():
+            self.selection = max(self.selection - count, 0)
+        self.view.start = max(self.view.start - count, 0)
+        self.view.end = min(self.view.start + self.max_view_size, len(self))
+        self.on_update_event()
+        self.on_selection_change()
+
     def clear(self):
         super().clear()
         self._reset_view()
@@ -0,0 +1,165 @@
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+from androguard.ui.data_types import DisplayTransaction
+from androguard.ui.filter import Filter
+
+
+class TransactionStore:
+    """
+    CLASS TransactionStore
+        Brief - Bounded store of all transactions received by the UI
+        Description -
+            The transactions are kept in a ring buffer: once `max_size`
+            transactions are stored, every new transaction replaces the
+            oldest one.
+
+            For every field a filter checks (interface, method and type)
+            an index maps each value to the sequence numbers of the
+            transactions with this value. The indexes are updated when
+            transactions are added or dropped, so selecting the
+            transactions passing a filter only looks at the distinct values
+            and the matching transactions, not at the whole history.
+    """
+
+    FIELDS = ("interface", "method", "type")
+
+    def __init__(self, max_size: int = 100000) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self._buffer: list[DisplayTransaction] = []
+        # position of the oldest transaction in the buffer
+        self._start = 0
+        # sequence number of the oldest transaction
+        self.first = 0
+
+        # field -> value -> sequence numbers, in ascending order
+        self._indexes: dict[str, dict[str, deque[int]]] = {
+            field: {} for field in self.FIELDS
+        }
+
+    @staticmethod
+    def _get_value(transaction: DisplayTransaction, field: str) -> str:
+        if field == "type":
+            return transaction.type()
+        return getattr(transaction, field)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __iter__(self) -> Iterator[DisplayTransaction]:
+        for i in range(len(self._buffer)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> DisplayTransaction:
+        if i < 0:
+            i += len(self._buffer)
+        if not 0 <= i < len(self._buffer):
+            raise IndexError("TransactionStore index out of range")
+        return self._buffer[(self._start + i) % self.max_size]
+
+    @property
+    def end(self) -> int:
+        """The sequence number the next transaction gets"""
+        return self.first + len(self._buffer)
+
+    def append(
+        self, transaction: DisplayTransaction
+    ) -> Optional[DisplayTransaction]:
+        """
+        Add a transaction, and return the transaction which was dropped to
+        make room for it, or None.
+        """
+        seq = self.end
+        for field in self.FIELDS:
+            value = self._get_value(transaction, field)
+            self._indexes[field].setdefault(value, deque()).append(seq)
+
+        if len(self._buffer) < self.max_size:
+            self._buffer.append(transaction)
+            return None
+
+        dropped = self._buffer[self._start]
+        for field in self.FIELDS:
+            index = self._indexes[field]
+            value = self._get_value(dropped, field)
+            seqs = index[value]
+            # the dropped transaction is the oldest one with this value
+            seqs.popleft()
+            if not seqs:
+                del index[value]
+
+        self._buffer[self._start] = transaction
+        self._start = (self._start + 1) % self.max_size
+        self.first += 1
+        return dropped
+
+    def extend(
+        self, transactions: Iterable[DisplayTransaction]
+    ) -> list[DisplayTransaction]:
+        """
+        Add several transactions, and return the dropped transactions,
+        oldest first. These can include some of the added transactions, if
+        there are more than fit into the store.
+        """
+        dropped = []
+        for transaction in transactions:
+            t = self.append(transaction)
+            if t is not None:
+                dropped.append(t)
+        return dropped
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self._start = 0
+        self.first = self.end
+        for index in self._indexes.values():
+            index.clear()
+
+    def values(self, field: str) -> list[str]:
+        """Returns the distinct values of a field among the stored transactions"""
+        return list(self._indexes[field])
+
+    def _lookup(self, field: str, match: Callable[[str], bool]) -> set[int]:
+        seqs = set()
+        for value, s in self._indexes[field].items():
+            if match(value):
+                seqs.update(s)
+        return seqs
+
+    def select(self, filter: Optional[Filter]) -> list[DisplayTransaction]:
+        """
+        FUNCTION select
+            Brief - Returns the stored transactions which pass the filter
+            Description -
+                Gives the same result as checking every transaction with
+                Filter.passes, but uses the indexes instead. The
+                transactions are returned in the order they were added.
+        """
+        if filter is None:
+            return list(self)
+
+        matches: Optional[set[int]] = None
+        for field, pattern in (
+            ("interface", filter.interface),
+            ("method", filter.method),
+        ):
+            if pattern:
+                seqs = self._lookup(field, lambda v: pattern in v)
+                matches = seqs if matches is None else matches & seqs
+        if filter.types:
+            types = set(filter.types)
+            seqs = self._lookup("type", lambda v: v in types)
+            matches = seqs if matches is None else matches & seqs
+
+        if matches is None:
+            # the filter checks nothing, so all transactions match
+            return list(self) if filter.inclusive else []
+
+        if filter.inclusive:
+            seqs = sorted(matches)
+        else:
+            seqs = [s for s in range(self.first, self.end) if s not in matches]
+        return [self[s - self.first] for s in seqs]
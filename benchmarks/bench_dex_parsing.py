@@ -0,0 +1,121 @@
+"""
+Benchmark the parsing of DEX files and the decoding of their strings.
+
+Reports the time to parse all DEX files of a DEX or APK file, to decode
+all strings, and to read the LEB128 values of all class data items.
+
+    python benchmarks/bench_dex_parsing.py [APK or DEX ...]
+"""
+
+import argparse
+import gc
+import io
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+from loguru import logger
+
+from androguard.core import androconf, apk, dex
+
+DEFAULT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "tests",
+    "data",
+    "APK",
+    "Annotation_classes.dex",
+)
+
+
+def load_raw(filename):
+    if androconf.is_android(filename) == "APK":
+        return list(apk.APK(filename).get_all_dex())
+    with open(filename, "rb") as fp:
+        return [fp.read()]
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        tic = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - tic)
+    return min(timings), result
+
+
+def parse_all(raws):
+    return [dex.DEX(raw) for raw in raws]
+
+
+def decode_strings(vms):
+    return sum(len(s) for vm in vms for s in vm.get_strings())
+
+
+def class_data_offsets(vm):
+    items = vm.map_list.get_item_type(dex.TypeMapItem.CLASS_DATA_ITEM)
+    return [item.get_off() for item in items]
+
+
+def read_leb128(cm, raw, offsets):
+    # all values of the class data items, as ClassDataItem reads them
+    buff = io.BufferedReader(io.BytesIO(raw))
+    n = 0
+    for off in offsets:
+        buff.seek(off)
+        sizes = [dex.readuleb128(cm, buff) for _ in range(4)]
+        count = 2 * (sizes[0] + sizes[1]) + 3 * (sizes[2] + sizes[3])
+        for _ in range(count):
+            dex.readuleb128(cm, buff)
+        n += count
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="*", default=[DEFAULT_FILE])
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.remove()
+    for filename in args.files:
+        raws = load_raw(filename)
+        print(
+            "{}: {} DEX, {:.1f} MiB".format(
+                os.path.basename(filename),
+                len(raws),
+                sum(map(len, raws)) / 2**20,
+            )
+        )
+
+        timing, vms = best_of(args.repeat, parse_all, raws)
+        print("  parse time (best):         {:.3f}s".format(timing))
+
+        timing, size = best_of(args.repeat, decode_strings, vms)
+        print(
+            "  decode strings (best):     {:.3f}s ({} chars)".format(
+                timing, size
+            )
+        )
+
+        timing, values = 0, 0
+        for raw, vm in zip(raws, vms):
+            t, n = best_of(
+                args.repeat, read_leb128, vm.CM, raw, class_data_offsets(vm)
+            )
+            timing += t
+            values += n
+        print(
+            "  read LEB128 (best):        {:.3f}s ({} values)".format(
+                timing, values
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the decoding of all instructions of a DEX or APK file.
+
+Reports the time to disassemble every method and the memory held by the
+decoded instructions.
+
+    python benchmarks/bench_instructions.py [APK or DEX]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+from loguru import logger
+
+from androguard.core import androconf, apk, dex
+
+DEFAULT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "tests",
+    "data",
+    "APK",
+    "a2dp.Vol_137.apk",
+)
+
+
+def load_dex(filename):
+    if androconf.is_android(filename) == "APK":
+        return [dex.DEX(d) for d in apk.APK(filename).get_all_dex()]
+    with open(filename, "rb") as fp:
+        return [dex.DEX(fp.read())]
+
+
+def decode_all(vms):
+    instructions = []
+    for vm in vms:
+        for method in vm.get_encoded_methods():
+            code = method.get_code()
+            if code is None:
+                continue
+            bc = code.get_bc()
+            instructions.extend(
+                dex.LinearSweepAlgorithm.get_instructions(
+                    bc.CM, bc.size, bc.insn, bc.idx
+                )
+            )
+    return instructions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file", nargs="?", default=DEFAULT_FILE)
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.remove()
+    vms = load_dex(args.file)
+
+    timings = []
+    for _ in range(args.repeat):
+        gc.collect()
+        tic = time.perf_counter()
+        instructions = decode_all(vms)
+        timings.append(time.perf_counter() - tic)
+        del instructions
+
+    gc.collect()
+    tracemalloc.start()
+    instructions = decode_all(vms)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("instructions:        {}".format(len(instructions)))
+    print("decode time (best):  {:.3f}s".format(min(timings)))
+    print("memory:              {:.1f} MiB".format(memory / 2**20))
+    print("bytes per instruction: {:.1f}".format(memory / len(instructions)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Benchmark the stages of the analysis of APK and DEX files.
+
+Measures opening the APK, parsing the DEX files, Analysis.add,
+Analysis.create_xref, parsing resources.arsc, converting the
+AndroidManifest.xml and decompiling methods with DAD. For every stage the
+median wall time, the peak memory and the number of memory blocks which are
+retained by the result of the stage are reported.
+
+The results can be written to a JSON file and compared against the results
+of an earlier run, to find regressions:
+
+    python benchmarks/bench_stages.py --output baseline.json
+    python benchmarks/bench_stages.py --baseline baseline.json
+
+Both runs need at least MIN_REPEAT repetitions to be compared. The exit
+code is 1 if the median time of any stage got slower than the threshold and
+the noise of both runs allow, or if it uses more memory than the threshold
+allows.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+from loguru import logger
+
+from androguard import __version__
+from androguard.core import androconf, apk, axml, dex
+from androguard.core.analysis.analysis import Analysis
+from androguard.decompiler.decompile import DvMethod
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "data", "APK"
+)
+
+DEFAULT_FILES = [
+    os.path.join(DATA_DIR, "TestActivity.apk"),
+    os.path.join(DATA_DIR, "a2dp.Vol_137.apk"),
+    os.path.join(DATA_DIR, "Annotation_classes.dex"),
+]
+
+# Metrics which are compared against the baseline, with the minimal
+# absolute increase which counts as regression, to ignore the noise of
+# very short stages
+METRICS = {"time": 0.005, "peak_memory": 64 * 1024}
+
+# Minimal number of repetitions of a run which is compared
+MIN_REPEAT = 5
+
+
+def get_stages(filename, methods):
+    """
+    Return the stages for the given file, as a list of tuples of the name,
+    a setup function and the function to measure. The setup function
+    returns the arguments for the measured function and is not measured.
+    """
+    stages = []
+    state = {}
+
+    if androconf.is_android(filename) == "APK":
+
+        def open_apk():
+            return apk.APK(filename)
+
+        def parse_arsc(raw):
+            parser = axml.ARSCParser(raw)
+            parser.get_strings_resources()
+            return parser
+
+        def print_axml(raw):
+            return axml.AXMLPrinter(raw).get_xml()
+
+        state["apk"] = open_apk()
+        state["dex"] = list(state["apk"].get_all_dex())
+        stages.append(("apk", lambda: (), open_apk))
+        if state["apk"].get_file("resources.arsc"):
+            stages.append(
+                (
+                    "arsc",
+                    lambda: (state["apk"].get_file("resources.arsc"),),
+                    parse_arsc,
+                )
+            )
+        stages.append(
+            (
+                "axml",
+                lambda: (state["apk"].get_file("AndroidManifest.xml"),),
+                print_axml,
+            )
+        )
+    else:
+        with open(filename, "rb") as fp:
+            state["dex"] = [fp.read()]
+
+    def parse_dex(raws):
+        return [dex.DEX(raw) for raw in raws]
+
+    def add(vms):
+        dx = Analysis()
+        for vm in vms:
+            dx.add(vm)
+        return dx
+
+    def create_xref(dx):
+        dx.create_xref()
+        return dx
+
+    def decompile(mxs):
+        for mx in mxs:
+            z = DvMethod(mx)
+            z.process()
+        return len(mxs)
+
+    def get_methods():
+        dx = add(state["vms"])
+        mxs = [mx for mx in dx.get_methods() if not mx.is_external()]
+        return (mxs[:methods],)
+
+    state["vms"] = parse_dex(state["dex"])
+    stages += [
+        ("dex", lambda: (state["dex"],), parse_dex),
+        ("analysis_add", lambda: (state["vms"],), add),
+        ("create_xref", lambda: (add(state["vms"]),), create_xref),
+        ("decompile", get_methods, decompile),
+    ]
+    return stages
+
+
+def measure(setup, func, repeat):
+    """
+    Run `func` `repeat` times and return the median wall time and its
+    median absolute deviation, then run it once more to measure its memory.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup()
+        gc.collect()
+        tic = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - tic)
+        del result
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    # the number of live blocks, not of allocations: the blocks which are
+    # freed during the stage are not counted
+    blocks = sys.getallocatedblocks()
+    result = func(*args)
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    median = statistics.median(timings)
+    return {
+        "time": median,
+        "time_noise": statistics.median(abs(t - median) for t in timings),
+        "peak_memory": peak,
+        "retained_blocks": blocks,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare the results against the baseline and return the list of
+    regressions, as tuples of file, stage, metric, baseline and new value.
+
+    A time only counts as regression if it also exceeds three times the
+    noise of both runs.
+    """
+    regressions = []
+    for name, stages in results["files"].items():
+        for stage, metrics in stages.items():
+            old = baseline["files"].get(name, {}).get(stage)
+            if old is None:
+                continue
+            for metric, min_diff in METRICS.items():
+                if metric == "time":
+                    noise = max(metrics["time_noise"], old["time_noise"])
+                    min_diff = max(min_diff, 3 * noise)
+                diff = metrics[metric] - old[metric]
+                if diff > max(old[metric] * threshold, min_diff):
+                    regressions.append(
+                        (name, stage, metric, old[metric], metrics[metric])
+                    )
+    return regressions
+
+
+def format_value(metric, value):
+    if metric == "time":
+        return "{:.3f}s".format(value)
+    if metric == "peak_memory":
+        return "{:.1f} MiB".format(value / 2**20)
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=MIN_REPEAT,
+        help="number of timed runs per stage (default: {})".format(MIN_REPEAT),
+    )
+    parser.add_argument(
+        "--methods",
+        "-m",
+        type=int,
+        default=200,
+        help="number of methods to decompile (default: 200)",
+    )
+    parser.add_argument(
+        "--output", "-o", help="write the results to a JSON file"
+    )
+    parser.add_argument("--baseline", "-b", help="JSON file to compare with")
+    parser.add_argument(
+        "--threshold",
+        "-t",
+        type=float,
+        default=0.1,
+        help="allowed relative increase over the baseline (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        if min(args.repeat, baseline.get("repeat", 0)) < MIN_REPEAT:
+            parser.error(
+                "both runs need --repeat {} or more to be compared".format(
+                    MIN_REPEAT
+                )
+            )
+
+    logger.remove()
+
+    results = {
+        "androguard": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "files": {},
+    }
+    for filename in args.files:
+        name = os.path.basename(filename)
+        print(name)
+        results["files"][name] = {}
+        for stage, setup, func in get_stages(filename, args.methods):
+            metrics = measure(setup, func, args.repeat)
+            results["files"][name][stage] = metrics
+            print(
+                "  {:14} {:>10} {:>12} {:>10} blocks".format(
+                    stage,
+                    format_value("time", metrics["time"]),
+                    format_value("peak_memory", metrics["peak_memory"]),
+                    metrics["retained_blocks"],
+                )
+            )
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, stage, metric, old, new in regressions:
+            print(
+                "REGRESSION {} {} {}: {} -> {} ({:+.0%})".format(
+                    name,
+                    stage,
+                    metric,
+                    format_value(metric, old),
+                    format_value(metric, new),
+                    new / old - 1 if old else float("inf"),
+                )
+            )
+        if regressions:
+            sys.exit(1)
+        print("No regressions against {}".format(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import collections
 import os
+import tempfile
 import unittest
 from operator import itemgetter
 
 from androguard.core.analysis import analysis
+from androguard.core.analysis.cache import AnalysisCache
+from androguard.core.apk import APK
 from androguard.core.dex import DEX, EncodedMethod, HiddenApiClassDataItem
 from androguard.misc import AnalyzeAPK, AnalyzeDex
 from androguard.util import set_log
@@ -10,6 +14,57 @@ from androguard.util import set_log
 test_dir = os.path.dirname(os.path.abspath(__file__))
 
 
+def xref_summary(dx):
+    """All XREFs of an Analysis in a comparable form"""
+
+    def meths(xrefs):
+        return sorted((c.name, m.full_name, off) for c, m, off in xrefs)
+
+    methods = [
+        (
+            m.full_name,
+            meths(m.get_xref_to()),
+            meths(m.get_xref_from()),
+            sorted((c.name, str(f), off) for c, f, off in m.get_xref_read()),
+            sorted((c.name, str(f), off) for c, f, off in m.get_xref_write()),
+            sorted((c.name, off) for c, off in m.get_xref_new_instance()),
+            sorted((c.name, off) for c, off in m.get_xref_const_class()),
+        )
+        for m in dx.get_methods()
+    ]
+    cls = [
+        (
+            c.name,
+            sorted(
+                (o.name, int(k), m.full_name, off)
+                for o, refs in c.get_xref_to().items()
+                for k, m, off in refs
+            ),
+            sorted(
+                (o.name, int(k), m.full_name, off)
+                for o, refs in c.get_xref_from().items()
+                for k, m, off in refs
+            ),
+            sorted((m.full_name, off) for m, off in c.get_xref_new_instance()),
+            sorted((m.full_name, off) for m, off in c.get_xref_const_class()),
+        )
+        for c in dx.get_classes()
+    ]
+    strings = [
+        (s, meths(sa.get_xref_from(with_offset=True)))
+        for s, sa in dx.strings.items()
+    ]
+    fields = [
+        (
+            str(f.get_field()),
+            meths(f.get_xref_read(with_offset=True)),
+            meths(f.get_xref_write(with_offset=True)),
+        )
+        for f in dx.get_fields()
+    ]
+    return list(dx.classes), methods, cls, strings, fields
+
+
 class AnalysisTest(unittest.TestCase):
     def testDex(self):
         with open(os.path.join(test_dir, "data/APK/classes.dex"), "rb") as fd:
@@ -206,6 +261,262 @@ class AnalysisTest(unittest.TestCase):
         self.assertIn("Lcom/foobar/foo/Foobar;", dx.classes)
         self.assertFalse(dx.classes["Lcom/foobar/foo/Foobar;"].is_external())
 
+    def testIncrementalXrefs(self):
+        """Test create_xref after each added DEX"""
+        from zipfile import ZipFile
+
+        with ZipFile(os.path.join(test_dir, "data/APK/multidex.apk")) as myzip:
+            d1 = DEX(myzip.read("classes.dex"))
+            d2 = DEX(myzip.read("classes2.dex"))
+
+        def summary(dx):
+            # the insertion order of the classes differs
+            return [sorted(x) for x in xref_summary(dx)]
+
+        for compact_xrefs in [False, True]:
+            dx = analysis.Analysis(compact_xrefs=compact_xrefs)
+            dx.add(d1)
+            dx.add(d2)
+            dx.create_xref()
+
+            dx_inc = analysis.Analysis(compact_xrefs=compact_xrefs)
+            dx_inc.add(d2)
+            dx_inc.create_xref()
+            foobar = dx_inc.classes["Lcom/foobar/foo/Foobar;"]
+            self.assertTrue(foobar.is_external())
+            self.assertNotEqual(foobar.get_xref_from(), {})
+            # the indexes of the find_* methods are built now
+            self.assertEqual(
+                list(dx_inc.find_classes("Lcom/foobar/foo/Foobar;")), [foobar]
+            )
+            self.assertTrue(
+                all(
+                    m.is_external()
+                    for m in dx_inc.find_methods("Lcom/foobar/foo/Foobar;")
+                )
+            )
+
+            dx_inc.add(d1)
+            foobar = dx_inc.classes["Lcom/foobar/foo/Foobar;"]
+            self.assertFalse(foobar.is_external())
+            self.assertNotEqual(foobar.get_xref_from(), {})
+            self.assertEqual(
+                list(dx_inc.find_classes("Lcom/foobar/foo/Foobar;")), [foobar]
+            )
+            methods = list(dx_inc.find_methods("Lcom/foobar/foo/Foobar;"))
+            self.assertEqual(
+                sorted(m.full_name for m in methods),
+                sorted(m.full_name for m in foobar.get_methods()),
+            )
+            self.assertFalse(any(m.is_external() for m in methods))
+            dx_inc.create_xref()
+
+            self.assertEqual(summary(dx), summary(dx_inc))
+
+    def testLazyBasicBlocks(self):
+        """Test that the basic blocks are only created on first access"""
+        with open(os.path.join(test_dir, "data/APK/classes.dex"), "rb") as fd:
+            d = DEX(fd.read())
+
+        dx = analysis.Analysis(d)
+        dx.create_xref()
+        for mx in dx.get_methods():
+            self.assertIsNone(mx._basic_blocks)
+
+        mx = dx.get_method_analysis_by_name(
+            "Ltests/androguard/TestLoops;", "testBreakMid", "(Z)I"
+        )
+        bbs = mx.get_basic_blocks()
+        self.assertIs(mx.exceptions, mx._exceptions)
+        self.assertGreater(len(bbs), 1)
+
+        # The blocks cover all instructions without gaps
+        end = 0
+        for bb in bbs:
+            self.assertEqual(bb.get_start(), end)
+            end = bb.get_end()
+            self.assertIs(bbs.get_basic_block(bb.get_start()), bb)
+            self.assertIs(bbs.get_basic_block(end - 1), bb)
+        # get_length() is in 16-bit code units
+        self.assertEqual(end, mx.get_length() * 2)
+        self.assertIsNone(bbs.get_basic_block(end))
+
+    def testFindIndex(self):
+        """Test the literal prefix acceleration of the find_* methods"""
+        self.assertEqual(
+            analysis._literal_prefix("Landroid/app/"), "Landroid/app/"
+        )
+        self.assertEqual(
+            analysis._literal_prefix(r"^Lcom\/a\$b.*"), "Lcom/a$b"
+        )
+        self.assertEqual(analysis._literal_prefix("ab?c"), "a")
+        self.assertEqual(analysis._literal_prefix("Lfoo;|Lbar;"), "")
+        self.assertEqual(analysis._literal_prefix("(?i)Lfoo;"), "")
+
+        index = analysis.NameIndex(["Lb;", "La/b;", "Lc;", "La/a;", "La;"])
+        self.assertEqual(index.find("La"), [1, 3, 4])
+        self.assertEqual(index.find("La/"), [1, 3])
+        self.assertEqual(index.find("La/.;"), [1, 3])
+        self.assertEqual(index.find(".*b;"), [0, 1])
+        self.assertEqual(index.find("Lx"), [])
+
+        from zipfile import ZipFile
+
+        with ZipFile(os.path.join(test_dir, "data/APK/multidex.apk")) as myzip:
+            d1 = DEX(myzip.read("classes.dex"))
+            d2 = DEX(myzip.read("classes2.dex"))
+
+        dx = analysis.Analysis(d1)
+        self.assertEqual(len(list(dx.find_classes("Lcom/blafoo/"))), 0)
+        self.assertEqual(len(list(dx.find_methods(methodname="blafoo"))), 0)
+
+        # The index has to follow new classes and methods
+        dx.add(d2)
+        self.assertEqual(
+            [c.name for c in dx.find_classes("Lcom/blafoo/")],
+            ["Lcom/blafoo/bar/Blafoo;"],
+        )
+        self.assertEqual(
+            list(dx.find_classes("Lcom/")),
+            [c for name, c in dx.classes.items() if name.startswith("Lcom/")],
+        )
+        self.assertEqual(
+            list(dx.find_methods(methodname="<init>")),
+            [m for m in dx.get_methods() if m.name == "<init>"],
+        )
+
+    def testParallelXrefs(self):
+        """Test that the parallel XREF creation gives the same results"""
+        with open(os.path.join(test_dir, "data/APK/classes.dex"), "rb") as fd:
+            d = DEX(fd.read())
+
+        dx_serial = analysis.Analysis(d)
+        dx_serial.create_xref()
+
+        dx_parallel = analysis.Analysis(d)
+        dx_parallel.create_xref(workers=2)
+
+        self.assertEqual(xref_summary(dx_serial), xref_summary(dx_parallel))
+
+    def testCompactXrefs(self):
+        """Test that the XrefStore gives the same results"""
+        a = APK(os.path.join(test_dir, "data/APK/a2dp.Vol_137.apk"))
+        d = [DEX(dex_bytes) for dex_bytes in a.get_all_dex()]
+
+        dx = analysis.Analysis()
+        dx_compact = analysis.Analysis(compact_xrefs=True)
+        for df in d:
+            dx.add(df)
+            dx_compact.add(df)
+        dx.create_xref()
+        dx_compact.create_xref()
+
+        self.assertIsNone(dx.xref_store)
+        self.assertIsInstance(dx_compact.xref_store, analysis.XrefStore)
+        self.assertEqual(xref_summary(dx), xref_summary(dx_compact))
+
+        calls = list(dx_compact.xref_store.get_method_calls())
+        self.assertEqual(
+            len(calls), sum(len(m.get_xref_to()) for m in dx.get_methods())
+        )
+
+    def testXrefTable(self):
+        """Test the index of the XrefTable while rows are added"""
+        table = analysis.XrefTable(key='I', offset='I')
+        expected = collections.defaultdict(list)
+        for row in range(1000):
+            key = (row * 7) % 13
+            table.append(key=key, offset=row)
+            expected[key].append(row)
+            if row % 3 == 0:
+                self.assertEqual(list(table.rows('key', key)), expected[key])
+        for key in range(15):
+            self.assertEqual(list(table.rows('key', key)), expected[key])
+
+    def testCompactXrefsAdd(self):
+        """Test the add_xref_* methods with the XrefStore"""
+        with open(os.path.join(test_dir, "data/APK/classes.dex"), "rb") as fd:
+            d = DEX(fd.read())
+
+        for compact_xrefs in [False, True]:
+            dx = analysis.Analysis(d, compact_xrefs=compact_xrefs)
+            dx.create_xref()
+            ca = dx.classes['Ltests/androguard/TestActivity;']
+            m = next(iter(ca.get_methods()))
+            other = dx.classes['Ljava/lang/Object;']
+            meth = next(iter(other.get_methods()))
+            field = next(iter(ca.get_fields()))
+            string = next(iter(dx.strings.values()))
+
+            m.add_xref_to(other, meth, 1000)
+            m.add_xref_from(other, meth, 1001)
+            m.add_xref_read(ca, field.get_field(), 1002)
+            m.add_xref_write(ca, field.get_field(), 1003)
+            m.add_xref_new_instance(other, 1004)
+            m.add_xref_const_class(other, 1005)
+            ca.add_method_xref_to(m, other, meth, 1006)
+            ca.add_method_xref_from(m, other, meth, 1007)
+            ca.add_field_xref_read(m, ca, field.get_field(), 1008)
+            ca.add_field_xref_write(m, ca, field.get_field(), 1009)
+            ca.add_xref_to(analysis.REF_TYPE.INVOKE_STATIC, other, meth, 1010)
+            ca.add_xref_from(
+                analysis.REF_TYPE.INVOKE_STATIC, other, meth, 1011
+            )
+            ca.add_xref_new_instance(m, 1012)
+            ca.add_xref_const_class(m, 1013)
+            string.add_xref_from(ca, m, 1014)
+
+            self.assertIn((other, meth, 1000), m.get_xref_to())
+            self.assertIn((other, meth, 1001), m.get_xref_from())
+            self.assertIn((ca, field.get_field(), 1002), m.get_xref_read())
+            self.assertIn((ca, field.get_field(), 1003), m.get_xref_write())
+            self.assertIn((other, 1004), m.get_xref_new_instance())
+            self.assertIn((other, 1005), m.get_xref_const_class())
+            self.assertIn((other, meth, 1006), m.get_xref_to())
+            self.assertIn((other, meth, 1007), m.get_xref_from())
+            self.assertIn((ca, m), field.get_xref_read())
+            self.assertIn((ca, m, 1009), field.get_xref_write(True))
+            self.assertIn(
+                (analysis.REF_TYPE.INVOKE_STATIC, meth, 1010),
+                ca.get_xref_to()[other],
+            )
+            self.assertIn(
+                (analysis.REF_TYPE.INVOKE_STATIC, meth, 1011),
+                ca.get_xref_from()[other],
+            )
+            self.assertIn((m, 1012), ca.get_xref_new_instance())
+            self.assertIn((m, 1013), ca.get_xref_const_class())
+            self.assertIn((ca, m, 1014), string.get_xref_from(True))
+
+    def testXrefCache(self):
+        """Test that the XREFs loaded from the cache are the same"""
+        with open(os.path.join(test_dir, "data/APK/classes.dex"), "rb") as fd:
+            buff = fd.read()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AnalysisCache(tmp)
+            d = DEX(buff)
+            self.assertIsNone(cache.load(d))
+
+            dx = analysis.Analysis(d)
+            dx.create_xref(cache=cache)
+            self.assertTrue(os.path.isfile(cache.get_path(d)))
+
+            d_cached = DEX(buff)
+            self.assertIsNotNone(cache.load(d_cached))
+            dx_cached = analysis.Analysis(d_cached)
+            dx_cached.create_xref(cache=cache)
+            self.assertEqual(xref_summary(dx), xref_summary(dx_cached))
+
+            # A broken cache file is ignored and rewritten
+            with open(cache.get_path(d), "r+b") as fd:
+                fd.truncate(100)
+            self.assertIsNone(cache.load(d))
+            dx_broken = analysis.Analysis(DEX(buff))
+            dx_broken.create_xref(cache=cache)
+            self.assertEqual(xref_summary(dx), xref_summary(dx_broken))
+            self.assertIsNotNone(cache.load(d))
+
     def testInterfaces(self):
         h, d, dx = AnalyzeDex(
             os.path.join(test_dir, "data/APK/InterfaceCls.dex")
@@ -4,7 +4,11 @@ import binascii
 import glob
 import hashlib
 import os
+import pickle
+import struct
+import tempfile
 import unittest
+import zipfile
 from unittest.mock import MagicMock, patch
 
 from androguard.core import apk, axml
@@ -897,6 +901,81 @@ class APKTest(unittest.TestCase):
         self.assertNotIn("META-INF/CERT.RSA", a.get_signature_names())
         self.assertIn("META-INF/6AD89F48.RSA", a.get_signature_names())
 
+    def testManifestAttributes(self):
+        a = APK(os.path.join(test_dir, 'data/APK/a2dp.Vol_137.apk'))
+        attributes = apk.get_manifest_attributes(
+            a.get_file("AndroidManifest.xml")
+        )
+        self.assertEqual(attributes["package"], a.get_package())
+        self.assertEqual(
+            attributes["versionCode"], a.get_androidversion_code()
+        )
+        self.assertEqual(
+            attributes["versionName"], a.get_androidversion_name()
+        )
+
+    def testManifestMinSdkVersion(self):
+        for name in ('a2dp.Vol_137.apk', 'TestActivity.apk'):
+            a = APK(os.path.join(test_dir, 'data/APK', name))
+            self.assertEqual(
+                apk.get_min_sdk_version(a.get_file("AndroidManifest.xml")),
+                a.get_min_sdk_version(),
+            )
+
+    def testApkidResourceVersionName(self):
+        filename = os.path.join(test_dir, 'data/APK/TestActivity.apk')
+        a = APK(filename)
+        self.assertEqual(
+            apk.get_apkid(filename), (a.get_package(), '1', '1.0')
+        )
+
+        # Turn the versionName into a reference to the app_name string
+        res_id = a.get_android_resources().get_res_id_by_key(
+            a.get_package(), 'string', 'app_name'
+        )
+        manifest = bytearray(a.get_file('AndroidManifest.xml'))
+        sb = axml.AXMLParser(bytes(manifest)).sb
+        for off in range(0, len(manifest) - 20, 4):
+            _, name, raw, size, _, _type, data = struct.unpack_from(
+                '<iiiHBBi', manifest, off
+            )
+            if (
+                size == 8
+                and _type == axml.TYPE_STRING
+                and raw == data
+                and 0 <= name < len(sb)
+                and sb[name] == 'versionName'
+            ):
+                struct.pack_into(
+                    '<iHBBI',
+                    manifest,
+                    off + 8,
+                    -1,
+                    8,
+                    0,
+                    axml.TYPE_REFERENCE,
+                    res_id,
+                )
+                break
+        else:
+            self.fail('versionName attribute not found')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            patched = os.path.join(tmp, 'patched.apk')
+            with zipfile.ZipFile(filename) as zin, zipfile.ZipFile(
+                patched, 'w'
+            ) as zout:
+                for info in zin.infolist():
+                    content = zin.read(info)
+                    if info.filename == 'AndroidManifest.xml':
+                        content = bytes(manifest)
+                    zout.writestr(info, content)
+
+            self.assertEqual(
+                apk.get_apkid(patched),
+                (a.get_package(), '1', 'TestsAndroguardApplication'),
+            )
+
     def testFrameworkResAPK(self):
         a = APK(
             os.path.join(
@@ -987,6 +1066,71 @@ class APKTest(unittest.TestCase):
                 'permissionGroup', perm['android.permission.INTERNET']
             )
 
+    def testPermissionMappingCache(self):
+        """Test the process wide cache of the permission mappings"""
+        import json
+        import marshal
+        import tempfile
+
+        from androguard.core import api_specific_resources as res
+        from androguard.core.androconf import load_api_specific_resource_module
+
+        permissions = res.load_permissions(25)
+        self.assertEqual(permissions, res.load_permissions(25))
+        mapping = res.load_permission_mappings(25)
+        self.assertEqual(mapping, res.load_permission_mappings(25))
+
+        # the returned dictionaries are copies of the cached ones
+        name = next(iter(permissions))
+        del permissions[name]
+        self.assertIn(name, res.load_permissions(25))
+        api = next(iter(mapping))
+        del mapping[api]
+        self.assertIn(api, res.load_permission_mappings(25))
+        mapping = res.load_permission_mappings(25)
+
+        inverted = load_api_specific_resource_module(
+            'permission_api_mappings', 25
+        )
+        for api, permissions in mapping.items():
+            for permission in permissions:
+                self.assertIn(api, inverted[permission])
+        self.assertEqual(
+            sum(map(len, inverted.values())),
+            sum(len(set(v)) for v in mapping.values()),
+        )
+        inverted.clear()
+        self.assertTrue(res.load_permission_api_mappings(25))
+        self.assertEqual(res.load_permission_api_mappings(1), {})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "permissions_1.json")
+            with open(filename, "w") as fp:
+                json.dump({"a": ["b"]}, fp)
+            self.assertEqual(res._load_resource(filename), {"a": ["b"]})
+
+            # a file compiled from the current JSON file is preferred
+            compiled = res._get_compiled_path(filename)
+            os.makedirs(os.path.dirname(compiled))
+            with open(compiled, "wb") as fp:
+                marshal.dump((res._get_source_stamp(filename), {"c": ["d"]}), fp)
+            res._load_resource.cache_clear()
+            self.assertEqual(res._load_resource(filename), {"c": ["d"]})
+
+            # but not once the JSON file has changed, whatever the mtimes
+            with open(filename, "w") as fp:
+                json.dump({"a": ["e"]}, fp)
+            os.utime(filename, (0, 0))
+            res._load_resource.cache_clear()
+            self.assertEqual(res._load_resource(filename), {"a": ["e"]})
+
+            # nor if it has an unknown format
+            with open(compiled, "wb") as fp:
+                marshal.dump({"c": ["d"]}, fp)
+            res._load_resource.cache_clear()
+            self.assertEqual(res._load_resource(filename), {"a": ["e"]})
+        res._load_resource.cache_clear()
+
     def testCustomPermissionProtectionLevel(self):
         a = APK(
             os.path.join(
@@ -1079,6 +1223,135 @@ class APKTest(unittest.TestCase):
                 '98917cd03c6277d73d58b661d614c442f2981a35a5aa122a61049215ba85c1d4',
             )
 
+    def testLazyAPK(self):
+        root = os.path.join(test_dir, 'data/APK/apksig')
+
+        def signature_info(a):
+            info = []
+            for f in [
+                a.is_signed_v1,
+                a.is_signed_v2,
+                a.is_signed_v3,
+                a.get_certificates_der_v2,
+                a.get_certificates_der_v3,
+            ]:
+                try:
+                    info.append(f())
+                except (apk.BrokenAPKError, NotImplementedError) as e:
+                    info.append(type(e))
+            return info
+
+        for apath in sorted(os.listdir(root)):
+            if not apath.endswith(".apk"):
+                continue
+            filename = os.path.join(root, apath)
+            a = APK(filename)
+            a_lazy = APK(filename, lazy=True)
+            self.assertEqual(a_lazy.get_files(), a.get_files())
+            self.assertEqual(a_lazy.get_package(), a.get_package())
+            self.assertEqual(signature_info(a_lazy), signature_info(a))
+            a_lazy.close()
+
+        filename = os.path.join(test_dir, 'data/APK/a2dp.Vol_137.apk')
+        a = APK(filename, lazy=True, testzip=True)
+        with open(filename, "rb") as fp:
+            raw = fp.read()
+        self.assertEqual(a.get_raw(), raw)
+        self.assertEqual(a.get_dex(), APK(filename).get_dex())
+        self.assertEqual(a.get_digest(), hashlib.sha256(raw).digest())
+        self.assertEqual(
+            a.get_digest("sha1", 100, 5000, chunk_size=1000),
+            hashlib.sha1(raw[100:5000]).digest(),
+        )
+
+        # pickling does not change the original APK
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(a.get_raw(), raw)
+        self.assertEqual(a.get_files(), b.get_files())
+        self.assertEqual(b.get_raw(), raw)
+        a.close()
+        b.close()
+
+    def testFindCentralDirectory(self):
+        import io
+        import struct
+        import zipfile
+
+        buff = io.BytesIO()
+        with zipfile.ZipFile(buff, "w") as z:
+            z.writestr("a.txt", b"a" * 100)
+            z.writestr("b.txt", b"b")
+            # A fake EOCD signature in the comment
+            z.comment = b"PK\x05\x06" + b"\x00" * 30
+        data = buff.getvalue()
+        cd_offset = data.index(b"PK\x01\x02")
+        cd_size = len(data) - 22 - 34 - cd_offset
+        self.assertEqual(
+            apk.find_central_directory(io.BytesIO(data)), (cd_offset, cd_size)
+        )
+        self.assertIsNone(apk.find_central_directory(io.BytesIO(b"PK" * 100)))
+
+        # The same archive as ZIP64 without comment
+        data = data[: cd_offset + cd_size]
+        zip64_eocd = struct.pack(
+            '<4sQHHIIQQQQ',
+            b"PK\x06\x06",
+            44,
+            45,
+            45,
+            0,
+            0,
+            2,
+            2,
+            cd_size,
+            cd_offset,
+        )
+        locator = struct.pack('<4sIQI', b"PK\x06\x07", 0, len(data), 1)
+        eocd = struct.pack(
+            '<4sHHHHIIH', b"PK\x05\x06", 0, 0, 2, 2, cd_size, 0xFFFFFFFF, 0
+        )
+        data += zip64_eocd + locator + eocd
+        self.assertEqual(
+            apk.find_central_directory(io.BytesIO(data)), (cd_offset, cd_size)
+        )
+
+        # Data appended after the EOCD is searched as well
+        data += bytes(200000)
+        self.assertEqual(
+            apk.find_central_directory(io.BytesIO(data)), (cd_offset, cd_size)
+        )
+
+    def testParseSigningBlock(self):
+        filename = os.path.join(
+            test_dir, 'data/APK/apksig/v1v2v3-with-rsa-2048-lineage-3-signers.apk',
+        )
+        a = APK(filename, skip_analysis=True)
+
+        with open(filename, "rb") as fp:
+            blocks = apk.parse_apk_signing_block(fp)
+        ids = [b.id for b in blocks]
+        self.assertIn(apk.APK_SIG_KEY_V2_SIGNATURE, ids)
+        self.assertIn(apk.APK_SIG_KEY_V3_SIGNATURE, ids)
+        self.assertFalse(any(b.is_duplicate_id for b in blocks))
+
+        v2 = blocks[ids.index(apk.APK_SIG_KEY_V2_SIGNATURE)]
+        signers = apk.parse_signers(v2.data)
+        self.assertEqual(
+            [c for s in signers for c in s.signed_data.certificates],
+            a.get_certificates_der_v2(),
+        )
+
+        v3 = blocks[ids.index(apk.APK_SIG_KEY_V3_SIGNATURE)]
+        signers = apk.parse_signers(v3.data, v3=True)
+        self.assertEqual(len(signers), 1)
+        self.assertEqual(signers[0].public_key, a.get_public_keys_der_v3()[0])
+        self.assertEqual(signers[0].minSDK, 24)
+
+        # No APK Signing Block
+        filename = os.path.join(test_dir, 'data/APK/TestActivity.apk')
+        with open(filename, "rb") as fp:
+            self.assertEqual(apk.parse_apk_signing_block(fp), [])
+
 
 if __name__ == '__main__':
     unittest.main(failfast=True)
@@ -227,6 +227,50 @@ class ARSCTest(unittest.TestCase):
             ["Jamendo"],
         )
 
+    def testLazy(self):
+        a = apk.APK(os.path.join(test_dir, 'data/APK/a2dp.Vol_137.apk'))
+        raw = a.get_file("resources.arsc")
+        eager = axml.ARSCParser(raw)
+        lazy = axml.ARSCParser(raw, lazy=True)
+
+        p = eager.get_packages_names()[0]
+        self.assertEqual(lazy.get_packages_names(), [p])
+        for locale in eager.get_locales(p):
+            for name, value in eager.values[p][locale]["string"]:
+                self.assertEqual(
+                    lazy.get_string(p, name, locale), [name, value]
+                )
+            for res_type, name, rid in eager.values[p][locale]["public"]:
+                self.assertEqual(
+                    lazy.get_id(p, rid, locale), (res_type, name, rid)
+                )
+                self.assertEqual(
+                    lazy.get_res_id_by_key(p, res_type, name),
+                    eager.get_res_id_by_key(p, res_type, name),
+                )
+        self.assertIsNone(lazy.get_string(p, "foobar"))
+        self.assertEqual(lazy.get_id(p, 0x7F7F0001), (None, None, None))
+
+        for rid in eager.resource_values:
+            self.assertEqual(
+                lazy.get_resolved_res_configs(rid),
+                eager.get_resolved_res_configs(rid),
+            )
+        # nothing has been decoded as a whole yet
+        self.assertFalse(lazy.analyzed)
+        self.assertLessEqual(
+            len(lazy._entry_cache), axml.ARSCParser.ENTRY_CACHE_SIZE
+        )
+
+        self.assertEqual(
+            lazy.get_strings_resources(), eager.get_strings_resources()
+        )
+        self.assertEqual(lazy.packages.keys(), eager.packages.keys())
+        self.assertEqual(
+            [type(i) for i in lazy.packages[p]],
+            [type(i) for i in eager.packages[p]],
+        )
+
     def testIDParsing(self):
         parser = axml.ARSCParser.parse_id
 
@@ -1,5 +1,6 @@
 import io
 import os
+import struct
 import unittest
 from xml.dom import minidom
 
@@ -307,6 +308,62 @@ class AXMLTest(unittest.TestCase):
         )
         self.assertFalse(a.is_valid())
 
+    def testStringBlock(self):
+        """Test the decoding of UTF-8 and UTF-16 string pools"""
+        strings = ["", "abc", "été", "x" * 200, "中文", "\ufeffbom"]
+
+        def length(n, sizeof_char):
+            if n < (0x80 << (8 * (sizeof_char - 1))):
+                return n.to_bytes(sizeof_char, "little")
+            high = (n >> (8 * sizeof_char)) | (0x80 << (8 * (sizeof_char - 1)))
+            low = n & ((1 << (8 * sizeof_char)) - 1)
+            return high.to_bytes(sizeof_char, "big") + low.to_bytes(
+                sizeof_char, "little"
+            )
+
+        for utf8 in (True, False):
+            offsets, data = [], b""
+            for s in strings:
+                offsets.append(len(data))
+                if utf8:
+                    encoded = s.encode("utf-8")
+                    data += length(len(s), 1) + length(len(encoded), 1)
+                    data += encoded + b"\x00"
+                else:
+                    data += length(len(s), 2)
+                    data += s.encode("utf-16-le") + b"\x00\x00"
+            data += b"\x00" * (-len(data) % 4)
+
+            strings_offset = 28 + 4 * len(strings)
+            buff = io.BufferedReader(
+                io.BytesIO(
+                    struct.pack(
+                        "<HHIIIIII",
+                        axml.RES_STRING_POOL_TYPE,
+                        28,
+                        strings_offset + len(data),
+                        len(strings),
+                        0,
+                        axml.UTF8_FLAG if utf8 else 0,
+                        strings_offset,
+                        0,
+                    )
+                    + struct.pack("<{}I".format(len(strings)), *offsets)
+                    + data
+                )
+            )
+            header = axml.ARSCHeader(buff)
+            sb = axml.StringBlock(buff, header)
+
+            self.assertEqual(list(sb.m_stringOffsets), offsets)
+            self.assertEqual(sb.getString(1), "abc")
+            self.assertEqual(sb.getString(len(strings)), "")
+            self.assertEqual(list(sb), strings)
+            # decode all strings of a fresh string block at once
+            buff.seek(0)
+            sb = axml.StringBlock(buff, axml.ARSCHeader(buff))
+            self.assertEqual(sb.decode_all(), strings)
+
     def testArscHeader(self):
         """Test if wrong arsc headers are rejected"""
         with self.assertRaises(axml.ResParserError) as cnx:
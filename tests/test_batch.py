@@ -0,0 +1,219 @@
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from androguard.batch import (
+    BatchScanner,
+    iter_apk_files,
+    scan_signatures,
+    write_json_lines,
+)
+from androguard.core.apk import APK, get_apkid
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def scan_pid(filename):
+    return os.getpid()
+
+
+def scan_exit(filename):
+    if filename == "exit":
+        # the worker dies after it sent the result
+        threading.Timer(0.1, os._exit, (1,)).start()
+    return filename
+
+
+def scan_sleep(filename):
+    if filename == "slow":
+        time.sleep(60)
+    return filename
+
+
+class BatchTest(unittest.TestCase):
+    def testScanAPK(self):
+        apk = os.path.join(test_dir, "data/APK/TestActivity.apk")
+        with tempfile.TemporaryDirectory() as tmp:
+            broken = os.path.join(tmp, "broken.apk")
+            with open(broken, "wb") as fp:
+                fp.write(b"PK not really an APK")
+            failure_log = os.path.join(tmp, "failures.jsonl")
+
+            self.assertEqual(list(iter_apk_files([apk, tmp])), [apk, broken])
+
+            scanner = BatchScanner(workers=2, failure_log=failure_log)
+            output = io.StringIO()
+            nb = write_json_lines(
+                scanner.scan(iter_apk_files([apk, tmp])), output
+            )
+            self.assertEqual(nb, 2)
+
+            results = {}
+            for line in output.getvalue().splitlines():
+                result = json.loads(line)
+                results[result["filename"]] = result
+
+            self.assertEqual(results[apk]["status"], "ok")
+            summary = results[apk]["result"]
+            self.assertEqual(summary["package"], "tests.androguard")
+            self.assertEqual(summary["version_code"], "1")
+            self.assertIn("activities", summary)
+            self.assertIn("api_usage", summary)
+
+            self.assertEqual(results[broken]["status"], "error")
+            with open(failure_log) as fp:
+                failures = [json.loads(line) for line in fp]
+            self.assertEqual(len(failures), 1)
+            self.assertEqual(failures[0]["filename"], broken)
+
+    def testWorkerRecycling(self):
+        scanner = BatchScanner(workers=1, max_tasks=2, scan=scan_pid)
+        pids = [r["result"] for r in scanner.scan(["a", "b", "c", "d"])]
+        self.assertEqual(len(pids), 4)
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[1], pids[2])
+
+    def testTimeout(self):
+        scanner = BatchScanner(workers=2, timeout=1, scan=scan_sleep)
+        tic = time.time()
+        results = {r["filename"]: r for r in scanner.scan(["slow", "a", "b"])}
+        self.assertLess(time.time() - tic, 30)
+        self.assertEqual(results["slow"]["status"], "timeout")
+        self.assertEqual(results["a"]["result"], "a")
+        self.assertEqual(results["b"]["result"], "b")
+
+    def testDeadIdleWorker(self):
+        def produce():
+            yield "exit"
+            time.sleep(1)
+            yield "a"
+
+        scanner = BatchScanner(workers=1, scan=scan_exit)
+        results = list(scanner.scan(produce()))
+        self.assertEqual(
+            [(r["status"], r["result"]) for r in results],
+            [("ok", "exit"), ("ok", "a")],
+        )
+
+    def testScanSignatures(self):
+        data_dir = os.path.join(test_dir, "data/APK")
+        signed = os.path.join(data_dir, "TestActivity_signed_both.apk")
+        unsigned = os.path.join(data_dir, "TestActivity_unsigned.apk")
+
+        scanner = BatchScanner(
+            workers=2,
+            scan=functools.partial(
+                scan_signatures, hashes=["sha1", "sha256"], details=True
+            ),
+        )
+        results = {r["filename"]: r for r in scanner.scan([signed, unsigned])}
+
+        # the same certificates as found by the full analysis
+        a = APK(signed)
+        certs = dict.fromkeys(
+            a.get_certificates_der_v2()
+            + [a.get_certificate_der(x) for x in a.get_signature_names()]
+        )
+
+        result = results[signed]["result"]
+        self.assertEqual(result["package"], a.get_package())
+        self.assertTrue(result["is_signed_v1"])
+        self.assertTrue(result["is_signed_v2"])
+        self.assertFalse(result["is_signed_v3"])
+        self.assertEqual(
+            [c["hashes"]["sha256"] for c in result["certificates"]],
+            [hashlib.sha256(c).hexdigest() for c in certs],
+        )
+        self.assertEqual(
+            [c["hashes"]["sha1"] for c in result["certificates"]],
+            [hashlib.sha1(c).hexdigest() for c in certs],
+        )
+        self.assertEqual(len(result["public_keys"]), 1)
+        self.assertIn("subject", result["certificates"][0])
+        self.assertIn("bit_size", result["public_keys"][0])
+        json.dumps(result)
+
+        result = results[unsigned]["result"]
+        self.assertFalse(result["is_signed_v1"])
+        self.assertFalse(result["is_signed_v2"])
+        self.assertEqual(result["certificates"], [])
+
+    def testScanSignaturesNoManifest(self):
+        filename = os.path.join(test_dir, "data/APK/CertChain.apk")
+        result = scan_signatures(filename)
+
+        a = APK(filename)
+        self.assertEqual(result["package"], "")
+        self.assertTrue(result["is_signed_v1"])
+        self.assertEqual(
+            [c["hashes"]["sha1"] for c in result["certificates"]],
+            [
+                hashlib.sha1(a.get_certificate_der(x)).hexdigest()
+                for x in a.get_signature_names()
+            ],
+        )
+
+    def testScanApkid(self):
+        data_dir = os.path.join(test_dir, "data/APK")
+        filenames = [
+            os.path.join(data_dir, "TestActivity.apk"),
+            os.path.join(data_dir, "a2dp.Vol_137.apk"),
+            os.path.join(data_dir, "TestActivity_unsigned.apk"),
+        ]
+        consumed = []
+
+        def produce():
+            for filename in filenames:
+                consumed.append(filename)
+                yield filename
+
+        scanner = BatchScanner(workers=1, scan=get_apkid)
+        results = scanner.scan(produce())
+
+        # the input is only read as the workers become free
+        first = next(results)
+        self.assertEqual(first["filename"], filenames[0])
+        self.assertLess(len(consumed), len(filenames))
+
+        results = [first] + list(results)
+        self.assertEqual([r["filename"] for r in results], filenames)
+        for r in results:
+            a = APK(r["filename"])
+            self.assertEqual(
+                r["result"],
+                (
+                    a.get_package(),
+                    a.get_androidversion_code(),
+                    a.get_androidversion_name(),
+                ),
+            )
+
+    def testApkidMainError(self):
+        from androguard.cli.main import androapkid_main
+
+        apk = os.path.join(test_dir, "data/APK/TestActivity.apk")
+        missing = os.path.join(test_dir, "data/APK/missing.apk")
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+            stderr
+        ):
+            androapkid_main([apk, missing])
+
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(list(results), [apk, missing])
+        self.assertIsNotNone(results[apk])
+        self.assertIsNone(results[missing])
+        self.assertIn("Error in {}".format(missing), stderr.getvalue())
+        self.assertNotIn(apk, stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import os
 import shutil
+import tempfile
 import unittest
 
 from androguard import session
@@ -14,7 +15,10 @@ class TestCLIDecompile(unittest.TestCase):
         test_testactivity_apk_path = os.path.join(
             test_dir, 'data/APK/TestActivity.apk'
         )
-        cls.s = session.Session()
+        cls.tmp = tempfile.mkdtemp()
+        cls.s = session.Session(
+            db_url="sqlite:///" + os.path.join(cls.tmp, "androguard.db")
+        )
         with open(test_testactivity_apk_path, "rb") as fd:
             cls.s.add(test_testactivity_apk_path, fd.read())
 
@@ -30,11 +34,41 @@ class TestCLIDecompile(unittest.TestCase):
             None,
         )
 
+    def testDecompileJobs(self):
+        """test that parallel decompilation writes the same files"""
+        results = []
+        for jobs in (0, 2):
+            output = os.path.join(
+                test_dir, 'tmp_TestActivity_decompilation_{}'.format(jobs)
+            )
+            export_apps_to_format(
+                None, self.s, output, None, False, None, None, jobs
+            )
+            files = {}
+            for root, _, names in os.walk(output):
+                for name in names:
+                    path = os.path.join(root, name)
+                    with open(path) as fp:
+                        files[os.path.relpath(path, output)] = fp.read()
+            results.append(files)
+
+        self.assertIn(
+            os.path.join('tests', 'androguard', 'TestActivity.java'),
+            results[0],
+        )
+        self.assertEqual(results[0], results[1])
+
     @classmethod
     def tearDownClass(cls):
-        decomp_dir = os.path.join(test_dir, 'tmp_TestActivity_decompilation')
-        if os.path.exists(decomp_dir):
-            shutil.rmtree(decomp_dir)
+        for name in (
+            'tmp_TestActivity_decompilation',
+            'tmp_TestActivity_decompilation_0',
+            'tmp_TestActivity_decompilation_2',
+        ):
+            decomp_dir = os.path.join(test_dir, name)
+            if os.path.exists(decomp_dir):
+                shutil.rmtree(decomp_dir)
+        shutil.rmtree(cls.tmp)
 
 
 if __name__ == '__main__':
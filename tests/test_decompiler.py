@@ -1,8 +1,11 @@
 import os
 import re
+import tempfile
 import unittest
 
+from androguard.decompiler.cache import DecompilationCache, get_method_key
 from androguard.decompiler.decompile import DvClass, DvMethod
+from androguard.decompiler.decompiler import DecompilerDAD
 from androguard.misc import AnalyzeAPK, AnalyzeDex
 
 test_dir = os.path.dirname(os.path.abspath(__file__))
@@ -32,6 +35,50 @@ class DecompilerTest(unittest.TestCase):
         # Failed version of short array
         self.assertNotIn("{5, 0, 10, 0};", z.get_source())
 
+    def testCache(self):
+        h, d, dx = AnalyzeDex(
+            os.path.join(test_dir, 'data/APK/FillArrays.dex')
+        )
+        methods = list(d.get_encoded_methods())
+        keys = [get_method_key(dx.get_method(m)) for m in methods]
+        self.assertEqual(len(set(keys)), len(methods))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dad = DecompilerDAD(d, dx, DecompilationCache(tmp))
+            sources = [dad.get_source_method(m) for m in methods]
+            asts = [dad.get_ast_method(m) for m in methods]
+            self.assertEqual(dad.cache.misses, 2 * len(methods))
+            self.assertEqual(len(dad.cache), 2 * len(methods))
+
+            # A new cache on the same directory finds all entries
+            dad = DecompilerDAD(d, dx, DecompilationCache(tmp))
+            self.assertEqual(
+                [dad.get_source_method(m) for m in methods], sources
+            )
+            self.assertEqual([dad.get_ast_method(m) for m in methods], asts)
+            self.assertEqual(dad.cache.hits, 2 * len(methods))
+            self.assertEqual(dad.cache.misses, 0)
+
+            # Only the most recently used entries are kept
+            cache = DecompilationCache(tmp, max_size=dad.cache.size // 2)
+            cache.put(keys[0], 'source', sources[0])
+            self.assertLessEqual(cache.size, cache.max_size)
+            self.assertLess(len(os.listdir(tmp)), 2 * len(methods))
+            self.assertEqual(cache.get(keys[0], 'source'), sources[0])
+
+            # An entry removed by another process is no longer counted
+            size = cache.size
+            for name in os.listdir(tmp):
+                if name.startswith(keys[0]):
+                    os.remove(os.path.join(tmp, name))
+            self.assertIsNone(cache.get(keys[0], 'source'))
+            self.assertLess(cache.size, size)
+            self.assertEqual(cache.size, sum(cache._entries.values()))
+
+            cache.clear()
+            self.assertEqual(os.listdir(tmp), [])
+            self.assertIsNone(cache.get(keys[0], 'source'))
+
     def test_all_decompiler(self):
         # Generate test cases for this APK:
         a, d, dx = AnalyzeAPK(
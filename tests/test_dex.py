@@ -1,6 +1,8 @@
 import binascii
+import io
 import os
 import random
+import struct
 import unittest
 
 from androguard.core import dex
@@ -170,6 +172,117 @@ class VMClassTest(unittest.TestCase):
                             field.get_access_flags(), expected_access_flags
                         )
 
+    def testClassIndex(self):
+        """Test the indexed class and member lookups"""
+        for d in self.d:
+            for cls in d.get_classes():
+                name = cls.get_name()
+                self.assertIs(d.get_class(name), cls)
+
+                methods = [
+                    m
+                    for m in d.get_encoded_methods()
+                    if m.get_class_name() == name
+                ]
+                self.assertEqual(d.get_encoded_methods_class(name), methods)
+                fields = [
+                    f
+                    for f in d.get_encoded_fields()
+                    if f.get_class_name() == name
+                ]
+                self.assertEqual(d.get_encoded_fields_class(name), fields)
+
+                for m in methods:
+                    self.assertIs(
+                        d.get_encoded_methods_class_method(name, m.get_name()),
+                        next(
+                            x for x in methods if x.get_name() == m.get_name()
+                        ),
+                    )
+
+            self.assertIsNone(d.get_class("Lnot/existing/Class;"))
+            self.assertEqual(
+                d.get_encoded_methods_class("Lnot/existing/Class;"), []
+            )
+            self.assertIsNone(
+                d.get_encoded_methods_class_method(
+                    "Lnot/existing/Class;", "<init>"
+                )
+            )
+
+    def testLEB128(self):
+        """test the decoding of LEB128 values"""
+        cm = MockClassManager()
+        values = [0, 1, 0x7F, 0x80, 0x3FFF, 0x4000, 0x1FFFFF, 0xFFFFFFF]
+        values += [0xFFFFFFFF, random.randrange(0x100000000)]
+        buff = io.BytesIO(
+            b''.join(dex.writeuleb128(cm, v) for v in values)
+            + b''.join(dex.writesleb128(cm, -v >> 1) for v in values)
+        )
+        for v in values:
+            self.assertEqual(dex.readuleb128(cm, buff), v)
+        for v in values:
+            self.assertEqual(dex.readsleb128(cm, buff), -v >> 1)
+        self.assertEqual(buff.read(), b'')
+
+        # truncated values raise the same error as get_byte
+        for data in (b'', b'\x80', b'\xff\xff\xff\xff'):
+            for read in (dex.readuleb128, dex.readsleb128):
+                with self.assertRaises(struct.error):
+                    read(cm, io.BytesIO(data))
+
+        # MUTF-8 strings, with and without the ASCII shortcut
+        for data, string in (
+            (b'\x02Lfoo/Bar;\x00', 'Lfoo/Bar;'),
+            (b'\x02\xc0\x80\xea\xb3\xb0\x00', '\x00\uacf0'),
+        ):
+            item = dex.StringDataItem(io.BytesIO(data), cm)
+            self.assertEqual(item.get(), string)
+
+    def testLazyDEX(self):
+        """test that a lazy DEX gives the same results"""
+        d = dex.DEX(self.a.get_dex())
+        d_lazy = dex.DEX(self.a.get_dex(), lazy=True)
+
+        cls = d_lazy.get_class('Ltests/androguard/TestActivity;')
+        self.assertIsNotNone(cls)
+        self.assertListEqual(
+            [m.get_name() for m in cls.get_methods()],
+            [
+                m.get_name()
+                for m in d.get_class(
+                    'Ltests/androguard/TestActivity;'
+                ).get_methods()
+            ],
+        )
+
+        self.assertListEqual(d.get_classes_names(), d_lazy.get_classes_names())
+        self.assertListEqual(d.get_strings(), d_lazy.get_strings())
+        for m, m_lazy in zip(
+            d.get_encoded_methods(), d_lazy.get_encoded_methods()
+        ):
+            self.assertEqual(m.get_class_name(), m_lazy.get_class_name())
+            self.assertEqual(m.get_name(), m_lazy.get_name())
+            self.assertEqual(m.get_descriptor(), m_lazy.get_descriptor())
+            self.assertEqual(m.get_code_off(), m_lazy.get_code_off())
+            if m.get_code():
+                self.assertEqual(
+                    m.get_code().get_bc().get_raw(),
+                    m_lazy.get_code().get_bc().get_raw(),
+                )
+                self.assertEqual(
+                    m.get_code().get_debug_info_off(),
+                    m_lazy.get_code().get_debug_info_off(),
+                )
+
+        # Items parsed on demand are reused when the whole list is parsed
+        self.assertIs(
+            cls.get_class_data(),
+            d_lazy.get_class_manager().get_class_data_item(
+                cls.get_class_data_off()
+            ),
+        )
+
 
 class InstructionTest(unittest.TestCase):
     def testInstructions(self):
@@ -198,6 +311,10 @@ class InstructionTest(unittest.TestCase):
             instruction = ins(MockClassManager(), bytecode)
             self.assertIsInstance(instruction, dex.Instruction)
             self.assertEqual(instruction.get_op_value(), op_value)
+            self.assertEqual(instruction.get_name(), name[0])
+
+            # The per opcode data lives in the shared tables only
+            self.assertFalse(hasattr(instruction, "__dict__"))
 
             # And packed again
             self.assertEqual(instruction.get_raw(), bytecode)
@@ -251,6 +368,35 @@ class InstructionTest(unittest.TestCase):
         self.assertEqual(instructions, [])
         self.assertEqual(len(bytecode), l)
 
+    def testLinearSweepLargeMethod(self):
+        """Test a method with many instructions and a truncated last one"""
+        # const/16 v0, 1; add-int/lit8 v0, v0, 1; nop
+        bytecode = bytearray(
+            b"\x13\x00\x01\x00" b"\xd8\x00\x00\x01" b"\x00\x00"
+        )
+        bytecode *= 20000
+
+        instructions = list(
+            dex.LinearSweepAlgorithm.get_instructions(
+                MockClassManager(), len(bytecode) // 2, bytecode, 0
+            )
+        )
+        self.assertEqual(len(instructions), 60000)
+        self.assertEqual(
+            [ins.get_name() for ins in instructions[-3:]],
+            ['const/16', 'add-int/lit8', 'nop'],
+        )
+        self.assertEqual(
+            sum(ins.get_length() for ins in instructions), len(bytecode)
+        )
+
+        with self.assertRaises(dex.InvalidInstruction):
+            list(
+                dex.LinearSweepAlgorithm.get_instructions(
+                    MockClassManager(), 3, bytecode[:5], 0
+                )
+            )
+
     def testLinearSweepStrings(self):
         # very basic function, strings and invokes
         bytecode = bytearray(
@@ -409,6 +555,11 @@ class InstructionTest(unittest.TestCase):
                 elem_size, size = arrays.pop(0)
                 self.assertEqual(ins.element_width, elem_size)
                 self.assertEqual(ins.size, size)
+                self.assertIsInstance(ins.get_data(), bytes)
+                self.assertEqual(
+                    ins.get_raw(),
+                    bytes(bytecode[l : l + ins.get_length()]),
+                )
             l += ins.get_length()
 
         # check if all instructions were consumed
@@ -24,6 +24,17 @@ class RenameTest(unittest.TestCase):
         self.assertEqual(meth.get_name(), "blablaMyMethod")
         self.assertIn(meth.get_name(), [i.name for i in clas.get_methods()])
         self.assertNotIn("testDouble", [i.name for i in clas.get_methods()])
+        self.assertIs(
+            self.d.get_encoded_methods_class_method(
+                meth.get_class_name(), "blablaMyMethod"
+            ),
+            meth,
+        )
+        self.assertIsNone(
+            self.d.get_encoded_methods_class_method(
+                meth.get_class_name(), "testDouble"
+            )
+        )
 
     def testFieldRename(self):
         (field,) = self.d.get_encoded_field("FLAG_REGISTER_CONTENT_OBSERVER")
@@ -38,6 +49,8 @@ class RenameTest(unittest.TestCase):
         self.assertEqual(clazz.get_name(), "LTestDefaultPackage;")
         clazz.set_name("LMySuperDefaultPackage;")
         self.assertEqual(clazz.get_name(), "LMySuperDefaultPackage;")
+        self.assertIs(self.d.get_class("LMySuperDefaultPackage;"), clazz)
+        self.assertIsNone(self.d.get_class("LTestDefaultPackage;"))
 
 
 if __name__ == '__main__':
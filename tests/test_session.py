@@ -0,0 +1,143 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+from androguard.session import EventWriter, Session
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+TEST_APK = os.path.join(test_dir, 'data/APK/TestActivity.apk')
+TEST_DEX = os.path.join(test_dir, 'data/APK/Annotation_classes.dex')
+
+
+def generate_events(count, seed=42):
+    """
+    Generate synthetic events, as the Frida hooks send them when tracing
+    """
+    rng = random.Random(seed)
+    methods = [
+        "Landroid/telephony/TelephonyManager;->getDeviceId()",
+        "Ljava/net/URL;->openConnection()",
+        "Landroid/content/Context;->getSharedPreferences()",
+        "Ljavax/crypto/Cipher;->doFinal()",
+    ]
+    for i in range(count):
+        call, callee = rng.sample(methods, 2)
+        yield dict(
+            call=call,
+            callee=callee,
+            params={"arg0": str(i), "arg1": rng.randrange(1 << 16)},
+            ret='"{}"'.format(i),
+        )
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_url = "sqlite:///" + os.path.join(self.tmp, "androguard.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def testEventWriter(self):
+        s = Session(db_url=self.db_url)
+        writer = s.start_event_writer(batch_size=100, flush_interval=10)
+        self.assertIs(s.start_event_writer(), writer)
+
+        events = list(generate_events(1000))
+        for event in events:
+            s.insert_event(**event)
+        s.insert_system_event(
+            call=None, callee="open", information="open", params={"fd": 3}
+        )
+        # flush writes without waiting for the flush interval
+        tic = time.perf_counter()
+        s.save()
+        self.assertLess(time.perf_counter() - tic, 10)
+
+        rows = list(s.table_pentest.find(order_by="id"))
+        self.assertEqual(len(rows), len(events))
+        for row, event in zip(rows, events):
+            self.assertEqual(row["call"], event["call"])
+            self.assertEqual(row["params"], event["params"])
+            self.assertEqual(row["ret"], event["ret"])
+            self.assertEqual(row["session_id"], str(s.session_id))
+        self.assertEqual(len(s.table_system), 1)
+
+        metrics = writer.get_metrics()
+        self.assertEqual(metrics["queued"], len(events) + 1)
+        self.assertEqual(metrics["written"], len(events) + 1)
+        self.assertEqual(metrics["pending"], 0)
+        self.assertEqual(metrics["errors"], 0)
+        self.assertGreaterEqual(metrics["batches"], 11)
+        self.assertLess(metrics["batches"], len(events))
+
+        s.stop_event_writer()
+        self.assertIsNone(s.event_writer)
+        with self.assertRaises(ValueError):
+            writer.put("pentest", {})
+
+        # without the writer, events are inserted directly
+        s.insert_event(**events[0])
+        self.assertEqual(len(s.table_pentest), len(events) + 1)
+
+    def testEventWriterBackpressure(self):
+        s = Session(db_url=self.db_url)
+        writer = EventWriter(
+            s.db, max_queue_size=10, batch_size=5, flush_interval=0.01
+        )
+        for event in generate_events(500):
+            writer.put("pentest", event)
+        writer.close()
+
+        metrics = writer.get_metrics()
+        self.assertEqual(metrics["written"], 500)
+        self.assertLessEqual(metrics["max_queued"], 10)
+        self.assertGreater(metrics["blocked"], 0)
+        self.assertEqual(len(s.db["pentest"]), 500)
+
+    def testStore(self):
+        store_path = os.path.join(self.tmp, "store")
+        s = Session(db_url=self.db_url, store_path=store_path, max_loaded=1)
+
+        apk_digest = s.add(TEST_APK)
+        a, vms, dx = s.get_objects_apk(digest=apk_digest)
+        apk_classes = sorted(c.name for c in dx.get_classes())
+        apk_xrefs = len(list(dx.find_methods("Landroid/app/Activity;")))
+        del a, vms, dx
+
+        dex_digest = s.add(TEST_DEX)
+        # only the most recently added file is kept in memory
+        self.assertNotIn(apk_digest, s.analyzed_apk)
+        self.assertNotIn(apk_digest, s.analyzed_vms)
+        self.assertIn(dex_digest, s.analyzed_dex)
+        self.assertEqual(len(s.analyzed_dex), 1)
+        self.assertTrue(os.listdir(os.path.join(store_path, "xref")))
+
+        # the APK is loaded again, and the DEX file removed instead
+        a, vms, dx = s.get_objects_apk(digest=apk_digest)
+        self.assertEqual(a.get_package(), "tests.androguard")
+        self.assertEqual(len(vms), 1)
+        self.assertEqual(sorted(c.name for c in dx.get_classes()), apk_classes)
+        self.assertEqual(
+            len(list(dx.find_methods("Landroid/app/Activity;"))), apk_xrefs
+        )
+        self.assertNotIn(dex_digest, s.analyzed_dex)
+        self.assertIs(vms[0].CM.get_analysis(), dx)
+
+        a, vms, dx = s.get_objects_apk(filename=TEST_APK)
+        self.assertEqual(a.get_package(), "tests.androguard")
+
+        digests = [digest for digest, d, dx in s.get_objects_dex()]
+        self.assertEqual(len(digests), 2)
+        self.assertEqual(digests[1], dex_digest)
+        self.assertEqual(
+            [digest for digest, _ in s.get_all_apks()], [apk_digest]
+        )
+        self.assertLessEqual(len(s.analyzed_vms), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
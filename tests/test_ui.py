@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from androguard.message import MessageEvent, MessageSystem
+from androguard.ui.data_types import DisplayTransaction
+from androguard.ui.filter import Filter
+from androguard.ui.selection import SelectionViewList
+from androguard.ui.store import TransactionStore
+
+
+def generate_transactions(count, seed=42):
+    rng = random.Random(seed)
+    frames = [
+        "android.telephony.TelephonyManager.getDeviceId(Native Method)",
+        "java.net.URL.openConnection(URL.java:1)",
+        "android.app.ContextImpl.getSharedPreferences(ContextImpl.java:2)",
+        "javax.crypto.Cipher.doFinal(Cipher.java:3)",
+        None,
+    ]
+    for i in range(count):
+        message = rng.choice([MessageEvent, MessageSystem])
+        yield DisplayTransaction(
+            message(i, rng.choice(frames), rng.choice(frames), {}, "")
+        )
+
+
+class UITest(unittest.TestCase):
+    def testDisplayTransaction(self):
+        t = DisplayTransaction(
+            MessageEvent(
+                0, "a.B.c(B.java:1)", "java.net.URL.openConnection()", {}, ""
+            )
+        )
+        self.assertEqual(t.interface, "a.B")
+        self.assertEqual(t.method, "c")
+        self.assertEqual(t.to_method, "a.B.c(B.java:1)")
+
+    def testTransactionStore(self):
+        transactions = list(generate_transactions(1000))
+        store = TransactionStore(max_size=300)
+        dropped = store.extend(transactions[:200])
+        self.assertEqual(dropped, [])
+        dropped = store.extend(transactions[200:])
+        self.assertEqual(dropped, transactions[:700])
+        self.assertEqual(len(store), 300)
+        self.assertEqual(list(store), transactions[700:])
+        self.assertEqual(store[0], transactions[700])
+        self.assertEqual(store[-1], transactions[-1])
+        self.assertEqual(store.first, 700)
+        self.assertEqual(store.end, 1000)
+
+        filters = [
+            None,
+            Filter(),
+            Filter(interface="java.net"),
+            Filter(method="get"),
+            Filter(interface="android", method="get"),
+            Filter(types=["oneway"]),
+            Filter(types=["call", "return"]),
+            Filter(interface="javax", types=["oneway"]),
+            Filter(interface="unknown"),
+        ]
+        for f in filters:
+            for _ in range(2):
+                with self.subTest(filter=str(f), inclusive=f and f.inclusive):
+                    expected = [t for t in store if f is None or f.passes(t)]
+                    self.assertEqual(store.select(f), expected)
+                if f is not None:
+                    f.toggle_inclusivity()
+
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.select(Filter()), [])
+        self.assertEqual(store.values("interface"), [])
+
+    def testSelectionViewListRemoveFirst(self):
+        items = SelectionViewList(range(100), max_view_size=10)
+        items.move_selection(50)
+        self.assertEqual(items.selected(), 50)
+
+        items.remove_first(20)
+        self.assertEqual(len(items), 80)
+        self.assertEqual(items.selected(), 50)
+        self.assertLessEqual(items.view.start, items.selection)
+        self.assertLess(items.selection, items.view.end)
+
+        items.remove_first(70)
+        self.assertEqual(items.selected(), 90)
+        self.assertEqual(items.view.start, 0)
+        self.assertEqual(items.view.end, 10)
+
+        items.remove_first(10)
+        self.assertFalse(items.selection_valid())
+
+
+if __name__ == '__main__':
+    unittest.main()